@@ -9,6 +9,7 @@ const canvas = document.getElementById('canvas');
 const startCameraBtn = document.getElementById('start-camera');
 const captureRecognizeBtn = document.getElementById('capture-recognize');
 const stopCameraBtn = document.getElementById('stop-camera');
+const autoScanToggle = document.getElementById('auto-scan');
 const recognitionResult = document.getElementById('recognition-result');
 
 // Registration elements
@@ -31,6 +32,48 @@ let stream = null;
 let registerStream = null;
 let capturedImages = [];
 
+// Send frames as binary Socket.IO attachments (falls back to base64 data URLs when unsupported)
+const USE_BINARY_FRAMES = typeof HTMLCanvasElement.prototype.toBlob === 'function';
+const JPEG_QUALITY = 0.8;
+
+// Server-driven pacing: one frame in flight at a time, spaced by the interval the server recommends
+const frameFlow = {
+    inFlight: false,
+    lastSentAt: 0,
+    intervalMs: 2000,
+    timeoutMs: 10000
+};
+
+// Auto-scan mode: frames are only uploaded when the scene changed, downscaled, and cropped
+// to the area around the faces the server found in its previous reply
+const AUTO_SCAN_POLL_MS = 150;
+const MAX_UPLOAD_WIDTH = 480;
+const ROI_MARGIN = 0.6;           // of the face size, added on every side of the faces' bounding box
+const ROI_TTL_MS = 3000;          // older face positions are not trusted for cropping
+const FULL_FRAME_EVERY_MS = 3000; // upload the whole frame at least this often so new arrivals are seen
+const MOTION_THRESHOLD = 6;       // mean absolute grey-level change (0-255) of the thumbnail
+const MAX_IDLE_MS = 5000;         // upload at least this often even when nothing changed
+const GATE_WIDTH = 32;
+const GATE_HEIGHT = 24;
+
+const clientMode = {
+    timer: null,
+    gateCanvas: document.createElement('canvas'),
+    uploadCanvas: document.createElement('canvas'),
+    lastThumb: null,
+    lastUploadAt: 0,
+    fullFrameAt: 0,
+    faces: [],
+    facesAt: 0,
+    gated: 0,
+    gatedTotal: 0,
+    uploads: 0,
+    bytesSent: 0,
+    fullBytesEstimate: 0
+};
+clientMode.gateCanvas.width = GATE_WIDTH;
+clientMode.gateCanvas.height = GATE_HEIGHT;
+
 // Socket.IO event handlers
 socket.on('connect', () => {
     console.log('Connected to server');
@@ -49,17 +92,30 @@ socket.on('connection_response', (data) => {
 });
 
 socket.on('recognition_success', (data) => {
+    logTransport(data.transport);
+    rememberFaces(data.faces);
+    updateFlow(data.flow);
     displayRecognitionResult(data, true);
 });
 
 socket.on('recognition_result', (data) => {
+    logTransport(data.transport);
+    rememberFaces(data.faces);
+    updateFlow(data.flow);
     displayRecognitionResult(data, false);
 });
 
 socket.on('recognition_error', (data) => {
+    updateFlow(data.flow);
     showError(recognitionResult, data.error);
 });
 
+socket.on('frame_dropped', (data) => {
+    console.log(data.message);
+    updateFlow(data.flow);
+    showError(recognitionResult, 'Server was busy, please try again.');
+});
+
 socket.on('registration_success', (data) => {
     showSuccess(registrationResult, data.message);
     registrationForm.reset();
@@ -125,20 +181,197 @@ captureRecognizeBtn.addEventListener('click', () => {
     canvas.height = video.videoHeight;
     context.drawImage(video, 0, 0);
 
-    const imageData = canvas.toDataURL('image/jpeg', 0.8);
-
     recognitionResult.innerHTML = '<p>🔍 Processing... Please wait</p>';
     recognitionResult.className = 'result-box info';
     recognitionResult.style.display = 'block';
 
     captureRecognizeBtn.disabled = true;
 
-    socket.emit('recognize_face', { image: imageData });
+    if (!sendFrame(canvas)) {
+        scheduleCaptureReady();
+    }
+});
 
-    // Re-enable button after 2 seconds
+// Whether the server is ready for another frame: nothing in flight and the recommended interval has passed
+function canSendFrame() {
+    const now = performance.now();
+    const waiting = frameFlow.inFlight && now - frameFlow.lastSentAt < frameFlow.timeoutMs;
+    return !waiting && now - frameFlow.lastSentAt >= frameFlow.intervalMs;
+}
+
+// Called with the flow info attached to every recognition reply
+function updateFlow(flow) {
+    frameFlow.inFlight = false;
+    if (flow) {
+        frameFlow.intervalMs = flow.recommended_interval_ms;
+        console.log(`Server pacing: one frame every ${flow.recommended_interval_ms} ms, ` +
+            `${flow.effective_fps} FPS effective, ${flow.dropped} frames dropped`);
+    }
+    scheduleCaptureReady();
+}
+
+// Re-enable the capture button once the server's recommended interval has elapsed
+function scheduleCaptureReady() {
+    const wait = Math.max(0, frameFlow.lastSentAt + frameFlow.intervalMs - performance.now());
     setTimeout(() => {
-        captureRecognizeBtn.disabled = false;
-    }, 2000);
+        if (stream) {
+            captureRecognizeBtn.disabled = false;
+        }
+    }, wait);
+}
+
+// Encode the canvas as JPEG and send it for recognition; returns false if the server asked us to wait.
+// `roi` ({x, y, scale, full_width, full_height}) describes a cropped/downscaled upload.
+function sendFrame(sourceCanvas, roi = null) {
+    if (!canSendFrame()) {
+        return false;
+    }
+    const payload = { gated: clientMode.gated };
+    if (roi) {
+        payload.roi = roi;
+    }
+    clientMode.gated = 0;
+    clientMode.lastUploadAt = performance.now();
+    // Full-frame pixels per uploaded pixel, to estimate what an uncropped upload would have cost
+    const pixelRatio = roi ? (roi.full_width * roi.full_height) / (sourceCanvas.width * sourceCanvas.height) : 1;
+    frameFlow.inFlight = true;
+    frameFlow.lastSentAt = performance.now();
+    // Give up waiting for a reply that never comes (e.g. after a reconnect)
+    setTimeout(() => {
+        if (frameFlow.inFlight && performance.now() - frameFlow.lastSentAt >= frameFlow.timeoutMs) {
+            updateFlow(null);
+        }
+    }, frameFlow.timeoutMs);
+
+    if (!USE_BINARY_FRAMES) {
+        payload.image = sourceCanvas.toDataURL('image/jpeg', JPEG_QUALITY);
+        countUpload(payload.image.length, pixelRatio);
+        socket.emit('recognize_face', payload);
+        return true;
+    }
+    sourceCanvas.toBlob(async (blob) => {
+        payload.image = await blob.arrayBuffer();
+        countUpload(blob.size, pixelRatio);
+        socket.emit('recognize_face', payload);
+    }, 'image/jpeg', JPEG_QUALITY);
+    return true;
+}
+
+function countUpload(bytes, pixelRatio) {
+    clientMode.uploads += 1;
+    clientMode.bytesSent += bytes;
+    clientMode.fullBytesEstimate += bytes * pixelRatio;
+}
+
+// Face boxes (full-frame pixels) from the latest reply, used to crop the next auto-scan upload
+function rememberFaces(faces) {
+    clientMode.faces = faces || [];
+    clientMode.facesAt = performance.now();
+    if (autoScanToggle.checked && clientMode.uploads) {
+        // Gated frames were never sent; count them at the average full-frame size
+        const avgFull = clientMode.fullBytesEstimate / clientMode.uploads;
+        const saved = clientMode.fullBytesEstimate - clientMode.bytesSent + clientMode.gatedTotal * avgFull;
+        console.log(`Auto-scan: ${clientMode.uploads} uploads, ${(clientMode.bytesSent / 1024).toFixed(1)} KiB sent, ` +
+            `~${(saved / 1024).toFixed(1)} KiB saved, ${clientMode.gatedTotal} unchanged frames skipped`);
+    }
+}
+
+// Small greyscale thumbnail of a frame, compared by sceneChange
+function gateThumbnail(sourceCanvas) {
+    const context = clientMode.gateCanvas.getContext('2d', { willReadFrequently: true });
+    context.drawImage(sourceCanvas, 0, 0, GATE_WIDTH, GATE_HEIGHT);
+    const pixels = context.getImageData(0, 0, GATE_WIDTH, GATE_HEIGHT).data;
+    const thumb = new Uint8Array(GATE_WIDTH * GATE_HEIGHT);
+    for (let i = 0; i < thumb.length; i++) {
+        thumb[i] = (pixels[i * 4] * 77 + pixels[i * 4 + 1] * 150 + pixels[i * 4 + 2] * 29) >> 8;
+    }
+    return thumb;
+}
+
+// Mean absolute change of a thumbnail since the last uploaded frame
+function sceneChange(thumb) {
+    const previous = clientMode.lastThumb;
+    if (!previous) {
+        return Infinity;
+    }
+    let total = 0;
+    for (let i = 0; i < thumb.length; i++) {
+        total += Math.abs(thumb[i] - previous[i]);
+    }
+    return total / thumb.length;
+}
+
+// Crop around the recently seen faces (if any) and downscale to MAX_UPLOAD_WIDTH. Faces keep
+// being found inside the crop, so a full frame is still sent every FULL_FRAME_EVERY_MS to catch
+// anyone entering elsewhere in the picture.
+function prepareUpload(sourceCanvas) {
+    const fullWidth = sourceCanvas.width;
+    const fullHeight = sourceCanvas.height;
+    let x = 0, y = 0, width = fullWidth, height = fullHeight;
+    const faces = clientMode.faces;
+    const now = performance.now();
+    if (faces.length && now - clientMode.facesAt < ROI_TTL_MS && now - clientMode.fullFrameAt < FULL_FRAME_EVERY_MS) {
+        const x1 = Math.min(...faces.map(f => f[0]));
+        const y1 = Math.min(...faces.map(f => f[1]));
+        const x2 = Math.max(...faces.map(f => f[2]));
+        const y2 = Math.max(...faces.map(f => f[3]));
+        const margin = ROI_MARGIN * Math.max(...faces.map(f => Math.max(f[2] - f[0], f[3] - f[1])));
+        x = Math.max(0, Math.floor(x1 - margin));
+        y = Math.max(0, Math.floor(y1 - margin));
+        width = Math.min(fullWidth, Math.ceil(x2 + margin)) - x;
+        height = Math.min(fullHeight, Math.ceil(y2 + margin)) - y;
+    }
+    const scale = Math.min(1, MAX_UPLOAD_WIDTH / width);
+    const full = x === 0 && y === 0 && width === fullWidth && height === fullHeight;
+    if (full && scale === 1) {
+        return { canvas: sourceCanvas, roi: null, full: true };
+    }
+    const upload = clientMode.uploadCanvas;
+    upload.width = Math.max(1, Math.round(width * scale));
+    upload.height = Math.max(1, Math.round(height * scale));
+    upload.getContext('2d').drawImage(sourceCanvas, x, y, width, height, 0, 0, upload.width, upload.height);
+    return {
+        canvas: upload,
+        roi: { x: x, y: y, scale: upload.width / width, full_width: fullWidth, full_height: fullHeight },
+        full: full
+    };
+}
+
+// One auto-scan step: upload when the server is ready and the scene changed (or has been idle too long)
+function autoScanTick() {
+    if (!stream || !autoScanToggle.checked || !video.videoWidth || !canSendFrame()) {
+        return;
+    }
+    canvas.width = video.videoWidth;
+    canvas.height = video.videoHeight;
+    canvas.getContext('2d').drawImage(video, 0, 0);
+
+    const thumb = gateThumbnail(canvas);
+    if (sceneChange(thumb) < MOTION_THRESHOLD && performance.now() - clientMode.lastUploadAt < MAX_IDLE_MS) {
+        clientMode.gated += 1;
+        clientMode.gatedTotal += 1;
+        return;
+    }
+    const upload = prepareUpload(canvas);
+    if (sendFrame(upload.canvas, upload.roi)) {
+        // Gated frames leave the reference alone, so a slow approach still adds up to a change
+        clientMode.lastThumb = thumb;
+        if (upload.full) {
+            clientMode.fullFrameAt = performance.now();
+        }
+    }
+}
+
+autoScanToggle.addEventListener('change', () => {
+    clearInterval(clientMode.timer);
+    clientMode.timer = null;
+    clientMode.lastThumb = null;
+    if (autoScanToggle.checked) {
+        recognitionResult.innerHTML = '<p>🔍 Auto-scan on: frames are sent when the scene changes</p>';
+        recognitionResult.className = 'result-box info';
+        recognitionResult.style.display = 'block';
+        clientMode.timer = setInterval(autoScanTick, AUTO_SCAN_POLL_MS);
+    }
 });
 
 stopCameraBtn.addEventListener('click', () => {
@@ -275,6 +508,12 @@ function displayAttendanceRecords(records) {
     });
 }
 
+function logTransport(transport) {
+    if (transport) {
+        console.log(`Frame sent as ${transport.mode}: ${transport.bytes} bytes, decoded in ${transport.decode_ms} ms`);
+    }
+}
+
 // Display functions
 function displayRecognitionResult(data, isSuccess) {
     if (data.students && data.students.length > 0) {
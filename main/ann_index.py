@@ -0,0 +1,193 @@
+import threading
+import numpy as np
+from gallery import best_matches, normalize
+from compact_store import create_gallery
+from multi_template import MultiTemplateGallery
+
+INDEX_BACKENDS = ("exact", "ivf", "multi")
+
+
+def create_index(backend="exact", dim=128, **options):
+    """
+    Creates the matching backend used to hold the known faces.
+
+    Args:
+        backend (str): 'exact' for the brute-force Gallery, 'ivf' for the approximate IVFIndex
+            or 'multi' for the centroid + exemplar MultiTemplateGallery.
+        dim (int): Embedding dimension.
+        **options: 'dtype' ('float32', 'float16' or 'int8') for the stored rows of either
+            backend, plus extra keyword arguments for the IVF backend (nlist, nprobe, ...) or the
+            multi-template backend (templates, rerank, ...).
+
+    Returns:
+        Gallery, IVFIndex or MultiTemplateGallery: An empty index.
+    """
+    if backend == "exact":
+        return create_gallery(options.pop("dtype", "float32"), dim=dim, **options)
+    if backend == "ivf":
+        return IVFIndex(dim=dim, **options)
+    if backend == "multi":
+        if options.pop("dtype", "float32") != "float32":
+            raise ValueError("The multi-template backend stores float32 embeddings only")
+        return MultiTemplateGallery(dim=dim, **options)
+    raise ValueError(f"Unknown index backend '{backend}', expected one of {INDEX_BACKENDS}")
+
+
+def spherical_kmeans(vectors, k, iterations=20, seed=0):
+    """
+    Clusters unit vectors into k groups by cosine similarity.
+
+    Returns:
+        numpy.ndarray: A (k, dim) float32 array of L2-normalised centroids.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        counts = np.bincount(assign, minlength=k)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty clusters with random points so every list stays in use
+            sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()), replace=False)]
+        centroids = normalize(sums)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Approximate nearest-neighbour index using an inverted file (IVF).
+
+    A spherical k-means coarse quantiser splits the gallery into `nlist`
+    inverted lists, each stored as its own Gallery. A query only scans the
+    `nprobe` lists whose centroids are closest, so `nprobe` is the
+    recall-vs-latency knob: nprobe == nlist is an exact search.
+
+    Until `train_threshold` vectors have been added the index keeps everything
+    in a single list and searches exactly. New registrations after training are
+    inserted incrementally into their nearest list; call `train()` again to
+    rebalance once the gallery has grown a lot.
+
+    Like Gallery, the index is shared between the server's threads: add, remove,
+    train and search hold one re-entrant lock, so a search never sees the lists
+    half-redistributed by a training pass.
+    """
+
+    def __init__(self, dim=128, nlist=64, nprobe=8, train_threshold=None, kmeans_iterations=20, seed=0,
+                 dtype="float32"):
+        self.dim = dim
+        self.dtype = dtype
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold if train_threshold is not None else 39 * nlist
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self.centroids = None
+        self._lists = [create_gallery(dtype, dim=dim)]
+        self._assignment = {}
+        self._lock = threading.RLock()
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def __len__(self):
+        return len(self._assignment)
+
+    def __contains__(self, reg_no):
+        return reg_no in self._assignment
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._assignment))
+
+    def get(self, reg_no):
+        """Returns the normalised embedding stored for a student, or None."""
+        with self._lock:
+            list_id = self._assignment.get(reg_no)
+            return None if list_id is None else self._lists[list_id].get(reg_no)
+
+    def _all_vectors(self):
+        reg_nos = [r for lst in self._lists for r in lst.reg_nos.tolist()]
+        matrices = [lst.matrix for lst in self._lists if len(lst)]
+        vectors = np.concatenate(matrices) if matrices else np.empty((0, self.dim), dtype=np.float32)
+        return reg_nos, vectors
+
+    def train(self):
+        """Fits the coarse quantiser on the current gallery and redistributes every vector."""
+        with self._lock:
+            reg_nos, vectors = self._all_vectors()
+            if len(vectors) < self.nlist:
+                return False
+            sample = vectors
+            max_train = 256 * self.nlist
+            if len(vectors) > max_train:
+                rng = np.random.default_rng(self.seed)
+                sample = vectors[rng.choice(len(vectors), size=max_train, replace=False)]
+            self.centroids = spherical_kmeans(sample, self.nlist, self.kmeans_iterations, self.seed)
+
+            assign = np.argmax(vectors @ self.centroids.T, axis=1)
+            self._lists = [create_gallery(self.dtype, dim=self.dim, capacity=max(64, int(c)))
+                           for c in np.bincount(assign, minlength=self.nlist)]
+            self._assignment = {}
+            for reg_no, vec, list_id in zip(reg_nos, vectors, assign.tolist()):
+                self._lists[list_id].add(reg_no, vec)
+                self._assignment[reg_no] = list_id
+            return True
+
+    def add(self, reg_no, embedding):
+        """Adds (or replaces) a student's embedding in its nearest inverted list."""
+        vec = normalize(np.reshape(embedding, (self.dim,)))
+        with self._lock:
+            if reg_no in self._assignment:
+                self.remove(reg_no)
+            list_id = int(np.argmax(self.centroids @ vec)) if self.is_trained else 0
+            self._lists[list_id].add(reg_no, vec)
+            self._assignment[reg_no] = list_id
+            if not self.is_trained and len(self._assignment) >= self.train_threshold:
+                self.train()
+
+    def remove(self, reg_no):
+        """Removes a student from the index. Returns False if they were not present."""
+        with self._lock:
+            list_id = self._assignment.pop(reg_no, None)
+            if list_id is None:
+                return False
+            return self._lists[list_id].remove(reg_no)
+
+    def search(self, embeddings, k=1):
+        """
+        Finds the approximate top-k students for each query embedding.
+
+        Returns:
+            list: For each query, a list of up to k (reg_no, cosine_similarity)
+            tuples sorted from best to worst.
+        """
+        queries = normalize(np.reshape(embeddings, (-1, self.dim)))
+        with self._lock:
+            if not self.is_trained:
+                return self._lists[0].search(queries, k)
+
+            nprobe = max(1, min(self.nprobe, self.nlist))
+            coarse = queries @ self.centroids.T
+            probes = np.argpartition(-coarse, nprobe - 1, axis=1)[:, :nprobe]
+
+            # Scan each probed list once for all the queries that probe it
+            per_query = [[] for _ in range(len(queries))]
+            for list_id in np.unique(probes):
+                lst = self._lists[list_id]
+                if not len(lst):
+                    continue
+                query_ids = np.nonzero((probes == list_id).any(axis=1))[0]
+                for q, candidates in zip(query_ids.tolist(), lst.search(queries[query_ids], k)):
+                    per_query[q].extend(candidates)
+
+            return [sorted(c, key=lambda item: item[1], reverse=True)[:k] for c in per_query]
+
+    def match(self, embeddings, threshold):
+        """
+        Returns the best (reg_no, score) for each query; reg_no is None when the
+        best cosine similarity does not exceed the threshold.
+        """
+        return best_matches(self.search(embeddings, k=1), threshold)
@@ -0,0 +1,237 @@
+"""
+Streaming export of attendance records (joined with student details).
+
+Rows are read from SQLite in fixed-size fetchmany chunks and each chunk is
+encoded and written (or sent as one HTTP chunk) before the next is read, so
+memory use stays constant however large the table is.
+
+Formats:
+    csv       Plain CSV with a header row.
+    columnar  Compact binary file made of row groups, one per chunk. Each
+              column of a row group is dictionary-encoded (distinct values plus
+              the narrowest integer codes) and zlib-compressed, which suits the
+              heavily repeated reg_no/name/semester/date values. read_columnar()
+              reads it back.
+
+Usage:
+    python attendance_export.py --format csv --from 2026-01-01 --to 2026-06-30 --out term.csv
+    python attendance_export.py --format columnar --out attendance.attcol
+"""
+import argparse
+import csv
+import io
+import json
+import sqlite3
+import struct
+import sys
+import time
+import zlib
+import numpy as np
+from database_utils import DB_PATH, EXPORT_COLUMNS, iter_attendance_chunks
+
+EXPORT_FORMATS = ("csv", "columnar")
+EXPORT_CHUNK_ROWS = 5000
+MIME_TYPES = {"csv": "text/csv", "columnar": "application/octet-stream"}
+FILE_EXTENSIONS = {"csv": "csv", "columnar": "attcol"}
+
+COLUMNAR_MAGIC = b"ATTCOL\x00\x01"
+ROW_GROUP_TAG = b"RGRP"
+END_TAG = b"DONE"
+
+
+class ExportStats:
+    """Rows and bytes written by an export, and its throughput."""
+
+    def __init__(self):
+        self.rows = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def add(self, rows, data):
+        self.rows += rows
+        self.bytes += len(data)
+        self.seconds = time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self):
+        return (f"Exported {self.rows} rows ({self.bytes / 2 ** 20:.2f} MiB) in {self.seconds:.2f}s, "
+                f"{self.rows_per_second:.0f} rows/s")
+
+
+def open_export_connection(path=DB_PATH):
+    """Dedicated read-only connection, so a long export keeps one consistent snapshot under WAL."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+def _encode_column(values):
+    """Dictionary-encodes one column of a row group: distinct values, then one code per row."""
+    codes, distinct = [], {}
+    for value in values:
+        codes.append(distinct.setdefault(value, len(distinct)))
+    encoded = [b"" if value is None else str(value).encode("utf-8") for value in distinct]
+    # -1 marks NULL
+    lengths = np.array([-1 if value is None else len(e) for value, e in zip(distinct, encoded)], dtype="<i4")
+    code_dtype = "<u1" if len(distinct) <= 0x100 else "<u2" if len(distinct) <= 0x10000 else "<u4"
+    payload = b"".join([
+        struct.pack("<IB", len(distinct), np.dtype(code_dtype).itemsize),
+        lengths.tobytes(),
+        b"".join(encoded),
+        np.asarray(codes, dtype=code_dtype).tobytes(),
+    ])
+    return zlib.compress(payload, 6)
+
+
+def _decode_column(data, rows):
+    payload = zlib.decompress(data)
+    n, itemsize = struct.unpack_from("<IB", payload)
+    offset = struct.calcsize("<IB")
+    lengths = np.frombuffer(payload, dtype="<i4", count=n, offset=offset)
+    offset += lengths.nbytes
+    distinct = []
+    for length in lengths.tolist():
+        if length < 0:
+            distinct.append(None)
+            continue
+        distinct.append(payload[offset:offset + length].decode("utf-8"))
+        offset += length
+    codes = np.frombuffer(payload, dtype=f"<u{itemsize}", count=rows, offset=offset)
+    return [distinct[code] for code in codes.tolist()]
+
+
+def iter_csv(chunks, stats=None):
+    """Encodes row chunks as CSV, yielding the header row and then one bytes block per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain(rows):
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        if stats is not None:
+            stats.add(rows, data)
+        return data
+
+    writer.writerow(EXPORT_COLUMNS)
+    yield drain(0)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield drain(len(rows))
+
+
+def iter_columnar(chunks, stats=None):
+    """Encodes row chunks in the columnar format, yielding the header, one block per row group and the trailer."""
+    header = json.dumps({"columns": list(EXPORT_COLUMNS), "encoding": "dictionary+zlib"}).encode("utf-8")
+    data = COLUMNAR_MAGIC + struct.pack("<I", len(header)) + header
+    if stats is not None:
+        stats.add(0, data)
+    yield data
+    total = 0
+    for rows in chunks:
+        parts = [ROW_GROUP_TAG, struct.pack("<II", len(rows), len(EXPORT_COLUMNS))]
+        for column in zip(*rows):
+            encoded = _encode_column(column)
+            parts += [struct.pack("<I", len(encoded)), encoded]
+        data = b"".join(parts)
+        total += len(rows)
+        if stats is not None:
+            stats.add(len(rows), data)
+        yield data
+    data = END_TAG + struct.pack("<Q", total)
+    if stats is not None:
+        stats.add(0, data)
+    yield data
+
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated columnar file")
+    return data
+
+
+def read_columnar(f):
+    """
+    Reads a columnar export from a binary file object, one row group at a time.
+
+    Yields:
+        dict: column name -> list of values for each row group.
+    """
+    if _read_exact(f, len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ValueError("Not a columnar attendance export")
+    header = json.loads(_read_exact(f, struct.unpack("<I", _read_exact(f, 4))[0]))
+    columns = header["columns"]
+    while True:
+        tag = _read_exact(f, 4)
+        if tag == END_TAG:
+            return
+        if tag != ROW_GROUP_TAG:
+            raise ValueError("Corrupt columnar file")
+        rows, ncols = struct.unpack("<II", _read_exact(f, 8))
+        group = {}
+        for name in columns[:ncols]:
+            size = struct.unpack("<I", _read_exact(f, 4))[0]
+            group[name] = _decode_column(_read_exact(f, size), rows)
+        yield group
+
+
+def iter_export(conn, fmt="csv", date_from=None, date_to=None, chunk_size=EXPORT_CHUNK_ROWS, stats=None):
+    """Yields the encoded export as bytes blocks, one per fetched chunk of rows."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {EXPORT_FORMATS}")
+    chunks = iter_attendance_chunks(conn, date_from, date_to, chunk_size)
+    encode = iter_csv if fmt == "csv" else iter_columnar
+    return encode(chunks, stats)
+
+
+def export_attendance(conn, out, fmt="csv", date_from=None, date_to=None, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Writes the export to a binary file object.
+
+    Returns:
+        ExportStats: Rows, bytes, elapsed time and rows per second.
+    """
+    stats = ExportStats()
+    for data in iter_export(conn, fmt, date_from, date_to, chunk_size, stats):
+        out.write(data)
+    return stats
+
+
+def main():
+    from attendance_query import parse_filters
+
+    parser = argparse.ArgumentParser(description="Export attendance records to CSV or a compact columnar file.")
+    parser.add_argument("--format", default="csv", choices=EXPORT_FORMATS)
+    parser.add_argument("--from", dest="date_from", default=None, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", default=None, help="Last date (YYYY-MM-DD)")
+    parser.add_argument("--out", default="-", help="Output file ('-' for stdout)")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_ROWS, help="Rows per fetchmany/row group")
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    try:
+        filters = parse_filters({"from": args.date_from, "to": args.date_to})
+    except ValueError as e:
+        parser.error(str(e))
+    date_from = filters["from"].isoformat() if "from" in filters else None
+    date_to = filters["to"].isoformat() if "to" in filters else None
+
+    conn = open_export_connection(args.db)
+    try:
+        if args.out == "-":
+            stats = export_attendance(conn, sys.stdout.buffer, args.format, date_from, date_to, args.chunk_size)
+        else:
+            with open(args.out, "wb") as f:
+                stats = export_attendance(conn, f, args.format, date_from, date_to, args.chunk_size)
+    finally:
+        conn.close()
+    print(f"[INFO] {stats.summary()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Attendance queries for the admin API.
+
+Records are paged with keyset pagination on (timestamp, id): each page returns
+an opaque cursor for the last row, and the next page starts strictly after it,
+so deep pages cost the same as the first one and rows marked while paging do
+not shift the results. Filters (date range, semester, reg_no) and per-day or
+per-student counts are evaluated in SQL, with per-day counts served from the
+attendance_daily summary table kept up to date by triggers.
+"""
+import base64
+from datetime import datetime, timedelta
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+SUMMARY_GROUPS = ("day", "student")
+
+SQL_SELECT_ATTENDANCE_PAGE = """
+    SELECT a.id, a.student_reg_no, s.name, s.semester, a.timestamp, a.date
+    FROM attendance a
+    JOIN students s ON a.student_reg_no = s.reg_no
+    {where}
+    ORDER BY a.timestamp DESC, a.id DESC
+    LIMIT ?
+"""
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(str(value), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Invalid {name} '{value}', expected YYYY-MM-DD")
+
+
+def parse_filters(params):
+    """
+    Validates query filters from a Socket.IO payload or HTTP query string.
+
+    Accepted keys: 'from' and 'to' (inclusive YYYY-MM-DD dates), 'semester' and
+    'reg_no'. Empty values are ignored. Raises ValueError for malformed input.
+    """
+    params = params or {}
+    filters = {}
+    for key in ("from", "to"):
+        if params.get(key):
+            filters[key] = _parse_date(params[key], f"'{key}' date")
+    if "from" in filters and "to" in filters and filters["from"] > filters["to"]:
+        raise ValueError("'from' date is after the 'to' date")
+    for key in ("semester", "reg_no"):
+        if params.get(key):
+            filters[key] = str(params[key]).strip()
+    return filters
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE):
+    """Page size from a request, clamped to 1..MAX_PAGE_SIZE."""
+    if value in (None, ""):
+        return default
+    try:
+        return max(1, min(MAX_PAGE_SIZE, int(value)))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid limit '{value}'")
+
+
+def encode_cursor(timestamp, row_id):
+    return base64.urlsafe_b64encode(f"{timestamp}|{row_id}".encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Returns the (timestamp, id) a page cursor points at. Raises ValueError if malformed."""
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(str(cursor).encode("ascii")).decode("utf-8").rsplit("|", 1)
+        return timestamp, int(row_id)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid page cursor")
+
+
+def build_where(filters, alias="a"):
+    """
+    SQL WHERE clause and parameters for parsed filters on the attendance table.
+    Date bounds are applied to the timestamp so they share the (timestamp, id)
+    index with the keyset ordering; semester is matched through the students join (s).
+    """
+    clauses, params = [], []
+    if "from" in filters:
+        clauses.append(f"{alias}.timestamp >= ?")
+        params.append(filters["from"].isoformat())
+    if "to" in filters:
+        clauses.append(f"{alias}.timestamp < ?")
+        params.append((filters["to"] + timedelta(days=1)).isoformat())
+    if "reg_no" in filters:
+        clauses.append(f"{alias}.student_reg_no = ?")
+        params.append(filters["reg_no"])
+    if "semester" in filters:
+        clauses.append("s.semester = ?")
+        params.append(filters["semester"])
+    return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def query_attendance(conn, filters=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """
+    One page of attendance records, newest first.
+
+    Args:
+        conn (sqlite3.Connection): Database connection.
+        filters (dict): Parsed filters (see parse_filters).
+        limit (int): Page size.
+        cursor (str): The 'next_cursor' of the previous page, or None for the first page.
+
+    Returns:
+        dict: {'records': [...], 'next_cursor': str or None}
+    """
+    filters = dict(filters or {})
+    where, params = build_where(filters)
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        where = (where + " AND " if where else "WHERE ") + "(a.timestamp, a.id) < (?, ?)"
+        params += [timestamp, row_id]
+    # Fetch one extra row to know whether another page exists
+    rows = conn.execute(SQL_SELECT_ATTENDANCE_PAGE.format(where=where), params + [limit + 1]).fetchall()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    records = [
+        {'reg_no': reg_no, 'name': name, 'semester': semester, 'timestamp': timestamp, 'date': date}
+        for _, reg_no, name, semester, timestamp, date in rows
+    ]
+    last = rows[-1] if rows else None
+    return {
+        'records': records,
+        'next_cursor': encode_cursor(last[4], last[0]) if more else None,
+    }
+
+
+def summarize_by_day(conn, filters=None):
+    """
+    Students present per day, oldest first. Served from the attendance_daily
+    summary table unless a single student is requested.
+    """
+    filters = dict(filters or {})
+    if "reg_no" in filters:
+        where, params = build_where(filters)
+        rows = conn.execute(f"""
+            SELECT a.date, COUNT(*) FROM attendance a
+            JOIN students s ON a.student_reg_no = s.reg_no
+            {where}
+            GROUP BY a.date ORDER BY a.date
+        """, params).fetchall()
+    else:
+        clauses, params = [], []
+        if "from" in filters:
+            clauses.append("date >= ?")
+            params.append(filters["from"].isoformat())
+        if "to" in filters:
+            clauses.append("date <= ?")
+            params.append(filters["to"].isoformat())
+        if "semester" in filters:
+            clauses.append("semester = ?")
+            params.append(filters["semester"])
+        where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        rows = conn.execute(f"""
+            SELECT date, SUM(present) FROM attendance_daily
+            {where}
+            GROUP BY date HAVING SUM(present) > 0 ORDER BY date
+        """, params).fetchall()
+    return [{'date': date, 'present': present} for date, present in rows]
+
+
+def summarize_by_student(conn, filters=None):
+    """
+    Days present per student (with first and last attendance dates) within the
+    filters, most present first. 'class_days' is the number of days on which
+    anyone matching the date and semester filters was marked present.
+    """
+    filters = dict(filters or {})
+    where, params = build_where(filters)
+    rows = conn.execute(f"""
+        SELECT a.student_reg_no, s.name, s.semester, COUNT(*) AS days_present, MIN(a.date), MAX(a.date)
+        FROM attendance a
+        JOIN students s ON a.student_reg_no = s.reg_no
+        {where}
+        GROUP BY a.student_reg_no
+        ORDER BY days_present DESC, a.student_reg_no
+    """, params).fetchall()
+    class_days = len(summarize_by_day(conn, {k: v for k, v in filters.items() if k != "reg_no"}))
+    return [
+        {'reg_no': reg_no, 'name': name, 'semester': semester, 'days_present': days,
+         'first_date': first, 'last_date': last,
+         'attendance_rate': round(days / class_days, 4) if class_days else None}
+        for reg_no, name, semester, days, first, last in rows
+    ]
+
+
+def summarize_attendance(conn, group="day", filters=None):
+    """Aggregate attendance counts grouped by 'day' or 'student'."""
+    if group == "day":
+        return summarize_by_day(conn, filters)
+    if group == "student":
+        return summarize_by_student(conn, filters)
+    raise ValueError(f"Unknown summary group '{group}', expected one of {SUMMARY_GROUPS}")
@@ -0,0 +1,248 @@
+"""
+Benchmark suite for the recognition hot path.
+
+`run` times each stage (detect_faces, extract_face, get_embedding, gallery
+matching, mark_attendance) and end-to-end recognize_person on the dataset
+images, plus matching against synthetic galleries of the requested sizes. Every
+stage reports p50/p95/p99 latency, throughput and peak traced memory, and the
+whole run is written as JSON. `compare` diffs two such files and exits with
+status 1 if any stage's p50 or p95 regressed by more than the tolerance.
+
+Usage:
+    python benchmark.py run --sizes 1000 100000 1000000 --out before.json
+    python benchmark.py run --out after.json
+    python benchmark.py compare before.json after.json --tolerance 0.10
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import cv2
+import numpy as np
+from faceDetection import detect_faces, extract_face
+from faceEmbedding import get_embedding
+from gallery import normalize
+from ann_index import create_index
+from benchmark_ann import synthetic_embeddings
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+def summarize(times, items_per_call=1):
+    """Latency percentiles (ms) and throughput for a list of per-call durations in seconds."""
+    ms = np.asarray(times) * 1000
+    total = float(np.sum(times))
+    return {
+        'calls': len(ms),
+        'p50_ms': round(float(np.percentile(ms, 50)), 4),
+        'p95_ms': round(float(np.percentile(ms, 95)), 4),
+        'p99_ms': round(float(np.percentile(ms, 99)), 4),
+        'mean_ms': round(float(ms.mean()), 4),
+        'throughput_per_s': round(len(ms) * items_per_call / total, 2) if total > 0 else None,
+    }
+
+
+def peak_memory(fn, *args):
+    """Peak bytes allocated (Python and NumPy) during one call of fn."""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench(fn, inputs, repeat=1, warmup=1, items_per_call=1):
+    """Calls fn once per input (repeat times), after `warmup` untimed calls."""
+    for args in inputs[:warmup]:
+        fn(*args)
+    times = []
+    for _ in range(repeat):
+        for args in inputs:
+            start = time.perf_counter()
+            fn(*args)
+            times.append(time.perf_counter() - start)
+    result = summarize(times, items_per_call)
+    result['peak_memory_bytes'] = peak_memory(fn, *inputs[0])
+    return result
+
+
+def dataset_frames(dataset_path, limit):
+    frames = []
+    for root, _, files in sorted(os.walk(dataset_path)):
+        for name in sorted(files):
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                frame = cv2.imread(os.path.join(root, name))
+                if frame is not None:
+                    frames.append(frame)
+                if len(frames) >= limit:
+                    return frames
+    return frames
+
+
+def bench_models(args, results):
+    """Stages that need the detector and embedder, run on the dataset images."""
+    from models import ModelRegistry
+    from recognition import recognize_person
+    from registration import load_dataset
+    from database_utils import configure_connection, init_database
+
+    frames = dataset_frames(args.dataset, args.images)
+    if not frames:
+        results['skipped']['dataset'] = f"no images found in {args.dataset}"
+        return
+    try:
+        net, embedder = ModelRegistry(args.embedder_backend, warmup_batch=1).load()
+    except (FileNotFoundError, ImportError) as e:
+        results['skipped']['models'] = str(e)
+        return
+
+    boxes = [detect_faces(frame, net) for frame in frames]
+    with_faces = [(frame, b[0]) for frame, b in zip(frames, boxes) if b]
+    results['stages']['detect_faces'] = bench(lambda f: detect_faces(f, net), [(f,) for f in frames], args.repeat)
+    if not with_faces:
+        results['skipped']['faces'] = "no faces detected in the dataset images"
+        return
+    results['stages']['extract_face'] = bench(extract_face, with_faces, args.repeat)
+    crops = [(extract_face(frame, box),) for frame, box in with_faces]
+    results['stages']['get_embedding'] = bench(lambda face: get_embedding(face, embedder), crops, args.repeat)
+
+    # Scratch database and no embedding cache: the benchmark must neither enroll students into
+    # attendance.db nor depend on how warm the shared cache happens to be
+    with tempfile.TemporaryDirectory() as folder, contextlib.redirect_stdout(io.StringIO()):
+        conn = configure_connection(sqlite3.connect(os.path.join(folder, "bench.db"), check_same_thread=False))
+        database = load_dataset(args.dataset, net, embedder, init_database(conn), None, create_index(args.backend))
+        conn.close()
+    results['stages']['recognize_person'] = bench(
+        lambda f: recognize_person(f.copy(), net, embedder, database, None), [(f,) for f in frames], args.repeat)
+
+
+def bench_matching(args, results):
+    """Gallery matching against synthetic galleries; one call scores a frame's worth of faces."""
+    rng = np.random.default_rng(args.seed)
+    for size in args.sizes:
+        vectors = synthetic_embeddings(size, 128, clusters=max(1, size // 500), seed=args.seed)
+        index = create_index(args.backend, **({'dtype': args.dtype} if args.dtype != "float32" else {}))
+        start = time.perf_counter()
+        for i, vec in enumerate(vectors):
+            index.add(f"S{i:07d}", vec)
+        build = time.perf_counter() - start
+        targets = rng.integers(0, size, size=(args.match_calls, args.faces_per_frame))
+        queries = [(normalize(vectors[t] + 0.05 * rng.normal(size=(len(t), 128))),) for t in targets]
+        result = bench(lambda q: index.match(q, 0.6), queries, items_per_call=args.faces_per_frame)
+        result['build_s'] = round(build, 3)
+        results['stages'][f'match_{size}'] = result
+        del vectors, index
+
+
+def bench_attendance(args, results):
+    """mark_attendance in sync mode on a scratch database: new records and already-marked repeats."""
+    from database_utils import configure_connection, init_database, mark_attendance, marked_today
+
+    with tempfile.TemporaryDirectory() as folder:
+        conn = configure_connection(sqlite3.connect(os.path.join(folder, "bench.db"), check_same_thread=False))
+        init_database(conn)
+        reg_nos = [(f"B{i:07d}",) for i in range(args.attendance_calls)]
+        marked_today.reset()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results['stages']['mark_attendance_new'] = bench(
+                lambda reg_no: mark_attendance(conn, reg_no), reg_nos, warmup=0)
+            results['stages']['mark_attendance_repeat'] = bench(
+                lambda reg_no: mark_attendance(conn, reg_no), reg_nos, warmup=0)
+        marked_today.reset()
+        conn.close()
+
+
+def run(args):
+    results = {
+        'created': datetime.now().isoformat(timespec="seconds"),
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__, 'opencv': cv2.__version__,
+                        'machine': platform.machine(), 'cpus': os.cpu_count()},
+        'config': {k: v for k, v in vars(args).items() if k != 'func'},
+        'stages': {},
+        'skipped': {},
+    }
+    if not args.no_models:
+        bench_models(args, results)
+    bench_matching(args, results)
+    bench_attendance(args, results)
+
+    for name, stage in results['stages'].items():
+        print(f"{name:<24} p50 {stage['p50_ms']:9.3f}ms  p95 {stage['p95_ms']:9.3f}ms  p99 {stage['p99_ms']:9.3f}ms  "
+              f"{stage['throughput_per_s'] or 0:10.1f}/s  peak {stage['peak_memory_bytes'] / 2 ** 20:8.2f} MiB")
+    for name, reason in results['skipped'].items():
+        print(f"[WARN] Skipped {name}: {reason}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"[INFO] Results written to {args.out}")
+    return 0
+
+
+def compare(args):
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)['stages']
+    with open(args.candidate, "r", encoding="utf-8") as f:
+        candidate = json.load(f)['stages']
+
+    regressions = 0
+    print(f"{'stage':<24} {'p50 base':>10} {'p50 new':>10} {'change':>8}   {'p95 base':>10} {'p95 new':>10} {'change':>8}")
+    for name in sorted(set(baseline) | set(candidate)):
+        if name not in baseline or name not in candidate:
+            print(f"{name:<24} only in {'baseline' if name in baseline else 'candidate'}")
+            continue
+        line, flagged = f"{name:<24}", False
+        for key in ('p50_ms', 'p95_ms'):
+            old, new = baseline[name][key], candidate[name][key]
+            change = (new - old) / old if old else 0.0
+            flagged |= change > args.tolerance
+            line += f" {old:10.3f} {new:10.3f} {change:+8.1%}  "
+        regressions += flagged
+        print(line + ("  REGRESSION" if flagged else ""))
+    print(f"[INFO] {regressions} stage(s) regressed by more than {args.tolerance:.0%}.")
+    return 1 if regressions else 0
+
+
+def main():
+    from main import DATASET_PATH, INDEX_BACKEND, EMBEDDER_BACKEND
+
+    parser = argparse.ArgumentParser(description="Benchmark the recognition hot path.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--dataset", default=DATASET_PATH)
+    run_parser.add_argument("--images", type=int, default=50, help="Dataset images to use")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the dataset images")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                            help="Synthetic gallery sizes (e.g. 1000 to 1000000)")
+    run_parser.add_argument("--backend", default=INDEX_BACKEND, help="Index backend (exact, ivf, multi)")
+    run_parser.add_argument("--dtype", default="float32", help="Stored embedding precision")
+    run_parser.add_argument("--embedder-backend", default=EMBEDDER_BACKEND)
+    run_parser.add_argument("--faces-per-frame", type=int, default=4)
+    run_parser.add_argument("--match-calls", type=int, default=200)
+    run_parser.add_argument("--attendance-calls", type=int, default=500)
+    run_parser.add_argument("--no-models", action="store_true", help="Skip the stages that need the models")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--out", help="Write results as JSON")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative slowdown")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
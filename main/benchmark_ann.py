@@ -0,0 +1,73 @@
+"""
+Compares the approximate IVF index against the exact brute-force gallery on
+synthetic 128-d face embeddings, reporting recall@1 and queries per second.
+
+Usage:
+    python benchmark_ann.py --size 100000 --queries 2000 --nlist 256 --nprobe 1 4 8 16 32
+"""
+import argparse
+import time
+import numpy as np
+from ann_index import create_index
+from gallery import normalize
+
+
+def synthetic_embeddings(n, dim, clusters, seed):
+    """Generates clustered unit vectors, loosely mimicking how faces group by demographics and pose."""
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.normal(size=(clusters, dim)))
+    labels = rng.integers(0, clusters, size=n)
+    return normalize(centers[labels] + rng.normal(size=(n, dim)) / np.sqrt(dim))
+
+
+def build(index, vectors):
+    start = time.perf_counter()
+    for i, vec in enumerate(vectors):
+        index.add(f"S{i:07d}", vec)
+    return time.perf_counter() - start
+
+
+def timed_search(index, queries, batch_size):
+    results = []
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch_size):
+        results.extend(index.search(queries[i:i + batch_size], k=1))
+    elapsed = time.perf_counter() - start
+    return [r[0][0] if r else None for r in results], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exact vs IVF matching on synthetic embeddings.")
+    parser.add_argument("--size", type=int, default=100000, help="Number of gallery vectors")
+    parser.add_argument("--queries", type=int, default=2000, help="Number of query vectors")
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--nlist", type=int, default=256, help="Number of IVF inverted lists")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32], help="nprobe values to sweep")
+    parser.add_argument("--batch", type=int, default=30, help="Queries per search call (faces per frame)")
+    parser.add_argument("--noise", type=float, default=0.05, help="Query noise added to gallery vectors")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed + 1)
+    gallery = synthetic_embeddings(args.size, args.dim, clusters=max(1, args.size // 500), seed=args.seed)
+    targets = rng.integers(0, args.size, size=args.queries)
+    queries = normalize(gallery[targets] + args.noise * rng.normal(size=(args.queries, args.dim)))
+
+    print(f"[INFO] Gallery: {args.size} x {args.dim}, queries: {args.queries}, batch: {args.batch}")
+
+    exact = create_index("exact", dim=args.dim)
+    print(f"[INFO] exact build: {build(exact, gallery):.2f}s")
+    truth, elapsed = timed_search(exact, queries, args.batch)
+    print(f"exact          recall@1=1.0000  qps={args.queries / elapsed:10.1f}")
+
+    ivf = create_index("ivf", dim=args.dim, nlist=args.nlist, train_threshold=args.size)
+    print(f"[INFO] ivf build (incl. k-means): {build(ivf, gallery):.2f}s")
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        found, elapsed = timed_search(ivf, queries, args.batch)
+        recall = np.mean([a == b for a, b in zip(found, truth)])
+        print(f"ivf nprobe={nprobe:<4d} recall@1={recall:.4f}  qps={args.queries / elapsed:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compares the fast detection path (low-resolution pre-pass + ROI re-detection)
+against the full 300x300 detect_faces pass on the dataset images.
+
+The full pass is treated as ground truth; the fast path is measured both cold
+(no prior boxes) and warm (seeded with the previous result, as the tracker does
+between frames).
+
+Usage:
+    python benchmark_detection.py --repeat 5
+"""
+import argparse
+import os
+import time
+import cv2
+import numpy as np
+from faceDetection import detect_faces, detect_faces_fast
+from tracking import iou_matrix
+
+
+def dataset_images(dataset_path):
+    for root, _, files in os.walk(dataset_path):
+        for name in sorted(files):
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                frame = cv2.imread(os.path.join(root, name))
+                if frame is not None:
+                    yield frame
+
+
+def timed(fn, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, times
+
+
+def agreement(reference, boxes, iou_threshold):
+    """Returns (matched, reference count, predicted count) at the given IoU."""
+    if not len(reference) or not len(boxes):
+        return 0, len(reference), len(boxes)
+    ious = iou_matrix(reference, boxes)
+    return int((ious.max(axis=1) >= iou_threshold).sum()), len(reference), len(boxes)
+
+
+def report(name, times, counts):
+    ms = np.array(times) * 1000
+    matched, ref, pred = np.sum(counts, axis=0) if counts else (0, 0, 0)
+    recall = matched / ref if ref else 1.0
+    precision = matched / pred if pred else 1.0
+    print(f"{name:<12} mean {ms.mean():7.2f}ms  p95 {np.percentile(ms, 95):7.2f}ms  "
+          f"recall {recall:.3f}  precision {precision:.3f}")
+
+
+def main():
+    from main import DATASET_PATH, load_detector
+
+    parser = argparse.ArgumentParser(description="Benchmark full vs fast face detection on the dataset images.")
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per image")
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU for a fast box to count as the same face")
+    args = parser.parse_args()
+
+    net = load_detector()
+    full_times, cold_times, warm_times = [], [], []
+    cold_counts, warm_counts = [], []
+    images = 0
+    for frame in dataset_images(args.dataset):
+        images += 1
+        reference, times = timed(lambda: detect_faces(frame, net), args.repeat)
+        full_times += times
+        cold, times = timed(lambda: detect_faces_fast(frame, net), args.repeat)
+        cold_times += times
+        cold_counts.append(agreement(reference, cold, args.iou))
+        warm, times = timed(lambda: detect_faces_fast(frame, net, reference), args.repeat)
+        warm_times += times
+        warm_counts.append(agreement(reference, warm, args.iou))
+
+    if not images:
+        print(f"[ERROR] No images found in {args.dataset}")
+        return
+    print(f"[INFO] {images} images, {args.repeat} runs each (full pass is the reference)")
+    report("full", full_times, [])
+    report("fast-cold", cold_times, cold_counts)
+    report("fast-warm", warm_times, warm_counts)
+
+
+if __name__ == "__main__":
+    main()
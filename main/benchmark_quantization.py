@@ -0,0 +1,71 @@
+"""
+Compares float16 and int8 gallery storage against float32 on synthetic 128-d
+face embeddings: memory, search latency, top-1 agreement and how often the
+accept/reject decision changes at the recognition thresholds in use
+(similarity > 0.6 in recognize_person, distance < 0.6 in the server).
+
+Usage:
+    python benchmark_quantization.py --size 100000 --queries 2000
+"""
+import argparse
+import time
+import numpy as np
+from benchmark_ann import synthetic_embeddings
+from compact_store import STORE_DTYPES, create_gallery, gallery_nbytes
+from gallery import RECOGNITION_DISTANCE, distance_to_cosine, normalize
+
+# Similarity thresholds: recognize_person's 0.6, and the server's distance 0.6 as a similarity
+THRESHOLDS = (0.6, distance_to_cosine(RECOGNITION_DISTANCE))
+
+
+def timed_search(gallery, queries, batch_size):
+    results = []
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch_size):
+        results.extend(gallery.search(queries[i:i + batch_size], k=1))
+    elapsed = time.perf_counter() - start
+    return [r[0] if r else (None, -1.0) for r in results], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark float32 vs float16 vs int8 gallery storage.")
+    parser.add_argument("--size", type=int, default=100000, help="Number of gallery vectors")
+    parser.add_argument("--queries", type=int, default=2000, help="Number of query vectors (half impostors)")
+    parser.add_argument("--batch", type=int, default=30, help="Queries per search call (faces per frame)")
+    parser.add_argument("--noise", type=float, default=0.6, help="Genuine query noise (relative to the embedding)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed + 1)
+    vectors = synthetic_embeddings(args.size, 128, clusters=max(1, args.size // 500), seed=args.seed)
+    genuine = args.queries // 2
+    targets = rng.integers(0, args.size, size=genuine)
+    queries = np.concatenate([
+        normalize(vectors[targets] + args.noise * rng.normal(size=(genuine, 128)) / np.sqrt(128)),
+        normalize(rng.normal(size=(args.queries - genuine, 128))),
+    ])
+    print(f"[INFO] Gallery: {args.size} x 128, queries: {args.queries} ({genuine} genuine), batch: {args.batch}")
+
+    reference = None
+    for dtype in STORE_DTYPES:
+        gallery = create_gallery(dtype, capacity=args.size)
+        start = time.perf_counter()
+        for i, vec in enumerate(vectors):
+            gallery.add(f"S{i:07d}", vec)
+        build = time.perf_counter() - start
+        results, elapsed = timed_search(gallery, queries, args.batch)
+        line = (f"{dtype:<8} memory {gallery_nbytes(gallery) / 2 ** 20:8.2f} MiB  build {build:6.2f}s  "
+                f"{elapsed / len(queries) * 1000 * args.batch:7.2f} ms/batch  {len(queries) / elapsed:9.0f} QPS")
+        if reference is None:
+            reference = results
+        else:
+            ids = np.array([r[0] == b[0] for r, b in zip(reference, results)])
+            errors = np.abs([r[1] - b[1] for r, b in zip(reference, results)])
+            flips = [sum((r[1] > t) != (b[1] > t) for r, b in zip(reference, results)) for t in THRESHOLDS]
+            line += (f"  top-1 agree (genuine) {ids[:genuine].mean():.4f}  max |score err| {errors.max():.5f}  "
+                     + "  ".join(f"flips@{t:.2f} {f}" for t, f in zip(THRESHOLDS, flips)))
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
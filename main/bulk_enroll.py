@@ -0,0 +1,276 @@
+"""
+Parallel bulk enrollment of a dataset folder.
+
+Image decoding and face detection are spread over a process pool (each worker
+loads its own detection net); the parent process funnels the crops into
+batched FaceNet passes and writes students with one executemany per chunk.
+Progress is checkpointed so an interrupted import resumes where it stopped.
+
+Usage:
+    python bulk_enroll.py --workers 8
+    python bulk_enroll.py --dataset /path/to/new_intake --restart
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import cv2
+import numpy as np
+from faceDetection import detect_faces, extract_face
+from faceEmbedding import get_embeddings
+from database_utils import DB_FOLDER, add_students
+from gallery import Gallery
+from registration import LOAD_EMBED_CHUNK, scan_dataset, add_to_index, _average_embedding
+
+CHECKPOINT_PATH = os.path.join(DB_FOLDER, "enroll_checkpoint.json")
+
+# Detection net owned by each worker process
+_worker_net = None
+
+
+def _init_worker(proto_path, model_path):
+    global _worker_net
+    # One process per core already; keep OpenCV from oversubscribing them
+    cv2.setNumThreads(1)
+    _worker_net = cv2.dnn.readNetFromCaffe(proto_path, model_path)
+
+
+def _detect_student(student, image_paths):
+    """Worker task: decodes a student's images and crops the largest face of each."""
+    faces, face_paths, no_face_paths = [], [], []
+    for path in image_paths:
+        frame = cv2.imread(path)
+        if frame is None:
+            continue
+        boxes = detect_faces(frame, _worker_net)
+        if not boxes:
+            no_face_paths.append(path)
+            continue
+        areas = [(box[2] - box[0]) * (box[3] - box[1]) for box in boxes]
+        faces.append(extract_face(frame, boxes[np.argmax(areas)]))
+        face_paths.append(path)
+    return student, faces, face_paths, no_face_paths
+
+
+class EnrollmentCheckpoint:
+    """JSON record of students already enrolled from a dataset, written atomically after each chunk."""
+
+    def __init__(self, path, dataset_path):
+        self.path = path
+        self.dataset_path = os.path.abspath(dataset_path)
+        self.done = set()
+        self.failed = set()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("dataset") == self.dataset_path:
+            self.done = set(data.get("done", []))
+            self.failed = set(data.get("failed", []))
+        return self
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"dataset": self.dataset_path, "done": sorted(self.done), "failed": sorted(self.failed)}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class _Progress:
+    def __init__(self, total, interval=2.0):
+        self.total = total
+        self.done = 0
+        self.interval = interval
+        self.start = time.perf_counter()
+        self._next = self.start + interval
+
+    def advance(self, n=1, force=False):
+        self.done += n
+        now = time.perf_counter()
+        if force or now >= self._next:
+            self._next = now + self.interval
+            rate = self.done / max(now - self.start, 1e-9)
+            eta = (self.total - self.done) / rate if rate > 0 else float("inf")
+            print(f"[PROGRESS] {self.done}/{self.total} students, {rate:.1f}/s, ETA {eta:.0f}s")
+
+
+def _plan_students(students, database, cache, checkpoint, retry_failed=False):
+    """
+    Splits a scanned dataset into students enrolled straight from the cache and
+    students that still need detection.
+
+    Students finished before an interruption (checkpoint.done) are rebuilt from
+    their cached embeddings and never reach the pool. Students that failed before
+    are only retried if their images changed or `retry_failed` is set. A reg_no
+    seen twice is enrolled once, from its first folder.
+
+    Returns:
+        tuple: (rows added to the index, [(student, image_files, cached, uncached)] to detect)
+    """
+    rows, todo, seen = [], [], set()
+    for student, image_files in students:
+        reg_no = student[0]
+        if reg_no in seen:
+            print(f"[WARN] Duplicate registration number {reg_no} ({student[1]}), skipping.")
+            continue
+        seen.add(reg_no)
+        # Multi-template indexes need per-image embeddings, so they skip the per-student average
+        avg_embedding = cache.get_student(reg_no, image_files) if not hasattr(database, "add_templates") else None
+        if avg_embedding is not None:
+            database.add(reg_no, avg_embedding)
+            rows.append(student)
+            checkpoint.done.add(reg_no)
+            continue
+        cached, uncached = [], []
+        for path in image_files:
+            hit, emb = cache.lookup(path)
+            if not hit:
+                uncached.append(path)
+            elif emb is not None:
+                cached.append(emb)
+        if not uncached:
+            if reg_no in checkpoint.done and cached:
+                add_to_index(database, reg_no, _average_embedding(cached, [], []), cached)
+                rows.append(student)
+                continue
+            if reg_no in checkpoint.failed and not retry_failed:
+                continue
+        todo.append((student, image_files, cached, uncached))
+    return rows, todo
+
+
+def enroll_dataset_parallel(dataset_path, proto_path, model_path, embedder, conn, cache, index=None,
+                            workers=None, checkpoint_path=CHECKPOINT_PATH, embed_chunk=LOAD_EMBED_CHUNK,
+                            retry_failed=False):
+    """
+    Enrolls every student in a dataset folder using a process pool for decoding and detection.
+
+    Args:
+        dataset_path (str): Folder of 'RegNo_Name_Semester_Phone' sub-directories.
+        proto_path, model_path (str): Caffe detector files, loaded once per worker.
+        embedder: FaceNet model (used only in this process).
+        conn: SQLite connection for the students table.
+        cache (EmbeddingCache): Stores per-image/per-student embeddings; also what lets
+            a resumed import reload students finished before the interruption.
+        index: Optional empty index from ann_index.create_index (defaults to a Gallery).
+        workers (int): Worker processes (defaults to the CPU count).
+        checkpoint_path (str): Where progress is recorded.
+        embed_chunk (int): Crops gathered before each batched FaceNet pass.
+        retry_failed (bool): Also retry students that had no usable faces last time
+            (they are retried anyway once their images change).
+
+    Returns:
+        The gallery/index holding every enrolled student.
+    """
+    start = time.perf_counter()
+    database = index if index is not None else Gallery()
+    cache.reset_stats()
+    checkpoint = EnrollmentCheckpoint(checkpoint_path, dataset_path).load()
+    students = list(scan_dataset(dataset_path))
+    progress = _Progress(len(students))
+
+    rows, todo = _plan_students(students, database, cache, checkpoint, retry_failed)
+    add_students(conn, rows)
+    progress.advance(len(students) - len(todo), force=True)
+
+    pending, pending_faces = [], 0
+
+    def flush():
+        faces = [face for _, _, _, student_faces, _ in pending for face in student_faces]
+        embeddings = get_embeddings(faces, embedder)
+        offset, new_rows = 0, []
+        for student, image_files, cached, student_faces, face_paths in pending:
+            new_embeddings = embeddings[offset:offset + len(student_faces)]
+            offset += len(student_faces)
+            avg_embedding = _average_embedding(cached, new_embeddings, face_paths, cache)
+            if avg_embedding is None:
+                print(f"[WARN] No usable face images for {student[1]} ({student[0]}), skipping.")
+                checkpoint.failed.add(student[0])
+                continue
+            cache.put_student(student[0], image_files, avg_embedding)
+            add_to_index(database, student[0], avg_embedding, list(cached) + list(new_embeddings))
+            new_rows.append(student)
+            checkpoint.failed.discard(student[0])
+            checkpoint.done.add(student[0])
+        # Embeddings first, then the students, then the checkpoint: a crash in between only redoes work
+        cache.commit()
+        add_students(conn, new_rows)
+        checkpoint.save()
+        progress.advance(len(pending))
+        pending.clear()
+
+    max_in_flight = (workers or os.cpu_count() or 1) * 4
+    jobs = iter(todo)
+    # Spawned, not forked: the parent already holds FaceNet/TensorFlow state and threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(proto_path, model_path)) as pool:
+        in_flight = {}
+        while True:
+            # Keep a bounded number of students in flight so crops never pile up in memory
+            for student, image_files, cached, uncached in jobs:
+                in_flight[pool.submit(_detect_student, student, uncached)] = (image_files, cached)
+                if len(in_flight) >= max_in_flight:
+                    break
+            if not in_flight:
+                break
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                image_files, cached = in_flight.pop(future)
+                student, faces, face_paths, no_face_paths = future.result()
+                for path in no_face_paths:
+                    cache.store(path, None)
+                pending.append((student, image_files, cached, faces, face_paths))
+                pending_faces += len(faces)
+            if pending_faces >= embed_chunk:
+                flush()
+                pending_faces = 0
+    if pending:
+        flush()
+
+    progress.advance(0, force=True)
+    elapsed = time.perf_counter() - start
+    print(f"[INFO] Embedding cache: {cache.hits} hits, {cache.misses} misses.")
+    print(f"[INFO] Enrolled {len(database)} students in {elapsed:.2f}s "
+          f"({len(checkpoint.failed)} without usable faces).")
+    return database
+
+
+def main():
+    from main import DATASET_PATH, INDEX_BACKEND, EMBEDDER_BACKEND
+    from models import MODELS_PATH, DETECTOR_PROTO, DETECTOR_WEIGHTS, ModelRegistry
+    from database_utils import init_database, close_connections
+    from embedding_cache import EmbeddingCache
+    from ann_index import create_index
+
+    parser = argparse.ArgumentParser(description="Enroll a dataset folder using all CPU cores.")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="Folder of RegNo_Name_Semester_Phone directories")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Retry students that had no usable faces in an earlier run")
+    args = parser.parse_args()
+
+    if args.restart:
+        EnrollmentCheckpoint(args.checkpoint, args.dataset).clear()
+
+    conn = init_database()
+    cache = EmbeddingCache()
+    enroll_dataset_parallel(args.dataset, os.path.join(MODELS_PATH, DETECTOR_PROTO),
+                            os.path.join(MODELS_PATH, DETECTOR_WEIGHTS),
+                            ModelRegistry(EMBEDDER_BACKEND).embedder, conn, cache, create_index(INDEX_BACKEND),
+                            workers=args.workers, checkpoint_path=args.checkpoint, retry_failed=args.retry_failed)
+    cache.close()
+    close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Compact embedding storage for large galleries.
+
+QuantizedGallery keeps the normalised embeddings as float16 (2 bytes/dim) or
+int8 with one float32 scale per row (~1 byte/dim) instead of float32, and
+scores queries directly against the quantized rows in fixed-size chunks, so a
+dequantized copy of the gallery never exists in memory.
+
+Galleries can be saved to a directory of .npy files and loaded back
+memory-mapped: every server worker that maps the same store shares one copy
+through the OS page cache. A mapped gallery is read-only until it is first
+modified, at which point that process takes a private copy.
+
+Usage:
+    python compact_store.py --dtype int8    # build database/gallery/ from the embedding cache
+"""
+import argparse
+import json
+import os
+import numpy as np
+from gallery import Gallery, normalize
+from database_utils import DB_FOLDER
+
+STORE_PATH = os.path.join(DB_FOLDER, "gallery")
+STORE_DTYPES = ("float32", "float16", "int8")
+
+# Gallery rows upcast to float32 at a time while scoring
+SCORE_CHUNK_ROWS = 16384
+
+
+class QuantizedGallery(Gallery):
+    """
+    Gallery whose rows are stored as float16 or per-row scaled int8.
+
+    int8 rows are symmetric: q = round(x / s) with s = max|x| / 127, and a
+    query's cosine similarity is (query . q) * s. Scores differ from the
+    float32 gallery by well under 0.01 for unit vectors, far below the
+    recognition threshold margins.
+    """
+
+    def __init__(self, dim=128, capacity=64, dtype="int8"):
+        if dtype not in ("float16", "int8"):
+            raise ValueError(f"Unsupported quantized dtype '{dtype}', expected 'float16' or 'int8'")
+        self._storage_dtype = np.dtype(dtype)
+        super().__init__(dim=dim, capacity=capacity)
+        self._scales = np.ones(max(1, capacity), dtype=np.float32) if dtype == "int8" else None
+
+    @property
+    def dtype(self):
+        return self._matrix.dtype.name
+
+    @property
+    def matrix(self):
+        """The (N, dim) float32 matrix, dequantized on demand."""
+        return self._decode(0, self._size)
+
+    @property
+    def nbytes(self):
+        """Bytes used by the stored rows (and scales)."""
+        scales = self._scales[:self._size].nbytes if self._scales is not None else 0
+        return self._matrix[:self._size].nbytes + scales
+
+    def get(self, reg_no):
+        row = self._rows.get(reg_no)
+        return None if row is None else self._decode(row, row + 1)[0]
+
+    def _decode(self, start, stop):
+        rows = self._matrix[start:stop].astype(np.float32)
+        if self._scales is not None:
+            rows *= self._scales[start:stop, None]
+        return rows
+
+    def _grow(self):
+        if self._scales is not None:
+            scales = np.ones(self._grown_capacity(), dtype=np.float32)
+            scales[:self._size] = self._scales[:self._size]
+            self._scales = scales
+        super()._grow()
+
+    def _ensure_writable(self):
+        super()._ensure_writable()
+        if self._scales is not None and not self._scales.flags.writeable:
+            self._scales = np.array(self._scales)
+
+    def _store(self, row, vec):
+        if self._scales is None:
+            self._matrix[row] = vec
+            return
+        scale = max(float(np.abs(vec).max()), 1e-12) / 127.0
+        self._matrix[row] = np.clip(np.rint(vec / scale), -127, 127)
+        self._scales[row] = scale
+
+    def _move(self, src, dst):
+        super()._move(src, dst)
+        if self._scales is not None:
+            self._scales[dst] = self._scales[src]
+
+    def _scores(self, queries, n):
+        scores = np.empty((len(queries), n), dtype=np.float32)
+        for start in range(0, n, SCORE_CHUNK_ROWS):
+            stop = min(n, start + SCORE_CHUNK_ROWS)
+            scores[:, start:stop] = queries @ self._matrix[start:stop].astype(np.float32).T
+        if self._scales is not None:
+            scores *= self._scales[:n]
+        return scores
+
+
+def create_gallery(dtype="float32", dim=128, capacity=64):
+    """Returns an empty Gallery (float32) or QuantizedGallery (float16/int8)."""
+    if dtype == "float32":
+        return Gallery(dim=dim, capacity=capacity)
+    if dtype in STORE_DTYPES:
+        return QuantizedGallery(dim=dim, capacity=capacity, dtype=dtype)
+    raise ValueError(f"Unknown storage dtype '{dtype}', expected one of {STORE_DTYPES}")
+
+
+def quantize(gallery, dtype):
+    """Copies any gallery/index into a new gallery with the given storage dtype."""
+    reg_nos = list(gallery)
+    compact = create_gallery(dtype, gallery.dim, capacity=max(64, len(reg_nos)))
+    for reg_no in reg_nos:
+        compact.add(reg_no, gallery.get(reg_no))
+    return compact
+
+
+def gallery_nbytes(gallery):
+    """Bytes used by a gallery's stored rows."""
+    if isinstance(gallery, QuantizedGallery):
+        return gallery.nbytes
+    return gallery.matrix.nbytes
+
+
+def save_store(gallery, path=STORE_PATH):
+    """
+    Writes a gallery as embeddings.npy (+ scales.npy for int8), reg_nos.json and
+    meta.json. Files are written under temporary names and renamed into place.
+    """
+    os.makedirs(path, exist_ok=True)
+    n = len(gallery)
+    files = {"embeddings.npy": gallery._matrix[:n]}
+    if getattr(gallery, "_scales", None) is not None:
+        files["scales.npy"] = gallery._scales[:n]
+    for name, array in files.items():
+        with open(os.path.join(path, name + ".tmp"), "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+    meta = {"dtype": gallery._matrix.dtype.name, "dim": gallery.dim, "count": n}
+    for name, data in (("reg_nos.json", gallery.reg_nos.tolist()), ("meta.json", meta)):
+        with open(os.path.join(path, name + ".tmp"), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    # meta.json goes last so a reader never sees a count newer than the arrays
+    for name in list(files) + ["reg_nos.json", "meta.json"]:
+        os.replace(os.path.join(path, name + ".tmp"), os.path.join(path, name))
+    return path
+
+
+def load_store(path=STORE_PATH, mmap=True):
+    """
+    Loads a saved gallery. With `mmap` the embedding rows stay on disk and are
+    paged in (and shared between processes) by the OS.
+
+    Returns:
+        Gallery or QuantizedGallery, or None if no store exists at `path`.
+    """
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    with open(os.path.join(path, "reg_nos.json"), "r", encoding="utf-8") as f:
+        reg_nos = json.load(f)
+    # Empty files cannot be mapped
+    mode = "r" if mmap and reg_nos else None
+    matrix = np.load(os.path.join(path, "embeddings.npy"), mmap_mode=mode)
+
+    gallery = create_gallery(meta["dtype"], meta["dim"], capacity=1)
+    gallery._matrix = matrix
+    if meta["dtype"] == "int8":
+        gallery._scales = np.load(os.path.join(path, "scales.npy"), mmap_mode=mode)
+    gallery._reg_nos = np.empty(max(1, len(reg_nos)), dtype=object)
+    gallery._reg_nos[:len(reg_nos)] = reg_nos
+    gallery._rows = {reg_no: row for row, reg_no in enumerate(reg_nos)}
+    gallery._size = len(reg_nos)
+    return gallery
+
+
+def main():
+    from main import DATASET_PATH
+    from embedding_cache import EmbeddingCache
+    from registration import scan_dataset
+
+    parser = argparse.ArgumentParser(description="Build a compact, memory-mappable gallery from the embedding cache.")
+    parser.add_argument("--dtype", default="int8", choices=STORE_DTYPES)
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--out", default=STORE_PATH)
+    args = parser.parse_args()
+
+    cache = EmbeddingCache()
+    gallery = create_gallery(args.dtype)
+    missing = 0
+    for student, image_files in scan_dataset(args.dataset):
+        embedding = cache.get_student(student[0], image_files)
+        if embedding is None:
+            missing += 1
+            continue
+        gallery.add(student[0], normalize(embedding))
+    cache.close()
+
+    save_store(gallery, args.out)
+    print(f"[INFO] Saved {len(gallery)} students as {args.dtype} ({gallery_nbytes(gallery)} bytes) to {args.out}.")
+    if missing:
+        print(f"[WARN] {missing} students have no cached embedding; run the server or bulk_enroll.py first.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,203 @@
+import atexit
+import queue
 import sqlite3
+import threading
+import time
 from datetime import datetime
 import os
 
-DB_FOLDER = "../database"
+DB_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database")
 DB_PATH = os.path.join(DB_FOLDER, "attendance.db")
+# Touched whenever the students table is edited out of band, e.g. by a migration script
+STUDENTS_STAMP_PATH = os.path.join(DB_FOLDER, "students.stamp")
 
+# Statements used on the hot path. Keeping the exact SQL text in one place lets
+# sqlite3's per-connection statement cache reuse the prepared statements.
+SQL_INSERT_STUDENT = "INSERT INTO students (reg_no, name, semester, phone_number) VALUES (?, ?, ?, ?)"
+SQL_INSERT_STUDENT_IF_NEW = "INSERT OR IGNORE INTO students (reg_no, name, semester, phone_number) VALUES (?, ?, ?, ?)"
+SQL_SELECT_STUDENT = "SELECT reg_no, name, semester, phone_number FROM students WHERE reg_no = ?"
+SQL_SELECT_ALL_STUDENTS = "SELECT reg_no, name, semester, phone_number FROM students"
+SQL_INSERT_ATTENDANCE = "INSERT OR IGNORE INTO attendance (student_reg_no, timestamp, date) VALUES (?, ?, ?)"
+SQL_SELECT_MARKED_ON = "SELECT student_reg_no FROM attendance WHERE date = ?"
+# Full attendance dump in timestamp order; walks idx_attendance_timestamp so no sort is materialized
+SQL_SELECT_ATTENDANCE_EXPORT = """
+    SELECT a.student_reg_no, s.name, s.semester, s.phone_number, a.timestamp, a.date
+    FROM attendance a
+    LEFT JOIN students s ON a.student_reg_no = s.reg_no
+    {where}
+    ORDER BY a.timestamp, a.id
+"""
+EXPORT_COLUMNS = ("reg_no", "name", "semester", "phone", "timestamp", "date")
 
-def init_database():
+# Per-day, per-semester present counts, maintained by triggers on every insert/delete
+# (semester '' stands for students without one, so the primary key stays unique)
+SQL_DAILY_SUMMARY_TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS trg_attendance_daily_insert AFTER INSERT ON attendance
+    BEGIN
+        INSERT OR IGNORE INTO attendance_daily (date, semester, present) VALUES (
+            NEW.date, COALESCE((SELECT semester FROM students WHERE reg_no = NEW.student_reg_no), ''), 0);
+        UPDATE attendance_daily SET present = present + 1
+        WHERE date = NEW.date
+          AND semester = COALESCE((SELECT semester FROM students WHERE reg_no = NEW.student_reg_no), '');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_attendance_daily_delete AFTER DELETE ON attendance
+    BEGIN
+        UPDATE attendance_daily SET present = present - 1
+        WHERE date = OLD.date
+          AND semester = COALESCE((SELECT semester FROM students WHERE reg_no = OLD.student_reg_no), '');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_students_semester_update AFTER UPDATE OF semester ON students
+    WHEN COALESCE(OLD.semester, '') IS NOT COALESCE(NEW.semester, '')
+    BEGIN
+        UPDATE attendance_daily SET present = present - 1
+        WHERE semester = COALESCE(OLD.semester, '')
+          AND date IN (SELECT date FROM attendance WHERE student_reg_no = NEW.reg_no);
+        INSERT OR IGNORE INTO attendance_daily (date, semester, present)
+            SELECT date, COALESCE(NEW.semester, ''), 0 FROM attendance WHERE student_reg_no = NEW.reg_no;
+        UPDATE attendance_daily SET present = present + 1
+        WHERE semester = COALESCE(NEW.semester, '')
+          AND date IN (SELECT date FROM attendance WHERE student_reg_no = NEW.reg_no);
+    END;
+"""
+
+
+def configure_connection(conn, synchronous="NORMAL", busy_timeout_ms=5000):
     """
-    Initializes the SQLite database and creates the necessary tables.
+    Applies the pragmas used for concurrent access: WAL journaling so readers never
+    block the writer, relaxed fsyncs (safe under WAL) and a busy timeout instead of
+    immediate 'database is locked' errors.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+class ConnectionPool:
+    """
+    Per-thread pool of SQLite connections.
+
+    Each thread gets its own connection, opened once and configured with
+    configure_connection. When a thread finishes, its connection is handed to the
+    next thread that asks for one instead of being reopened, so short-lived
+    handler threads do not pay connect/close costs.
     """
-    if not os.path.exists(DB_FOLDER):
-        os.makedirs(DB_FOLDER)
 
-    conn = sqlite3.connect(DB_PATH)
+    def __init__(self, path=DB_PATH, synchronous="NORMAL", busy_timeout_ms=5000, cached_statements=256):
+        self.path = path
+        self.synchronous = synchronous
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._owners = {}
+        self._idle = []
+
+    def _connect(self):
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=self.cached_statements)
+        return configure_connection(conn, self.synchronous, self.busy_timeout_ms)
+
+    def connection(self):
+        """Returns the calling thread's connection, opening or recycling one if needed."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            with self._lock:
+                # Reclaim connections owned by threads that have exited
+                for key, (thread, owned) in list(self._owners.items()):
+                    if not thread.is_alive():
+                        del self._owners[key]
+                        self._idle.append(owned)
+                conn = self._idle.pop() if self._idle else self._connect()
+                self._owners[id(conn)] = (threading.current_thread(), conn)
+            self._local.conn = conn
+        return conn
+
+    def owns(self, conn):
+        """True if `conn` is one of this pool's connections."""
+        with self._lock:
+            return id(conn) in self._owners or any(idle is conn for idle in self._idle)
+
+    def close_all(self):
+        """Closes every connection in the pool."""
+        with self._lock:
+            for _, conn in self._owners.values():
+                conn.close()
+            for conn in self._idle:
+                conn.close()
+            self._owners.clear()
+            self._idle.clear()
+        self._local = threading.local()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_connection():
+    """Returns the calling thread's pooled connection to the attendance database."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool.connection()
+
+
+def close_connections():
+    """Flushes queued attendance and closes all pooled connections, e.g. at application shutdown."""
+    shutdown_writer()
+    if _pool is not None:
+        _pool.close_all()
+
+
+def get_student(conn, reg_no):
+    """Returns (reg_no, name, semester, phone_number) for a student, or None."""
+    return conn.execute(SQL_SELECT_STUDENT, (reg_no,)).fetchone()
+
+
+def iter_attendance_chunks(conn, date_from=None, date_to=None, chunk_size=5000):
+    """
+    Streams attendance records joined with student details (EXPORT_COLUMNS) in
+    timestamp order, as lists of at most `chunk_size` rows read with fetchmany,
+    so memory use does not depend on the table size.
+
+    Args:
+        date_from (str): First date to include (YYYY-MM-DD), or None.
+        date_to (str): Last date to include (YYYY-MM-DD), or None.
+    """
+    clauses, params = [], []
+    if date_from:
+        clauses.append("a.timestamp >= ?")
+        params.append(date_from)
+    if date_to:
+        # Timestamps start with the date, so everything before the next day's date
+        clauses.append("a.timestamp < date(?, '+1 day')")
+        params.append(date_to)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    cursor = conn.execute(SQL_SELECT_ATTENDANCE_EXPORT.format(where=where), params)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        cursor.close()
+
+
+def init_database(conn=None):
+    """
+    Initializes the SQLite database and creates the necessary tables.
+    Returns the calling thread's pooled connection, or `conn` if one is given
+    (e.g. a scratch database for benchmarks).
+    """
+    conn = conn if conn is not None else get_connection()
     cursor = conn.cursor()
 
     # Table to store student details
@@ -32,21 +216,228 @@ def init_database():
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             student_reg_no TEXT,
             timestamp TEXT,
+            date TEXT,
             FOREIGN KEY (student_reg_no) REFERENCES students (reg_no)
         )
     """)
     conn.commit()
+    migrate_attendance_schema(conn)
+    migrate_summary_schema(conn)
     print("[INFO] Database initialized successfully.")
     return conn
 
 
+def migrate_attendance_schema(conn):
+    """
+    Brings the attendance table up to the indexed schema.
+    Adds the separate `date` column (backfilled from timestamp), removes duplicate
+    same-day rows left by older versions, and enforces one row per student per day
+    with a UNIQUE(student_reg_no, date) index. Safe to run repeatedly.
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(attendance);")
+    col_names = [c[1] for c in cursor.fetchall()]
+
+    if 'date' not in col_names:
+        cursor.execute("ALTER TABLE attendance ADD COLUMN date TEXT")
+        print("[INFO] Added date column to attendance table.")
+    cursor.execute("UPDATE attendance SET date = date(timestamp) WHERE date IS NULL")
+
+    has_unique_index = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_attendance_student_date'").fetchone()
+    if not has_unique_index:
+        # Keep only the first mark per student per day so the unique index can be built;
+        # once it exists no duplicates can appear, so this only runs on the first upgrade
+        cursor.execute("""
+            DELETE FROM attendance WHERE id NOT IN (
+                SELECT MIN(id) FROM attendance GROUP BY student_reg_no, date
+            )
+        """)
+        print(f"[INFO] Removed {cursor.rowcount} duplicate attendance rows before adding the unique index.")
+
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_student_date ON attendance (student_reg_no, date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance (date)")
+    # Newest-first listing and keyset pagination walk this index instead of sorting the table
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_timestamp ON attendance (timestamp, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_students_semester ON students (semester)")
+    conn.commit()
+
+
+def migrate_summary_schema(conn):
+    """
+    Creates the attendance_daily summary table (students present per date and
+    semester) and the triggers that keep it current as attendance is marked,
+    so per-day counts never scan the attendance table. The table is backfilled
+    when it is first created. Safe to run repeatedly.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'attendance_daily'").fetchone()
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS attendance_daily (
+                date TEXT NOT NULL,
+                semester TEXT NOT NULL,
+                present INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (date, semester)
+            ) WITHOUT ROWID
+        """)
+    conn.executescript(SQL_DAILY_SUMMARY_TRIGGERS)
+    if not exists:
+        rebuild_daily_summary(conn)
+
+
+def rebuild_daily_summary(conn):
+    """Recomputes attendance_daily from the attendance table, e.g. after editing records out of band."""
+    with conn:
+        conn.execute("DELETE FROM attendance_daily")
+        conn.execute("""
+            INSERT INTO attendance_daily (date, semester, present)
+            SELECT a.date, COALESCE(s.semester, ''), COUNT(*)
+            FROM attendance a
+            LEFT JOIN students s ON a.student_reg_no = s.reg_no
+            GROUP BY a.date, COALESCE(s.semester, '')
+        """)
+    return conn.execute("SELECT COUNT(*) FROM attendance_daily").fetchone()[0]
+
+
+class MarkedToday:
+    """
+    In-memory set of students whose attendance is already marked today.
+    It is seeded from the database on first use and rebuilt whenever the date rolls over,
+    so repeat recognitions of the same student never reach SQLite.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._date = None
+        self._reg_nos = set()
+
+    def _reseed(self, conn, date):
+        cursor = conn.cursor()
+        cursor.execute(SQL_SELECT_MARKED_ON, (date,))
+        self._reg_nos = {row[0] for row in cursor.fetchall()}
+        self._date = date
+
+    def add(self, conn, reg_no, date):
+        """Records reg_no as marked on date. Returns False if it already was."""
+        with self._lock:
+            if date != self._date:
+                self._reseed(conn, date)
+            if reg_no in self._reg_nos:
+                return False
+            self._reg_nos.add(reg_no)
+            return True
+
+    def discard(self, reg_no):
+        with self._lock:
+            self._reg_nos.discard(reg_no)
+
+    def reset(self):
+        """Forgets the cached day so the next mark reseeds from the database."""
+        with self._lock:
+            self._date = None
+            self._reg_nos = set()
+
+
+marked_today = MarkedToday()
+
+
+def notify_students_changed(stamp_path=STUDENTS_STAMP_PATH):
+    """
+    Invalidation hook for out-of-band edits to the students table. Touches the stamp
+    file so every process holding a StudentCache reloads it on its next lookup.
+    """
+    with open(stamp_path, "a"):
+        os.utime(stamp_path, None)
+    student_cache.invalidate()
+
+
+class StudentCache:
+    """
+    In-memory copy of the students table, so recognized faces never need a SELECT
+    for their name, semester or phone number.
+
+    The table is loaded once and kept in sync by add_student. Edits made by other
+    programs are picked up through invalidate() or the stamp file written by
+    notify_students_changed(), which is checked at most every `check_interval` seconds.
+    """
+
+    def __init__(self, stamp_path=STUDENTS_STAMP_PATH, check_interval=1.0):
+        self.stamp_path = stamp_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._students = None
+        self._stamp = None
+        self._next_check = 0.0
+
+    def _read_stamp(self):
+        try:
+            return os.stat(self.stamp_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self, conn=None):
+        conn = conn or get_connection()
+        stamp = self._read_stamp()
+        students = {row[0]: row for row in conn.execute(SQL_SELECT_ALL_STUDENTS).fetchall()}
+        with self._lock:
+            self._students = students
+            self._stamp = stamp
+        return students
+
+    def load(self, conn=None):
+        """(Re)loads every student from the database. Returns the number of students."""
+        return len(self._load(conn))
+
+    def invalidate(self):
+        """Drops the cached table; the next lookup reloads it from the database."""
+        with self._lock:
+            self._students = None
+
+    def _current(self):
+        students = self._students
+        now = time.monotonic()
+        if students is not None and now < self._next_check:
+            return students
+        self._next_check = now + self.check_interval
+        if students is None or self._read_stamp() != self._stamp:
+            students = self._load()
+        return students
+
+    def get(self, reg_no):
+        """Returns (reg_no, name, semester, phone_number) for a student, or None."""
+        students = self._current()
+        student = students.get(reg_no)
+        if student is None:
+            # Not seen yet, e.g. added by another process: fall back to the database once
+            student = get_student(get_connection(), reg_no)
+            if student is not None:
+                students[reg_no] = student
+        return student
+
+    def name(self, reg_no, default="Unknown"):
+        student = self.get(reg_no)
+        return student[1] if student else default
+
+    def put(self, reg_no, name, semester, phone):
+        with self._lock:
+            if self._students is not None:
+                self._students[reg_no] = (reg_no, name, semester, phone)
+
+    def __len__(self):
+        return len(self._current())
+
+
+student_cache = StudentCache()
+
+
 def add_student(conn, reg_no, name, semester, phone):
     """Adds a new student to the students table if they don't already exist."""
     cursor = conn.cursor()
     try:
-        cursor.execute("INSERT INTO students (reg_no, name, semester, phone_number) VALUES (?, ?, ?, ?)",
-                       (reg_no, name, semester, phone))
+        cursor.execute(SQL_INSERT_STUDENT, (reg_no, name, semester, phone))
         conn.commit()
+        student_cache.put(reg_no, name, semester, phone)
         print(f"[INFO] Student {name} ({reg_no}) added to the database.")
     except sqlite3.IntegrityError:
         # This error occurs if the reg_no (PRIMARY KEY) already exists.
@@ -54,30 +445,209 @@ def add_student(conn, reg_no, name, semester, phone):
         pass
 
 
+def add_students(conn, students):
+    """
+    Adds many students in one transaction with a single executemany, skipping
+    reg_nos that already exist. `students` is a list of (reg_no, name, semester, phone).
+    Returns the number of new rows.
+    """
+    students = list(students)
+    if not students:
+        return 0
+    before = conn.total_changes
+    with conn:
+        conn.executemany(SQL_INSERT_STUDENT_IF_NEW, students)
+    # Existing rows were left untouched, so reload rather than trusting the input
+    student_cache.invalidate()
+    return conn.total_changes - before
+
+
+def mark_attendance_bulk(conn, reg_nos, when=None):
+    """
+    Marks attendance for many students at once, e.g. from a recorded lecture.
+    All inserts go through one executemany in a single transaction; the
+    UNIQUE(student_reg_no, date) index drops students already marked that day.
+
+    Args:
+        reg_nos (iterable): Registration numbers to mark.
+        when (datetime): Timestamp to record (defaults to now).
+
+    Returns:
+        int: The number of new attendance records.
+    """
+    when = when or datetime.now()
+    date = when.strftime("%Y-%m-%d")
+    timestamp = when.strftime("%Y-%m-%d %H:%M:%S")
+    rows = [(reg_no, timestamp, date) for reg_no in dict.fromkeys(reg_nos) if reg_no]
+    if not rows:
+        return 0
+    before = conn.total_changes
+    with conn:
+        conn.executemany(SQL_INSERT_ATTENDANCE, rows)
+    if date == datetime.now().strftime("%Y-%m-%d"):
+        for reg_no, _, _ in rows:
+            marked_today.add(conn, reg_no, date)
+    return conn.total_changes - before
+
+
+DURABILITY_MODES = ("sync", "async")
+
+
+class AttendanceWriter:
+    """
+    Write-behind queue for attendance inserts.
+
+    mark_attendance hands records to a bounded queue and returns immediately; a
+    background thread groups whatever is pending into one transaction every
+    `flush_interval_ms` or `max_batch` records, whichever comes first. When the
+    queue is full, submit blocks, which applies backpressure instead of growing
+    memory without bound. Records are written to the pooled attendance database.
+    """
+
+    def __init__(self, flush_interval_ms=50, max_batch=200, max_queue=10000):
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name="attendance-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def submit(self, reg_no, timestamp, date):
+        self._queue.put((reg_no, timestamp, date))
+
+    def flush(self):
+        """Blocks until every record submitted so far has been committed."""
+        self._queue.join()
+
+    def close(self):
+        """Flushes pending records and stops the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stop = False
+            deadline = time.perf_counter() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch):
+        conn = get_connection()
+        cursor = conn.cursor()
+        inserted = []
+        try:
+            # One transaction (and one fsync) for the whole batch
+            for reg_no, timestamp, date in batch:
+                cursor.execute(SQL_INSERT_ATTENDANCE, (reg_no, timestamp, date))
+                if cursor.rowcount:
+                    inserted.append((reg_no, timestamp))
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            self.failed += len(batch)
+            print(f"[ERROR] Could not write {len(batch)} attendance records: {e}")
+            # Let the next recognition of these students try again
+            for reg_no, _, _ in batch:
+                marked_today.discard(reg_no)
+            return
+
+        self.written += len(inserted)
+        for reg_no, timestamp in inserted:
+            print(f"[ATTENDANCE] Marked for {student_cache.name(reg_no)} ({reg_no}) at {timestamp}")
+
+
+_durability = "sync"
+_writer = None
+
+
+def set_durability(mode, **writer_options):
+    """
+    Chooses how mark_attendance persists records.
+    'sync' commits each record before returning; 'async' queues it for the
+    background AttendanceWriter (options: flush_interval_ms, max_batch, max_queue).
+    """
+    global _durability, _writer
+    if mode not in DURABILITY_MODES:
+        raise ValueError(f"Unknown durability mode '{mode}', expected one of {DURABILITY_MODES}")
+    if mode == "async" and _writer is None:
+        _writer = AttendanceWriter(**writer_options)
+        atexit.register(shutdown_writer)
+    elif mode == "sync":
+        shutdown_writer()
+    _durability = mode
+
+
+def get_durability():
+    return _durability
+
+
+def shutdown_writer():
+    """Flushes and stops the background attendance writer, if one is running."""
+    global _writer
+    if _writer is not None:
+        writer, _writer = _writer, None
+        writer.close()
+
+
 def mark_attendance(conn, reg_no):
     """
     Marks attendance for a recognized student.
-    It checks if attendance has already been marked for that person today to avoid duplicates.
+    Students already marked today are filtered out in memory; otherwise a single
+    INSERT OR IGNORE relies on the UNIQUE(student_reg_no, date) index to avoid duplicates.
+    In 'async' durability mode the insert is queued for the background writer, which
+    writes to the pooled attendance database; any other `conn` (e.g. a scratch
+    database) is always written synchronously.
+    Returns True if a new attendance record was written or queued.
     """
     if not reg_no:
-        return
-    cursor = conn.cursor()
-    today_date = datetime.now().strftime("%Y-%m-%d")
+        return False
+    now_dt = datetime.now()
+    today_date = now_dt.strftime("%Y-%m-%d")
 
-    # Check if an entry for this student on this day already exists
-    cursor.execute("SELECT * FROM attendance WHERE student_reg_no = ? AND date(timestamp) = ?", (reg_no, today_date))
-    if cursor.fetchone():
-        return  # Already marked today, so do nothing
-
-    # If not marked, insert a new record
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cursor.execute("INSERT INTO attendance (student_reg_no, timestamp) VALUES (?, ?)", (reg_no, now))
-    conn.commit()
+    if not marked_today.add(conn, reg_no, today_date):
+        return False  # Already marked today, so do nothing
 
-    # Get student name for a more descriptive log message
-    cursor.execute("SELECT name FROM students WHERE reg_no = ?", (reg_no,))
-    result = cursor.fetchone()
-    name = result[0] if result else "Unknown"
+    now = now_dt.strftime("%Y-%m-%d %H:%M:%S")
+    writer = _writer
+    if _durability == "async" and writer is not None and _pool is not None and _pool.owns(conn):
+        writer.submit(reg_no, now, today_date)
+        return True
 
-    print(f"[ATTENDANCE] Marked for {name} ({reg_no}) at {now}")
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_INSERT_ATTENDANCE, (reg_no, now, today_date))
+        conn.commit()
+    except sqlite3.Error:
+        marked_today.discard(reg_no)
+        raise
+    if cursor.rowcount == 0:
+        return False  # Marked today by another process
 
+    # Student name for a more descriptive log message
+    print(f"[ATTENDANCE] Marked for {student_cache.name(reg_no)} ({reg_no}) at {now}")
+    return True
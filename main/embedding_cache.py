@@ -0,0 +1,150 @@
+import hashlib
+import os
+import sqlite3
+import numpy as np
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "embeddings.db")
+
+
+def file_signature(path):
+    """Returns the (mtime_ns, size) pair used as the cheap change check for an image file."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def file_hash(path):
+    """Returns the SHA-1 hex digest of a file's contents."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk store of face embeddings, kept next to attendance.db.
+
+    Each image is keyed by its absolute path and validated against its mtime/size,
+    falling back to a content hash when only the mtime changed (e.g. a copy or touch).
+    Images without a detectable face are cached too, so a warm start never re-runs
+    detection on them. The averaged per-student vector is stored alongside, keyed by
+    a signature of that student's image set.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS image_embeddings (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                sha1 TEXT NOT NULL,
+                embedding BLOB
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS student_embeddings (
+                reg_no TEXT PRIMARY KEY,
+                signature TEXT NOT NULL,
+                embedding BLOB NOT NULL
+            )
+        """)
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path):
+        return os.path.abspath(path)
+
+    @staticmethod
+    def _to_blob(embedding):
+        return None if embedding is None else np.asarray(embedding, dtype=np.float32).tobytes()
+
+    @staticmethod
+    def _from_blob(blob):
+        return None if blob is None else np.frombuffer(blob, dtype=np.float32).copy()
+
+    def lookup(self, path):
+        """
+        Looks up the cached embedding for an image.
+
+        Returns:
+            tuple: (hit, embedding). On a hit the embedding may be None if the image
+            was previously found to contain no face.
+        """
+        key = self._key(path)
+        try:
+            mtime_ns, size = file_signature(path)
+        except OSError:
+            self.misses += 1
+            return False, None
+
+        row = self.conn.execute("SELECT mtime_ns, size, sha1, embedding FROM image_embeddings WHERE path = ?",
+                                (key,)).fetchone()
+        if row is None or row[1] != size:
+            self.misses += 1
+            return False, None
+
+        if row[0] != mtime_ns:
+            # Same size but a different mtime: only trust the entry if the content is unchanged
+            if file_hash(path) != row[2]:
+                self.misses += 1
+                return False, None
+            self.conn.execute("UPDATE image_embeddings SET mtime_ns = ? WHERE path = ?", (mtime_ns, key))
+
+        self.hits += 1
+        return True, self._from_blob(row[3])
+
+    def store(self, path, embedding):
+        """Stores the embedding (or None for 'no face found') computed for an image."""
+        try:
+            mtime_ns, size = file_signature(path)
+            sha1 = file_hash(path)
+        except OSError:
+            return
+        self.conn.execute("INSERT OR REPLACE INTO image_embeddings (path, mtime_ns, size, sha1, embedding) "
+                          "VALUES (?, ?, ?, ?, ?)",
+                          (self._key(path), mtime_ns, size, sha1, self._to_blob(embedding)))
+
+    @classmethod
+    def image_set_signature(cls, image_paths):
+        """Returns a digest identifying the exact set and state of a student's images."""
+        h = hashlib.sha1()
+        for path in sorted(cls._key(p) for p in image_paths):
+            try:
+                mtime_ns, size = file_signature(path)
+            except OSError:
+                mtime_ns, size = -1, -1
+            h.update(f"{path}|{mtime_ns}|{size}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    def get_student(self, reg_no, image_paths):
+        """Returns the cached averaged embedding for a student if their images are unchanged, else None."""
+        row = self.conn.execute("SELECT signature, embedding FROM student_embeddings WHERE reg_no = ?",
+                                (reg_no,)).fetchone()
+        if row is None or row[0] != self.image_set_signature(image_paths):
+            return None
+        self.hits += len(image_paths)
+        return self._from_blob(row[1])
+
+    def put_student(self, reg_no, image_paths, embedding):
+        """Stores the averaged embedding for a student together with the signature of their images."""
+        self.conn.execute("INSERT OR REPLACE INTO student_embeddings (reg_no, signature, embedding) VALUES (?, ?, ?)",
+                          (reg_no, self.image_set_signature(image_paths), self._to_blob(embedding)))
+
+    def commit(self):
+        self.conn.commit()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
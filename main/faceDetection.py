@@ -1,6 +1,29 @@
 import cv2
 import numpy as np
 
+# Input size of the cheap pre-pass and of the per-face ROI passes in detect_faces_fast
+PREPASS_SIZE = 150
+ROI_SIZE = 150
+# How far an ROI extends around a known face, as a fraction of the face size
+ROI_MARGIN = 0.5
+# Pre-pass candidates are kept down to this fraction of the final threshold
+PREPASS_THRESHOLD_SCALE = 0.6
+
+
+def _scale_boxes(detections, w, h, confidence_threshold):
+    """
+    Filters raw SSD rows (N x 7) by confidence and scales them to pixel boxes
+    clipped to the image, dropping any that end up empty.
+
+    Returns:
+        tuple: (int boxes as an N x 4 array, their confidences)
+    """
+    detections = detections[detections[:, 2] > confidence_threshold]
+    boxes = detections[:, 3:7] * np.array([w, h, w, h], dtype=np.float32)
+    boxes = np.clip(boxes, 0, [w, h, w, h]).astype("int")
+    keep = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+    return boxes[keep], detections[keep, 2]
+
 
 def detect_faces(frame, net, confidence_threshold=0.5):
     """
@@ -18,17 +41,97 @@ def detect_faces(frame, net, confidence_threshold=0.5):
     blob = cv2.dnn.blobFromImage(cv2.resize(frame, (300, 300)), 1.0,
                                  (300, 300), (104.0, 177.0, 123.0))
     net.setInput(blob)
-    detections = net.forward()
+    detections = net.forward().reshape(-1, 7)
+    return list(_scale_boxes(detections, w, h, confidence_threshold)[0])
+
+
+def detect_faces_batch(frames, net, confidence_threshold=0.5):
+    """
+    Detects faces in several frames with a single forward pass of the Caffe model.
+
+    Args:
+        frames (list): The input image frames (any sizes).
+        net (cv2.dnn_Net): The loaded face detection model.
+        confidence_threshold (float): The minimum probability to filter weak detections.
+
+    Returns:
+        list: One list of bounding boxes per input frame.
+    """
+    if not frames:
+        return []
+    blob = cv2.dnn.blobFromImages([cv2.resize(f, (300, 300)) for f in frames], 1.0,
+                                  (300, 300), (104.0, 177.0, 123.0))
+    net.setInput(blob)
+    detections = net.forward().reshape(-1, 7)
 
+    # Column 0 holds the index of the frame each detection belongs to
+    image_ids = detections[:, 0].astype(int)
     boxes = []
-    for i in range(0, detections.shape[2]):
-        confidence = detections[0, 0, i, 2]
-        if confidence > confidence_threshold:
-            box = detections[0, 0, i, 3:7] * np.array([w, h, w, h])
-            boxes.append(box.astype("int"))
+    for image_id, f in enumerate(frames):
+        h, w = f.shape[:2]
+        boxes.append(list(_scale_boxes(detections[image_ids == image_id], w, h, confidence_threshold)[0]))
     return boxes
 
 
+def _expand(box, margin, w, h):
+    x1, y1, x2, y2 = box
+    mx, my = int((x2 - x1) * margin), int((y2 - y1) * margin)
+    return max(0, x1 - mx), max(0, y1 - my), min(w, x2 + mx), min(h, y2 + my)
+
+
+def detect_faces_fast(frame, net, known_boxes=None, confidence_threshold=0.5, prepass_size=PREPASS_SIZE,
+                      roi_size=ROI_SIZE, roi_margin=ROI_MARGIN):
+    """
+    Cheaper alternative to detect_faces for video streams.
+
+    A low-resolution pass over the whole frame proposes candidate faces, and the
+    detector is re-run only on small ROIs around those candidates and around
+    previously known face positions (e.g. the tracker's boxes). Each ROI pass is
+    done at `roi_size`, so with a few faces the total work is well below one
+    300x300 pass. Overlapping results are merged with non-maximum suppression.
+
+    Args:
+        frame (numpy.ndarray): The input image frame.
+        net (cv2.dnn_Net): The loaded face detection model.
+        known_boxes (list): Face boxes from an earlier frame, if any.
+        confidence_threshold (float): The minimum probability to filter weak detections.
+
+    Returns:
+        list: A list of bounding boxes for detected faces.
+    """
+    (h, w) = frame.shape[:2]
+    blob = cv2.dnn.blobFromImage(cv2.resize(frame, (prepass_size, prepass_size)), 1.0,
+                                 (prepass_size, prepass_size), (104.0, 177.0, 123.0))
+    net.setInput(blob)
+    candidates, _ = _scale_boxes(net.forward().reshape(-1, 7), w, h,
+                                 confidence_threshold * PREPASS_THRESHOLD_SCALE)
+
+    rois = [_expand(box, roi_margin, w, h) for box in list(candidates) + list(known_boxes or [])]
+    rois = [roi for roi in rois if roi[2] > roi[0] and roi[3] > roi[1]]
+    if not rois:
+        return []
+
+    crops = [cv2.resize(frame[y1:y2, x1:x2], (roi_size, roi_size)) for x1, y1, x2, y2 in rois]
+    net.setInput(cv2.dnn.blobFromImages(crops, 1.0, (roi_size, roi_size), (104.0, 177.0, 123.0)))
+    detections = net.forward().reshape(-1, 7)
+    detections = detections[detections[:, 2] > confidence_threshold]
+    if not len(detections):
+        return []
+
+    # Map ROI-relative boxes back to frame coordinates
+    rois = np.array(rois, dtype=np.float32)[detections[:, 0].astype(int)]
+    sizes = np.stack([rois[:, 2] - rois[:, 0], rois[:, 3] - rois[:, 1]] * 2, axis=1)
+    boxes = rois[:, [0, 1, 0, 1]] + np.clip(detections[:, 3:7], 0, 1) * sizes
+    boxes = boxes.astype("int")
+    scores = detections[:, 2]
+
+    keep = cv2.dnn.NMSBoxes([[int(x1), int(y1), int(x2 - x1), int(y2 - y1)] for x1, y1, x2, y2 in boxes],
+                            scores.tolist(), confidence_threshold, 0.4)
+    keep = np.asarray(keep, dtype=int).reshape(-1)
+    boxes = boxes[keep]
+    boxes = boxes[(boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])]
+    return list(boxes)
+
 
 def extract_face(frame, box):
     """
@@ -41,8 +144,10 @@ def extract_face(frame, box):
     Returns:
         numpy.ndarray: The cropped and resized face image (160x160).
     """
-    (x1, y1, x2, y2) = box
-    x1, y1 = max(0, x1), max(0, y1)
+    (h, w) = frame.shape[:2]
+    x1, y1 = min(max(0, int(box[0])), w - 1), min(max(0, int(box[1])), h - 1)
+    # Keep at least one pixel so a degenerate box never yields an empty crop
+    x2, y2 = max(min(w, int(box[2])), x1 + 1), max(min(h, int(box[3])), y1 + 1)
     face = frame[y1:y2, x1:x2]
     face = cv2.resize(face, (160, 160))
     return face
@@ -1,6 +1,32 @@
-import cv2
 import numpy as np
 
+# Maximum number of faces sent to FaceNet in a single forward pass
+DEFAULT_BATCH_SIZE = 32
+
+
+def get_embeddings(faces, embedder, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Generates 128-d face embeddings for a batch of faces using the FaceNet model.
+
+    Args:
+        faces (list): Extracted BGR face images (160x160), or an (N, 160, 160, 3) array.
+        embedder (FaceNet): The loaded FaceNet model.
+        batch_size (int): The maximum number of faces per forward pass.
+
+    Returns:
+        numpy.ndarray: An (N, 128) array with one embedding per face.
+    """
+    if len(faces) == 0:
+        return np.empty((0, 128), dtype=np.float32)
+
+    # FaceNet model expects RGB images; flip the channel axis for the whole batch at once
+    batch = np.ascontiguousarray(np.asarray(faces)[..., ::-1])
+
+    # Get the embeddings, one forward pass per chunk of at most batch_size faces
+    chunks = [embedder.embeddings(batch[i:i + batch_size]) for i in range(0, len(batch), batch_size)]
+    return np.concatenate(chunks, axis=0)
+
+
 def get_embedding(face, embedder):
     """
     Generates a 128-d face embedding using the FaceNet model.
@@ -12,11 +38,4 @@ def get_embedding(face, embedder):
     Returns:
         numpy.ndarray: The 128-d feature vector (embedding) for the face.
     """
-    # FaceNet model expects RGB images
-    face = cv2.cvtColor(face, cv2.COLOR_BGR2RGB)
-    # Add batch dimension
-    face = np.expand_dims(face, axis=0)
-    # Get the embedding
-    embedding = embedder.embeddings(face)[0]
-    return embedding
-
+    return get_embeddings([face], embedder)[0]
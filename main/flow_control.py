@@ -0,0 +1,195 @@
+import threading
+import time
+from pipeline import RateMeter
+
+
+class FrameDropped(Exception):
+    """Passed to a frame's callback when it was discarded as stale instead of processed."""
+
+
+class ClientFlow:
+    """Flow-control state and counters for one connected client."""
+
+    def __init__(self, fps_window):
+        self.in_flight = False
+        self.pending = None
+        self.received = 0
+        self.processed = 0
+        self.dropped_superseded = 0
+        self.dropped_stale = 0
+        self.latency_ms = None
+        self.rate = RateMeter(window=fps_window)
+        # Upload and server CPU accounting, split by full-frame vs ROI uploads
+        self.bytes_in = 0
+        self.full_bytes_estimate = 0.0
+        self.gated = 0
+        self.cpu_ms = {'full': [0, 0.0], 'roi': [0, 0.0]}
+
+    @property
+    def dropped(self):
+        return self.dropped_superseded + self.dropped_stale
+
+
+class FlowController:
+    """
+    Per-client backpressure in front of the inference scheduler.
+
+    Each client has at most one frame in the scheduler. Frames that arrive while
+    it is busy wait in a single slot that keeps only the newest one; a frame that
+    has waited longer than `max_age_ms` when its turn comes is dropped instead of
+    processed (its callback gets a FrameDropped error). After every result the
+    client is told a recommended send interval, derived from how long its frames
+    take in the scheduler, so a well-behaved client stops sending frames the
+    server would only discard.
+
+    `submit(frame, done)` hands a frame to the scheduler; `done(results, error)`
+    must be called once it has been processed.
+    """
+
+    def __init__(self, submit, max_age_ms=1000, min_interval_ms=100, max_interval_ms=3000, headroom=1.2,
+                 alpha=0.2, fps_window=10.0):
+        self._submit = submit
+        self.max_age = max_age_ms / 1000.0
+        self.min_interval_ms = min_interval_ms
+        self.max_interval_ms = max_interval_ms
+        self.headroom = headroom
+        self.alpha = alpha
+        self.fps_window = fps_window
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def offer(self, sid, frame, on_result, usage=None):
+        """
+        Accepts a frame from a client.
+        `on_result(results, error, flow)` is called with the scheduler output and the
+        client's flow info once the frame (or a newer one replacing it) is processed.
+        `usage` describes the upload for per-client accounting: 'bytes' received,
+        'pixel_ratio' (full-frame pixels per uploaded pixel), 'roi' (whether it was
+        cropped/downscaled), 'gated' (frames the client skipped since its last upload)
+        and 'decode_cpu_ms'.
+
+        Returns:
+            str: 'submitted', 'queued' (waiting behind the frame in flight) or
+            'replaced' (queued, and an older waiting frame was dropped).
+        """
+        usage = usage or {}
+        item = (frame, on_result, time.monotonic(), usage)
+        with self._lock:
+            client = self._clients.setdefault(sid, ClientFlow(self.fps_window))
+            client.received += 1
+            client.bytes_in += usage.get('bytes', 0)
+            client.full_bytes_estimate += usage.get('bytes', 0) * usage.get('pixel_ratio', 1.0)
+            client.gated += usage.get('gated', 0)
+            if client.in_flight:
+                status = 'queued'
+                if client.pending is not None:
+                    client.dropped_superseded += 1
+                    status = 'replaced'
+                client.pending = item
+                return status
+            client.in_flight = True
+        self._dispatch(sid, item)
+        return 'submitted'
+
+    def forget(self, sid):
+        """Drops the state of a disconnected client."""
+        with self._lock:
+            self._clients.pop(sid, None)
+
+    def _dispatch(self, sid, item):
+        frame, on_result, _, usage = item
+        dispatched_at = time.monotonic()
+
+        def done(results, error):
+            cpu_ms = getattr(results, 'cpu_ms', 0.0) + usage.get('decode_cpu_ms', 0.0)
+            flow = self._finished(sid, dispatched_at, cpu_ms, 'roi' if usage.get('roi') else 'full')
+            try:
+                on_result(results, error, flow)
+            finally:
+                self._next(sid)
+
+        self._submit(frame, done)
+
+    def _finished(self, sid, dispatched_at, cpu_ms=0.0, kind='full'):
+        latency_ms = (time.monotonic() - dispatched_at) * 1000.0
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is None:
+                return None
+            client.processed += 1
+            client.rate.tick()
+            client.cpu_ms[kind][0] += 1
+            client.cpu_ms[kind][1] += cpu_ms
+            if client.latency_ms is None:
+                client.latency_ms = latency_ms
+            else:
+                client.latency_ms += self.alpha * (latency_ms - client.latency_ms)
+            return self._flow_info(client)
+
+    def _next(self, sid):
+        """Submits the client's newest waiting frame, discarding it if it has gone stale."""
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is None:
+                return
+            item, client.pending = client.pending, None
+            stale = item is not None and time.monotonic() - item[2] > self.max_age
+            if stale:
+                client.dropped_stale += 1
+            client.in_flight = item is not None and not stale
+            flow = self._flow_info(client)
+        if stale:
+            item[1](None, FrameDropped(f"Frame older than {self.max_age * 1000:.0f} ms was dropped"), flow)
+        elif item is not None:
+            self._dispatch(sid, item)
+
+    def recommended_interval_ms(self, client):
+        if client.latency_ms is None:
+            return self.min_interval_ms
+        interval = client.latency_ms * self.headroom
+        return int(min(self.max_interval_ms, max(self.min_interval_ms, interval)))
+
+    def _flow_info(self, client):
+        return {
+            'recommended_interval_ms': self.recommended_interval_ms(client),
+            'dropped': client.dropped,
+            'effective_fps': round(client.rate.rate(), 2),
+        }
+
+    def info(self, sid):
+        """Current flow info for a client (None if unknown)."""
+        with self._lock:
+            client = self._clients.get(sid)
+            return None if client is None else self._flow_info(client)
+
+    @staticmethod
+    def _upload_stats(client):
+        """Bytes uploaded vs the full-frame estimate, and average server CPU per full/ROI frame."""
+        uploads = max(1, client.received)
+        # Gated frames were never sent; count them at the average full-frame size
+        saved = client.full_bytes_estimate - client.bytes_in + client.gated * client.full_bytes_estimate / uploads
+        return {
+            'bytes_in': client.bytes_in,
+            'bytes_saved_estimate': int(saved),
+            'gated_frames': client.gated,
+            'cpu_ms_per_frame': {kind: round(total / count, 2) if count else None
+                                 for kind, (count, total) in client.cpu_ms.items()},
+        }
+
+    def snapshot(self):
+        """Per-client counters: frames, drops, latency, effective FPS, upload bytes and server CPU."""
+        with self._lock:
+            return {
+                sid: {
+                    'received': c.received,
+                    'processed': c.processed,
+                    'dropped_superseded': c.dropped_superseded,
+                    'dropped_stale': c.dropped_stale,
+                    'latency_ms': round(c.latency_ms, 2) if c.latency_ms is not None else None,
+                    'effective_fps': round(c.rate.rate(), 2),
+                    'recommended_interval_ms': self.recommended_interval_ms(c),
+                    'in_flight': c.in_flight,
+                    **self._upload_stats(c),
+                }
+                for sid, c in self._clients.items()
+            }
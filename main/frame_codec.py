@@ -0,0 +1,128 @@
+import base64
+import threading
+import time
+import cv2
+import numpy as np
+
+TRANSPORT_MODES = ("binary", "data_url")
+
+
+class TransportStats:
+    """Thread-safe per-mode counters of received frames, bytes on the wire and decode time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {mode: {'frames': 0, 'bytes': 0, 'decode_seconds': 0.0} for mode in TRANSPORT_MODES}
+
+    def record(self, mode, nbytes, seconds):
+        with self._lock:
+            totals = self._totals[mode]
+            totals['frames'] += 1
+            totals['bytes'] += nbytes
+            totals['decode_seconds'] += seconds
+
+    def snapshot(self):
+        """Returns average bytes-per-frame and decode time per transport mode."""
+        with self._lock:
+            snapshot = {}
+            for mode, totals in self._totals.items():
+                frames = totals['frames']
+                snapshot[mode] = {
+                    'frames': frames,
+                    'avg_bytes_per_frame': round(totals['bytes'] / frames, 1) if frames else 0,
+                    'avg_decode_ms': round(totals['decode_seconds'] * 1000.0 / frames, 3) if frames else 0,
+                }
+            return snapshot
+
+
+def encoded_buffer(payload):
+    """
+    Returns the encoded image bytes carried by a Socket.IO payload.
+
+    Binary attachments (bytes/bytearray/memoryview from an ArrayBuffer or Blob) are
+    wrapped without copying. Strings are treated as base64, optionally as a
+    'data:image/jpeg;base64,...' URL for backwards compatibility.
+
+    Returns:
+        tuple: (numpy uint8 buffer, transport mode, bytes received on the wire)
+    """
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return np.frombuffer(payload, dtype=np.uint8), "binary", len(payload)
+    if isinstance(payload, str):
+        # Skip the data URL prefix if present
+        comma = payload.find(',', 0, 64)
+        raw = base64.b64decode(payload[comma + 1:] if comma >= 0 else payload)
+        return np.frombuffer(raw, dtype=np.uint8), "data_url", len(payload)
+    raise TypeError(f"Unsupported image payload type: {type(payload).__name__}")
+
+
+def decode_image(payload, stats=None):
+    """
+    Decodes a received image (binary attachment or base64 data URL) into a BGR frame.
+
+    Returns:
+        tuple: (frame or None if it could not be decoded, info dict with the
+        transport mode, wire bytes and decode time in milliseconds)
+    """
+    start = time.perf_counter()
+    buf, mode, nbytes = encoded_buffer(payload)
+    frame = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    elapsed = time.perf_counter() - start
+    if stats is not None:
+        stats.record(mode, nbytes, elapsed)
+    return frame, {'mode': mode, 'bytes': nbytes, 'decode_ms': round(elapsed * 1000.0, 3)}
+
+
+class FrameRegion:
+    """
+    Where an uploaded frame sits inside the client's full camera frame.
+
+    Clients may crop to the area around previously seen faces and downscale
+    before uploading; they then send the crop's top-left corner (x, y) and the
+    scale applied, both in full-frame pixels, so detected boxes can be mapped
+    back to full-frame coordinates.
+    """
+
+    def __init__(self, x=0.0, y=0.0, scale=1.0, full_width=None, full_height=None):
+        self.x = x
+        self.y = y
+        self.scale = scale
+        self.full_width = full_width
+        self.full_height = full_height
+
+    @classmethod
+    def from_payload(cls, roi, frame):
+        """
+        Builds a region from the optional 'roi' field of a recognize_face payload
+        ({'x', 'y', 'scale', 'full_width', 'full_height'}). Raises ValueError if malformed.
+        """
+        h, w = frame.shape[:2]
+        if not roi:
+            return cls(full_width=w, full_height=h)
+        try:
+            x, y, scale = float(roi.get('x', 0)), float(roi.get('y', 0)), float(roi.get('scale', 1))
+            full_width = int(roi.get('full_width') or round(x + w / scale))
+            full_height = int(roi.get('full_height') or round(y + h / scale))
+        except (AttributeError, TypeError, ValueError):
+            raise ValueError("Malformed roi: expected numeric x, y, scale, full_width and full_height")
+        if not (np.isfinite([x, y, scale]).all() and 0 < scale <= 4 and x >= 0 and y >= 0
+                and 0 < full_width <= 16384 and 0 < full_height <= 16384):
+            raise ValueError("Invalid roi values")
+        return cls(x, y, scale, full_width, full_height)
+
+    @property
+    def is_full_frame(self):
+        return self.x == 0 and self.y == 0 and self.scale == 1
+
+    def pixel_ratio(self, frame):
+        """Full-frame pixels per uploaded pixel (1.0 when the whole frame was sent)."""
+        h, w = frame.shape[:2]
+        return (self.full_width * self.full_height) / float(max(1, w * h))
+
+    def to_full_frame(self, box):
+        """Maps an (x1, y1, x2, y2) box in the uploaded frame to full-frame pixels."""
+        x1, y1, x2, y2 = (float(v) for v in box)
+        mapped = np.array([self.x + x1 / self.scale, self.y + y1 / self.scale,
+                           self.x + x2 / self.scale, self.y + y2 / self.scale])
+        limits = [self.full_width, self.full_height, self.full_width, self.full_height]
+        return np.clip(mapped, 0, limits).astype(int)
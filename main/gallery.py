@@ -0,0 +1,190 @@
+import threading
+import numpy as np
+
+# The server accepts a match when the Euclidean distance between unit embeddings is below this
+RECOGNITION_DISTANCE = 0.6
+
+
+def normalize(embeddings):
+    """L2-normalises a vector or each row of a matrix, returning contiguous float32."""
+    arr = np.ascontiguousarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    return arr / np.maximum(norms, 1e-12)
+
+
+def cosine_to_distance(score):
+    """Converts a cosine similarity between unit vectors into Euclidean distance."""
+    return float(np.sqrt(max(0.0, 2.0 - 2.0 * float(score))))
+
+
+def distance_to_cosine(distance):
+    """Converts a Euclidean distance between unit vectors into cosine similarity."""
+    return 1.0 - float(distance) ** 2 / 2.0
+
+
+def best_matches(search_results, threshold):
+    """
+    Reduces search() results to the best (reg_no, score) per query; reg_no is None
+    when there is no candidate or the best cosine similarity does not exceed the threshold.
+    """
+    results = []
+    for candidates in search_results:
+        if not candidates:
+            results.append((None, -1.0))
+            continue
+        reg_no, score = candidates[0]
+        results.append((reg_no if score > threshold else None, score))
+    return results
+
+
+class Gallery:
+    """
+    In-memory gallery of known faces used for matching.
+
+    Embeddings are stored L2-normalised in one contiguous float32 matrix with a
+    parallel array of registration numbers, so a whole frame's faces are scored
+    against every student with a single matrix multiply. Rows live in a
+    preallocated buffer that doubles when full, and removal swaps the last row
+    into the freed slot, so add/remove are O(1) amortised.
+    """
+
+    # Row storage type; compact_store.QuantizedGallery uses float16/int8
+    _storage_dtype = np.float32
+
+    def __init__(self, dim=128, capacity=64):
+        self.dim = dim
+        self._matrix = np.zeros((max(1, capacity), dim), dtype=self._storage_dtype)
+        self._reg_nos = np.empty(max(1, capacity), dtype=object)
+        self._rows = {}
+        self._size = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_dict(cls, embeddings, dim=128):
+        """Builds a gallery from a {reg_no: embedding} dictionary."""
+        gallery = cls(dim=dim, capacity=max(64, len(embeddings)))
+        for reg_no, embedding in embeddings.items():
+            gallery.add(reg_no, embedding)
+        return gallery
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, reg_no):
+        return reg_no in self._rows
+
+    def __iter__(self):
+        return iter(self.reg_nos.tolist())
+
+    @property
+    def matrix(self):
+        """The (N, dim) matrix of normalised embeddings currently in use."""
+        return self._matrix[:self._size]
+
+    @property
+    def reg_nos(self):
+        """The registration numbers parallel to the rows of `matrix`."""
+        return self._reg_nos[:self._size]
+
+    def get(self, reg_no):
+        """Returns the normalised embedding stored for a student, or None."""
+        row = self._rows.get(reg_no)
+        return None if row is None else np.array(self._matrix[row], dtype=np.float32)
+
+    def add(self, reg_no, embedding):
+        """Adds a student's embedding, replacing any existing entry for the same reg_no."""
+        vec = normalize(np.reshape(embedding, (self.dim,)))
+        with self._lock:
+            self._ensure_writable()
+            row = self._rows.get(reg_no)
+            if row is None:
+                if self._size == len(self._matrix):
+                    self._grow()
+                row = self._size
+                self._size += 1
+                self._rows[reg_no] = row
+                self._reg_nos[row] = reg_no
+            self._store(row, vec)
+
+    def remove(self, reg_no):
+        """Removes a student from the gallery. Returns False if they were not present."""
+        with self._lock:
+            row = self._rows.pop(reg_no, None)
+            if row is None:
+                return False
+            self._ensure_writable()
+            last = self._size - 1
+            if row != last:
+                moved = self._reg_nos[last]
+                self._move(last, row)
+                self._reg_nos[row] = moved
+                self._rows[moved] = row
+            self._reg_nos[last] = None
+            self._size = last
+            return True
+
+    def _grown_capacity(self):
+        # Loaded stores are sized exactly and may hold no rows at all
+        return max(64, len(self._matrix) * 2)
+
+    def _grow(self):
+        capacity = self._grown_capacity()
+        matrix = np.zeros((capacity, self.dim), dtype=self._matrix.dtype)
+        matrix[:self._size] = self._matrix[:self._size]
+        reg_nos = np.empty(capacity, dtype=object)
+        reg_nos[:self._size] = self._reg_nos[:self._size]
+        self._matrix, self._reg_nos = matrix, reg_nos
+
+    # Storage hooks, overridden by compact_store.QuantizedGallery
+
+    def _ensure_writable(self):
+        """Copies a memory-mapped (read-only) matrix into private memory before the first change."""
+        if not self._matrix.flags.writeable:
+            self._matrix = np.array(self._matrix)
+
+    def _store(self, row, vec):
+        self._matrix[row] = vec
+
+    def _move(self, src, dst):
+        self._matrix[dst] = self._matrix[src]
+
+    def _scores(self, queries, n):
+        return queries @ self._matrix[:n].T
+
+    def search(self, embeddings, k=1):
+        """
+        Scores query embeddings against every student with one matrix multiply.
+
+        Args:
+            embeddings (numpy.ndarray): A single embedding or an (M, dim) batch.
+            k (int): Number of best matches to return per query.
+
+        Returns:
+            list: For each query, a list of up to k (reg_no, cosine_similarity)
+            tuples sorted from best to worst.
+        """
+        queries = normalize(np.reshape(embeddings, (-1, self.dim)))
+        with self._lock:
+            n = self._size
+            if n == 0 or len(queries) == 0:
+                return [[] for _ in range(len(queries))]
+            scores = self._scores(queries, n)
+            reg_nos = self._reg_nos[:n].copy()
+
+        k = min(k, n)
+        if k < n:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(n), (len(queries), n))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [list(zip(reg_nos[idx].tolist(), s.tolist())) for idx, s in zip(top, top_scores)]
+
+    def match(self, embeddings, threshold):
+        """
+        Returns the best (reg_no, score) for each query; reg_no is None when the
+        best cosine similarity does not exceed the threshold.
+        """
+        return best_matches(self.search(embeddings, k=1), threshold)
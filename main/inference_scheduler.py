@@ -0,0 +1,203 @@
+import queue
+import threading
+import time
+import traceback
+from collections import Counter, deque
+import numpy as np
+from faceDetection import detect_faces_batch, extract_face
+from faceEmbedding import get_embeddings, DEFAULT_BATCH_SIZE
+
+STAGES = ("queue_wait", "detect", "embed", "match", "callback", "total")
+
+
+class FrameResults(list):
+    """
+    A frame's (box, reg_no, score) results, plus `cpu_ms`: its share of the
+    batch's process CPU time (detection split evenly across frames, embedding
+    and matching split by face count).
+    """
+
+    cpu_ms = 0.0
+
+
+class SchedulerStats:
+    """Thread-safe counters for the inference scheduler: batch sizes and per-stage latency."""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.batch_sizes = Counter()
+        self.frames = 0
+        self.batches = 0
+        self._latency = {stage: deque(maxlen=window) for stage in STAGES}
+
+    def record_batch(self, size):
+        with self._lock:
+            self.batch_sizes[size] += 1
+            self.batches += 1
+            self.frames += size
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self._latency[stage].append(seconds)
+
+    def snapshot(self):
+        """Returns the counters as a JSON-serialisable dict, latencies in milliseconds."""
+        with self._lock:
+            latency = {}
+            for stage, samples in self._latency.items():
+                if not samples:
+                    continue
+                ms = np.array(samples) * 1000.0
+                latency[stage] = {
+                    'mean_ms': round(float(ms.mean()), 3),
+                    'p50_ms': round(float(np.percentile(ms, 50)), 3),
+                    'p95_ms': round(float(np.percentile(ms, 95)), 3),
+                    'max_ms': round(float(ms.max()), 3),
+                }
+            return {
+                'frames': self.frames,
+                'batches': self.batches,
+                'batch_size_histogram': {str(k): v for k, v in sorted(self.batch_sizes.items())},
+                'latency': latency,
+            }
+
+
+class InferenceScheduler:
+    """
+    Micro-batching scheduler shared by all clients.
+
+    Frames submitted from any Socket.IO handler are queued and picked up by a
+    single worker thread, which waits up to `max_wait_ms` after the first frame
+    (or until `max_batch_size` frames are queued), then runs one batched SSD
+    detection over all frames, one batched FaceNet pass over all their faces and
+    one gallery search. Each request's callback receives its own results.
+    """
+
+    def __init__(self, net, embedder, gallery, max_batch_size=16, max_wait_ms=10,
+                 embed_batch_size=DEFAULT_BATCH_SIZE):
+        self.net = net
+        self.embedder = embedder
+        self.gallery = gallery
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.embed_batch_size = embed_batch_size
+        self.stats = SchedulerStats()
+        # Held while the models run; other users of net/embedder (e.g. registration) must take it too
+        self.model_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def submit(self, frame, callback):
+        """
+        Queues a frame for recognition.
+
+        The callback is called from the worker thread as callback(results, error),
+        where results is a FrameResults list of (box, reg_no, score) for every face
+        found, reg_no being the best gallery match (not thresholded), or error is
+        the exception raised.
+        """
+        self._queue.put((frame, callback, time.perf_counter()))
+
+    def stop(self, timeout=5.0):
+        """Stops the worker after it has drained the requests already queued."""
+        self._running = False
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats_snapshot(self):
+        snapshot = self.stats.snapshot()
+        snapshot['queue_depth'] = self.queue_depth
+        return snapshot
+
+    def _collect_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._running = False
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                return
+            try:
+                results, error = self._process(batch), None
+            except Exception as e:
+                results, error = [None] * len(batch), e
+            self._reply(batch, results, error)
+            if not self._running and self._queue.empty():
+                return
+
+    def _process(self, batch):
+        started = time.perf_counter()
+        self.stats.record_batch(len(batch))
+        for _, _, enqueued in batch:
+            self.stats.record("queue_wait", started - enqueued)
+
+        frames = [frame for frame, _, _ in batch]
+        with self.model_lock:
+            cpu0 = time.process_time()
+            t0 = time.perf_counter()
+            boxes_per_frame = detect_faces_batch(frames, self.net)
+            t1 = time.perf_counter()
+            cpu1 = time.process_time()
+            self.stats.record("detect", t1 - t0)
+
+            faces, owners = [], []
+            for i, (frame, boxes) in enumerate(zip(frames, boxes_per_frame)):
+                for box in boxes:
+                    if box[2] <= max(0, box[0]) or box[3] <= max(0, box[1]):
+                        continue
+                    faces.append(extract_face(frame, box))
+                    owners.append((i, box))
+            embeddings = get_embeddings(faces, self.embedder, self.embed_batch_size)
+            t2 = time.perf_counter()
+        self.stats.record("embed", t2 - t1)
+
+        matches = self.gallery.search(embeddings, k=1) if len(faces) else []
+        # Multi-template galleries learn new exemplars from confident matches
+        if matches and hasattr(self.gallery, "observe"):
+            self.gallery.observe(embeddings, [c[0] if c else (None, -1.0) for c in matches])
+        self.stats.record("match", time.perf_counter() - t2)
+
+        results = [FrameResults() for _ in batch]
+        for (i, box), candidates in zip(owners, matches):
+            reg_no, score = candidates[0] if candidates else (None, -1.0)
+            results[i].append((box, reg_no, score))
+
+        detect_cpu_ms = (cpu1 - cpu0) * 1000.0 / len(batch)
+        face_cpu_ms = (time.process_time() - cpu1) * 1000.0 / len(faces) if faces else 0.0
+        for frame_results in results:
+            frame_results.cpu_ms = detect_cpu_ms + face_cpu_ms * len(frame_results)
+
+        return results
+
+    def _reply(self, batch, results, error):
+        """Answers every request of a batch exactly once; a failing callback never affects the others."""
+        started = time.perf_counter()
+        for (_, callback, enqueued), frame_results in zip(batch, results):
+            try:
+                callback(frame_results, error)
+            except Exception:
+                print("[ERROR] Recognition callback failed:")
+                traceback.print_exc()
+            self.stats.record("total", time.perf_counter() - enqueued)
+        self.stats.record("callback", time.perf_counter() - started)
@@ -0,0 +1,221 @@
+"""
+Load test for multi-worker deployments.
+
+`local` measures how recognition throughput scales with the number of worker
+processes on this host, without a running server: for each worker count it
+starts that many processes mapping one shared gallery (see shared_gallery.py)
+and runs the per-frame recognition work in a closed loop. With --with-models
+that is detect_faces + FaceNet + matching on the dataset images; otherwise it
+is matching a frame's worth of faces against a synthetic gallery. Halfway
+through each run a registration is published, and every worker reports whether
+it has picked it up. Each process is limited to one BLAS thread so the scaling
+comes from the processes, as with real workers.
+
+`socket` drives running servers (e.g. from workers.py) with Socket.IO clients,
+each keeping one frame in flight, and reports replies per second and latency
+per URL. Run it against 1, 2, 4... workers to compare. Needs python-socketio[client].
+
+Usage:
+    python load_test.py local --workers 1 2 4 --size 200000 --duration 10
+    python load_test.py socket --urls https://127.0.0.1:5000 https://127.0.0.1:5001 --clients 8
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+
+# One BLAS/OpenMP thread per process; spawned workers inherit this before importing NumPy
+THREAD_ENV = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+PROBE_REG_NO = "LOADTEST-PROBE"
+
+
+def _local_worker(root, args, ready, start, results):
+    from gallery import normalize
+    from shared_gallery import SharedGallery
+
+    gallery = SharedGallery(root, check_interval=0.5)
+    rng = np.random.default_rng(args.seed + os.getpid())
+    if args.with_models:
+        import cv2
+        from benchmark import dataset_frames
+        from faceDetection import detect_faces, extract_face
+        from faceEmbedding import get_embeddings
+        from main import DATASET_PATH, EMBEDDER_BACKEND
+        from models import ModelRegistry
+
+        net, embedder = ModelRegistry(EMBEDDER_BACKEND, warmup_batch=1).load()
+        frames = dataset_frames(DATASET_PATH, 20)
+
+        def work(i):
+            frame = frames[i % len(frames)]
+            faces = [extract_face(frame, box) for box in detect_faces(frame, net)]
+            if faces:
+                gallery.match(get_embeddings(faces, embedder), 0.6)
+    else:
+        rows = rng.integers(0, len(gallery), size=(64, args.faces_per_frame))
+        queries = [normalize(gallery.matrix[np.sort(r)] + 0.05 * rng.normal(size=(len(r), gallery.dim)))
+                   for r in rows]
+
+        def work(i):
+            gallery.match(queries[i % len(queries)], 0.6)
+
+    work(0)
+    ready.put(os.getpid())
+    start.wait()
+    frames_done, began = 0, time.perf_counter()
+    deadline = began + args.duration
+    while time.perf_counter() < deadline:
+        work(frames_done)
+        frames_done += 1
+    elapsed = time.perf_counter() - began
+    gallery.refresh()
+    results.put({'frames': frames_done, 'seconds': elapsed, 'version': gallery.version,
+                 'sees_probe': PROBE_REG_NO in gallery})
+
+
+def run_local(args):
+    for name in THREAD_ENV:
+        os.environ[name] = "1"
+    from benchmark_ann import synthetic_embeddings
+    from compact_store import create_gallery
+    from shared_gallery import SharedGallery, store_lock, publish_version
+
+    root = tempfile.mkdtemp(prefix="shared_gallery_")
+    try:
+        vectors = synthetic_embeddings(args.size, 128, clusters=max(1, args.size // 500), seed=args.seed)
+        base = create_gallery(args.dtype, capacity=args.size)
+        for i, vec in enumerate(vectors):
+            base.add(f"S{i:07d}", vec)
+        del vectors
+        print(f"[INFO] Shared gallery: {args.size} x 128 {args.dtype}, "
+              f"{'detect + embed + match' if args.with_models else f'{args.faces_per_frame} faces/frame matching'}, "
+              f"{args.duration:.0f}s per run")
+        print(f"{'workers':>8} {'frames/s':>10} {'speedup':>8} {'efficiency':>10}   registration seen")
+
+        context = multiprocessing.get_context("spawn")
+        baseline = None
+        for count in args.workers:
+            # Fresh version per run, without the previous run's probe registration
+            with store_lock(root):
+                publish_version(base, root)
+            ready, results, start = context.Queue(), context.Queue(), context.Event()
+            processes = [context.Process(target=_local_worker, args=(root, args, ready, start, results))
+                         for _ in range(count)]
+            for process in processes:
+                process.start()
+            for _ in processes:
+                ready.get()
+            start.set()
+            # A registration in the middle of the run, as another worker would publish it
+            time.sleep(args.duration / 2)
+            SharedGallery(root).add(PROBE_REG_NO, np.ones(128, dtype=np.float32))
+            stats = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+            throughput = sum(s['frames'] / s['seconds'] for s in stats)
+            baseline = baseline or throughput / count
+            speedup = throughput / baseline
+            seen = sum(s['sees_probe'] for s in stats)
+            print(f"{count:>8} {throughput:>10.1f} {speedup:>7.2f}x {speedup / count:>10.0%}   {seen}/{count} workers")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+def run_socket(args):
+    try:
+        import socketio
+    except ImportError:
+        print("[ERROR] The socket load test needs python-socketio[client]: pip install \"python-socketio[client]\"")
+        return 1
+    import cv2
+    from benchmark import dataset_frames
+    from main import DATASET_PATH
+
+    frames = [cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+              for frame in dataset_frames(DATASET_PATH, 20)]
+    if not frames:
+        print(f"[ERROR] No images found in {DATASET_PATH}")
+        return 1
+
+    latencies = {url: [] for url in args.urls}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def client(index):
+        url = args.urls[index % len(args.urls)]
+        sio = socketio.Client(ssl_verify=False)
+        replies = queue.Queue()
+        for event in ('recognition_success', 'recognition_result', 'recognition_error', 'frame_dropped'):
+            sio.on(event, lambda data, event=event: replies.put(event))
+        sio.connect(url, transports=['websocket'])
+        i = 0
+        try:
+            while not stop.is_set():
+                sent = time.perf_counter()
+                sio.emit('recognize_face', {'image': frames[(index + i) % len(frames)]})
+                i += 1
+                try:
+                    event = replies.get(timeout=30)
+                except queue.Empty:
+                    continue
+                if event in ('recognition_success', 'recognition_result') and not stop.is_set():
+                    with lock:
+                        latencies[url].append(time.perf_counter() - sent)
+        finally:
+            sio.disconnect()
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=35)
+
+    total = 0
+    for url, times in latencies.items():
+        total += len(times)
+        if times:
+            ms = np.asarray(times) * 1000
+            print(f"{url:<32} {len(times) / args.duration:8.1f} replies/s  "
+                  f"p50 {np.percentile(ms, 50):7.1f}ms  p95 {np.percentile(ms, 95):7.1f}ms")
+        else:
+            print(f"{url:<32} no replies")
+    print(f"[INFO] {args.clients} clients, {len(args.urls)} URL(s): {total / args.duration:.1f} replies/s in total")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure throughput scaling with the number of server workers.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    local = commands.add_parser("local", help="Worker processes sharing one gallery on this host")
+    local.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    local.add_argument("--size", type=int, default=200000, help="Synthetic gallery size")
+    local.add_argument("--dtype", default="float32", help="Stored embedding precision")
+    local.add_argument("--faces-per-frame", type=int, default=4)
+    local.add_argument("--duration", type=float, default=10.0, help="Seconds per worker count")
+    local.add_argument("--with-models", action="store_true", help="Run detection and FaceNet on dataset images")
+    local.add_argument("--seed", type=int, default=0)
+    local.set_defaults(func=run_local)
+
+    sock = commands.add_parser("socket", help="Socket.IO clients against running servers")
+    sock.add_argument("--urls", nargs="+", default=["https://127.0.0.1:5000"])
+    sock.add_argument("--clients", type=int, default=8)
+    sock.add_argument("--duration", type=float, default=30.0)
+    sock.set_defaults(func=run_socket)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
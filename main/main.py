@@ -4,34 +4,50 @@
 # Recognition: FaceNet (TensorFlow)
 # Attendance: SQLite
 # ===============================
-import cv2
 import os
-from keras_facenet import FaceNet
-from database_utils import init_database
+from models import MODELS_PATH, ModelRegistry, load_detector as _load_detector
+from database_utils import init_database, close_connections, set_durability
+from embedding_cache import EmbeddingCache
+from ann_index import create_index
 from registration import load_dataset, register_new_student
 from real_time import run_realtime_attendance
+from multi_camera import run_multi_camera_attendance, parse_sources
 
 
 # --- Path Configuration ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # 'main' folder
 PROJECT_ROOT = os.path.dirname(BASE_DIR)               # go up to project root
-MODELS_PATH = os.path.join(PROJECT_ROOT, "models")
 DATASET_PATH = os.path.join(PROJECT_ROOT, "dataset")
 
+# Matching backend: "exact" (brute force), "ivf" (approximate, for very large galleries)
+# or "multi" (centroid + per-student exemplars, better recall across pose/lighting)
+INDEX_BACKEND = "exact"
+
+# Attendance persistence: "async" (background write-behind queue) or "sync" (commit per record)
+ATTENDANCE_DURABILITY = "async"
+
+# Embedder backend: "keras" (keras_facenet/TensorFlow) or "onnx" (exported FaceNet on OpenCV DNN)
+EMBEDDER_BACKEND = os.environ.get("EMBEDDER_BACKEND", "keras")
 
 
 
-def load_models():
-    """Loads the face detection and recognition models."""
-    proto_path = os.path.join(MODELS_PATH, "deploy.prototxt")
-    model_path = os.path.join(MODELS_PATH, "res10_300x300_ssd_iter_140000.caffemodel")
 
-    if not (os.path.exists(proto_path) and os.path.exists(model_path)):
+def load_detector():
+    """Loads a fresh instance of the face detection model (cv2.dnn nets are not shared across threads)."""
+    try:
+        return _load_detector(MODELS_PATH)
+    except FileNotFoundError:
         print("[ERROR] Detection model files not found. Please place them in the 'models' directory.")
         exit()
 
-    net = cv2.dnn.readNetFromCaffe(proto_path, model_path)
-    embedder = FaceNet()
+
+def load_models():
+    """Loads and warms up the face detection and recognition models, logging each startup phase."""
+    try:
+        net, embedder = ModelRegistry(EMBEDDER_BACKEND).load()
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}")
+        exit()
     print("[INFO] Models loaded successfully.")
     return net, embedder
 
@@ -43,10 +59,12 @@ def main():
 
     # 2. Initialize database
     conn = init_database()
+    set_durability(ATTENDANCE_DURABILITY)
 
     # 3. Load dataset and register known faces
-    # The key is the registration number, and the value is the embedding
-    database = load_dataset(DATASET_PATH, net, embedder, conn)
+    # The gallery maps each registration number to a normalised embedding
+    cache = EmbeddingCache()
+    database = load_dataset(DATASET_PATH, net, embedder, conn, cache, create_index(INDEX_BACKEND))
 
     if not database:
         print("[WARN] Database is empty. No known faces to recognize. Please populate the 'dataset' folder.")
@@ -58,7 +76,8 @@ def main():
         print("\n=== FACE RECOGNITION ATTENDANCE SYSTEM ===")
         print("1. Register New Student")
         print("2. Start Attendance System")
-        print("3. Exit")
+        print("3. Start Multi-Camera Attendance")
+        print("4. Exit")
         choice = input("Enter your choice: ").strip()
 
         if choice == "1":
@@ -67,14 +86,18 @@ def main():
         elif choice == "2":
             run_realtime_attendance(net, embedder, database, conn)
         elif choice == "3":
+            sources = parse_sources(input("Enter camera indices, video files or stream URLs (comma separated): "))
+            run_multi_camera_attendance(sources, load_detector, embedder, database)
+        elif choice == "4":
             break
         else:
             print("[ERROR] Invalid choice. Please try again.")
 
         # 4. Start the real-time attendance system
         run_realtime_attendance(net, embedder, database, conn)
-    # 5. Close database connection
-    conn.close()
+    # 5. Close database connections
+    close_connections()
+    cache.close()
     print("[INFO] Application finished.")
 
 
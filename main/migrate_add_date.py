@@ -0,0 +1,20 @@
+import sqlite3
+import os
+from database_utils import migrate_attendance_schema
+
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'attendance.db')
+
+if not os.path.exists(DB_PATH):
+    print(f"[ERROR] Database not found at {DB_PATH}")
+    exit(1)
+
+conn = sqlite3.connect(DB_PATH)
+
+# Adds the indexed date column and the UNIQUE(student_reg_no, date) constraint
+try:
+    migrate_attendance_schema(conn)
+    print('[INFO] attendance table is up to date.')
+except sqlite3.OperationalError as e:
+    print(f'[ERROR] Could not migrate attendance table: {e}')
+
+conn.close()
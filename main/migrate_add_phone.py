@@ -1,5 +1,6 @@
 import sqlite3
 import os
+from database_utils import notify_students_changed
 
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'attendance.db')
 
@@ -21,6 +22,8 @@ else:
     try:
         cur.execute("ALTER TABLE students ADD COLUMN phone_number TEXT DEFAULT ''")
         conn.commit()
+        # Tell running servers to reload their in-memory student cache
+        notify_students_changed()
         print('[INFO] Added phone_number column to students table.')
     except sqlite3.OperationalError as e:
         print(f'[ERROR] Could not add column: {e}')
@@ -0,0 +1,285 @@
+"""
+Model registry: loads the face detector and the FaceNet embedder on first use
+or in the background, warms them up, and logs how long each startup phase took.
+
+The embedder backend is pluggable:
+    "keras" - keras_facenet.FaceNet (TensorFlow)
+    "onnx"  - an exported ONNX copy of the same network run through OpenCV DNN,
+              for CPU-only hosts without TensorFlow
+
+Export the ONNX model once on a machine that has TensorFlow and tf2onnx:
+    python models.py --export-onnx
+"""
+import argparse
+import os
+import threading
+import time
+import cv2
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_PATH = os.path.join(os.path.dirname(BASE_DIR), "models")
+DETECTOR_PROTO = "deploy.prototxt"
+DETECTOR_WEIGHTS = "res10_300x300_ssd_iter_140000.caffemodel"
+FACENET_ONNX = "facenet.onnx"
+
+# Faces pushed through the embedder (and frames through the detector) during warm-up
+DEFAULT_WARMUP_BATCH = 4
+
+
+def load_detector(models_path=MODELS_PATH):
+    """Loads a fresh instance of the Caffe SSD face detector."""
+    proto_path = os.path.join(models_path, DETECTOR_PROTO)
+    model_path = os.path.join(models_path, DETECTOR_WEIGHTS)
+    if not (os.path.exists(proto_path) and os.path.exists(model_path)):
+        raise FileNotFoundError(f"Detection model files not found in {models_path}")
+    return cv2.dnn.readNetFromCaffe(proto_path, model_path)
+
+
+def standardize(images):
+    """Per-image whitening, matching the preprocessing keras_facenet applies before its model."""
+    images = np.asarray(images, dtype=np.float32)
+    mean = images.mean(axis=(1, 2, 3), keepdims=True)
+    std = images.std(axis=(1, 2, 3), keepdims=True)
+    return (images - mean) / np.maximum(std, 1.0 / np.sqrt(images[0].size))
+
+
+class KerasEmbedder:
+    """keras_facenet.FaceNet; TensorFlow is only imported when the model is built."""
+
+    name = "keras"
+
+    def __init__(self, models_path=MODELS_PATH):
+        from keras_facenet import FaceNet
+        self._model = FaceNet()
+
+    def embeddings(self, images):
+        return self._model.embeddings(images)
+
+
+class OnnxEmbedder:
+    """FaceNet exported to ONNX and executed with OpenCV DNN (NHWC 160x160 RGB input)."""
+
+    name = "onnx"
+
+    def __init__(self, models_path=MODELS_PATH):
+        path = os.path.join(models_path, FACENET_ONNX)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"ONNX FaceNet not found at {path}; run 'python models.py --export-onnx'")
+        self._net = cv2.dnn.readNetFromONNX(path)
+
+    def embeddings(self, images):
+        self._net.setInput(standardize(images))
+        out = self._net.forward().reshape(len(images), -1)
+        return out / np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+
+
+EMBEDDER_BACKENDS = {
+    "keras": KerasEmbedder,
+    "onnx": OnnxEmbedder,
+}
+
+
+class _LazyDetector:
+    """
+    Stands in for the detector net and loads it on first attribute access.
+
+    cv2.dnn nets are not thread-safe and the stand-in is shared (e.g. by the
+    background warm-up and load_dataset at startup), so setInput() only records
+    the input for the calling thread and forward() runs the setInput + forward
+    pair under the registry's detector_lock.
+    """
+
+    def __init__(self, registry):
+        self._registry = registry
+        self._pending = threading.local()
+
+    def setInput(self, *args, **kwargs):
+        self._pending.input = (args, kwargs)
+
+    def forward(self, *args, **kwargs):
+        pending = self._pending.__dict__.pop("input", None)
+        with self._registry.detector_lock:
+            net = self._registry.detector
+            if pending is not None:
+                net.setInput(*pending[0], **pending[1])
+            return net.forward(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._registry.detector, name)
+
+
+class _LazyEmbedder:
+    """
+    Stands in for the embedder and loads it on the first embeddings() call.
+
+    Calls run under the registry's embedder_lock: the ONNX backend is a cv2.dnn
+    net, and the background warm-up may embed while load_dataset does.
+    """
+
+    def __init__(self, registry):
+        self._registry = registry
+
+    def embeddings(self, images):
+        with self._registry.embedder_lock:
+            return self._registry.embedder.embeddings(images)
+
+
+class ModelRegistry:
+    """
+    Owns the detector and embedder for a process.
+
+    Models are built on first access (`detector`, `embedder`), by `load()`, or on a
+    background thread with `load_in_background()`. `load()` also runs a warm-up
+    batch so graph tracing and allocation happen before the first real request;
+    `ready` is set once that has finished. Per-phase durations are kept in
+    `timings` and printed as they complete.
+    """
+
+    def __init__(self, embedder_backend="keras", models_path=MODELS_PATH, warmup_batch=DEFAULT_WARMUP_BATCH):
+        if embedder_backend not in EMBEDDER_BACKENDS:
+            raise ValueError(f"Unknown embedder backend '{embedder_backend}' "
+                             f"(expected one of {', '.join(EMBEDDER_BACKENDS)})")
+        self.embedder_backend = embedder_backend
+        self.models_path = models_path
+        self.warmup_batch = warmup_batch
+        self.timings = {}
+        self.ready = threading.Event()
+        self.error = None
+        self._detector = None
+        self._embedder = None
+        self._lock = threading.RLock()
+        # Held across each setInput + forward pair on the shared detector net, and
+        # around each call into the shared embedder
+        self.detector_lock = threading.Lock()
+        self.embedder_lock = threading.Lock()
+        self._thread = None
+
+    def _timed(self, phase, fn):
+        start = time.perf_counter()
+        result = fn()
+        self.timings[phase] = time.perf_counter() - start
+        print(f"[INFO] Startup: {phase} took {self.timings[phase]:.2f}s")
+        return result
+
+    @property
+    def detector(self):
+        with self._lock:
+            if self._detector is None:
+                self._detector = self._timed("load_detector", lambda: load_detector(self.models_path))
+            return self._detector
+
+    @property
+    def embedder(self):
+        with self._lock:
+            if self._embedder is None:
+                backend = EMBEDDER_BACKENDS[self.embedder_backend]
+                self._embedder = self._timed(f"load_embedder_{self.embedder_backend}",
+                                             lambda: backend(self.models_path))
+            return self._embedder
+
+    def new_detector(self):
+        """A separate detector instance for a worker thread (cv2.dnn nets are not thread-safe)."""
+        return load_detector(self.models_path)
+
+    def lazy_detector(self):
+        return _LazyDetector(self)
+
+    def lazy_embedder(self):
+        return _LazyEmbedder(self)
+
+    def warm_up(self):
+        """Runs one small batch through both models."""
+        if self.warmup_batch <= 0:
+            return
+        rng = np.random.default_rng(0)
+
+        def run():
+            frame = rng.integers(0, 256, size=(300, 300, 3), dtype=np.uint8)
+            blob = cv2.dnn.blobFromImages([frame] * self.warmup_batch, 1.0, (300, 300), (104.0, 177.0, 123.0))
+            with self.detector_lock:
+                self.detector.setInput(blob)
+                self.detector.forward()
+            faces = rng.integers(0, 256, size=(self.warmup_batch, 160, 160, 3), dtype=np.uint8)
+            with self.embedder_lock:
+                self.embedder.embeddings(faces)
+
+        self._timed("warm_up", run)
+
+    def load(self, warmup=True):
+        """Loads both models (and warms them up); returns (detector, embedder)."""
+        start = time.perf_counter()
+        try:
+            detector, embedder = self.detector, self.embedder
+            if warmup:
+                self.warm_up()
+        except Exception as e:
+            self.error = e
+            raise
+        finally:
+            self.timings["total"] = time.perf_counter() - start
+        print(f"[INFO] Models ready ({self.embedder_backend} embedder) in {self.timings['total']:.2f}s.")
+        self.ready.set()
+        return detector, embedder
+
+    def load_in_background(self, warmup=True):
+        """Starts load() on a daemon thread; failures are kept in `error`."""
+        def run():
+            try:
+                self.load(warmup)
+            except Exception as e:
+                print(f"[ERROR] Model loading failed: {e}")
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=run, name="model-loader", daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def wait_ready(self, timeout=None):
+        """Blocks until the background load finishes; re-raises its error if it failed."""
+        self.ready.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.ready.is_set()
+
+    def status(self):
+        return {
+            'ready': self.ready.is_set(),
+            'embedder_backend': self.embedder_backend,
+            'error': str(self.error) if self.error is not None else None,
+            'timings': {phase: round(seconds, 3) for phase, seconds in self.timings.items()},
+        }
+
+
+def export_onnx(models_path=MODELS_PATH, opset=13):
+    """Exports keras_facenet's model to models/facenet.onnx (needs TensorFlow and tf2onnx)."""
+    import tensorflow as tf
+    import tf2onnx
+    from keras_facenet import FaceNet
+
+    model = FaceNet().model
+    spec = (tf.TensorSpec((None, 160, 160, 3), tf.float32, name="input"),)
+    path = os.path.join(models_path, FACENET_ONNX)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=path)
+    print(f"[INFO] Exported FaceNet to {path}")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or time the recognition models.")
+    parser.add_argument("--export-onnx", action="store_true", help="Export keras_facenet to models/facenet.onnx")
+    parser.add_argument("--backend", default="keras", choices=sorted(EMBEDDER_BACKENDS))
+    parser.add_argument("--warmup-batch", type=int, default=DEFAULT_WARMUP_BATCH)
+    args = parser.parse_args()
+
+    if args.export_onnx:
+        export_onnx()
+        return
+    registry = ModelRegistry(args.backend, warmup_batch=args.warmup_batch)
+    registry.load()
+    print(registry.status())
+
+
+if __name__ == "__main__":
+    main()
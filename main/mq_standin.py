@@ -0,0 +1,168 @@
+"""
+Minimal Redis stand-in for testing multi-worker deployments without Redis.
+
+Speaks just enough of the Redis protocol (RESP2) for Socket.IO's Redis message
+queue: PUBLISH, SUBSCRIBE/UNSUBSCRIBE, PING, ECHO, SELECT and CLIENT. Messages
+are only relayed between connected clients, never stored. Use real Redis in
+production.
+
+Usage:
+    python mq_standin.py --port 6379
+    SOCKETIO_MESSAGE_QUEUE=redis://127.0.0.1:6379/0 python server.py
+"""
+import argparse
+import socketserver
+import threading
+
+
+def encode(value):
+    """RESP2 encoding of str (bulk string), bytes, int, None, list or an Exception (error reply)."""
+    if isinstance(value, Exception):
+        return f"-ERR {value}\r\n".encode("utf-8")
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return f":{value}\r\n".encode("ascii")
+    if isinstance(value, list):
+        return f"*{len(value)}\r\n".encode("ascii") + b"".join(encode(v) for v in value)
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class Broker:
+    """Channel subscriptions across all client connections."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def subscribe(self, channel, client):
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(client)
+
+    def unsubscribe(self, channel, client):
+        with self._lock:
+            subscribers = self._channels.get(channel)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self._channels[channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for client in subscribers:
+            client.send([b"message", channel, message])
+        return len(subscribers)
+
+
+class ClientHandler(socketserver.StreamRequestHandler):
+    """One client connection: reads RESP command arrays and replies in order."""
+
+    def setup(self):
+        super().setup()
+        self._send_lock = threading.Lock()
+        self.channels = set()
+
+    def send(self, reply, status=None):
+        """Writes a reply (or a +status simple string); publishers write from other threads."""
+        data = f"+{status}\r\n".encode("ascii") if status else encode(reply)
+        with self._send_lock:
+            try:
+                self.wfile.write(data)
+                self.wfile.flush()
+            except OSError:
+                pass
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # inline command, e.g. from telnet
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        broker = self.server.broker
+        try:
+            while True:
+                args = self.read_command()
+                if args is None:
+                    return
+                if not args:
+                    continue
+                command = args[0].upper()
+                if command in (b"SUBSCRIBE", b"UNSUBSCRIBE"):
+                    channels = args[1:] if args[1:] or command == b"SUBSCRIBE" else list(self.channels)
+                    for channel in channels:
+                        if command == b"SUBSCRIBE":
+                            self.channels.add(channel)
+                            broker.subscribe(channel, self)
+                        else:
+                            self.channels.discard(channel)
+                            broker.unsubscribe(channel, self)
+                        self.send([command.lower(), channel, len(self.channels)])
+                elif command == b"PUBLISH" and len(args) == 3:
+                    self.send(broker.publish(args[1], args[2]))
+                elif command == b"PING":
+                    if self.channels:
+                        self.send([b"pong", args[1] if len(args) > 1 else b""])
+                    elif len(args) > 1:
+                        self.send(args[1])
+                    else:
+                        self.send(None, status="PONG")
+                elif command == b"ECHO" and len(args) == 2:
+                    self.send(args[1])
+                elif command in (b"SELECT", b"CLIENT"):
+                    self.send(None, status="OK")
+                elif command == b"QUIT":
+                    self.send(None, status="OK")
+                    return
+                else:
+                    self.send(ValueError(f"unknown command '{args[0].decode('utf-8', 'replace')}'"))
+        except (OSError, ValueError):
+            pass
+        finally:
+            for channel in self.channels:
+                broker.unsubscribe(channel, self)
+
+
+class StandinServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, ClientHandler)
+        self.broker = Broker()
+
+
+def serve_in_background(host="127.0.0.1", port=6379):
+    """Starts a stand-in on a daemon thread; returns the server (its port is server.server_address[1])."""
+    server = StandinServer((host, port))
+    threading.Thread(target=server.serve_forever, name="mq-standin", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minimal Redis pub/sub stand-in for local multi-worker testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    server = StandinServer((args.host, args.port))
+    print(f"[INFO] Message queue stand-in listening on redis://{args.host}:{args.port}/0")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
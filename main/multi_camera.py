@@ -0,0 +1,284 @@
+"""
+Multi-camera attendance: several sources (webcam indices, video files or
+RTSP/HTTP stream URLs) share one pool of detection/embedding workers.
+
+Usage:
+    python multi_camera.py 0 1 rtsp://10.0.0.5/stream lecture.mp4 --workers 2
+"""
+import argparse
+import threading
+import time
+import cv2
+from tracking import TrackedRecognizer
+from database_utils import mark_attendance, get_connection
+from pipeline import DropOldestQueue, RateMeter
+
+# Frames buffered per camera before the oldest are dropped
+SOURCE_QUEUE_SIZE = 2
+
+
+def parse_source(token):
+    """A single source: a bare integer is a device index, anything else a file path or URL."""
+    token = token.strip()
+    return int(token) if token.isdigit() else token
+
+
+def parse_sources(text):
+    """Parses a comma separated list of sources (paths may contain spaces)."""
+    return [parse_source(token) for token in text.split(",") if token.strip()]
+
+
+class LockedEmbedder:
+    """Serialises calls into a shared FaceNet model used by several worker threads."""
+
+    def __init__(self, embedder):
+        self._embedder = embedder
+        self._lock = threading.Lock()
+
+    def embeddings(self, images):
+        with self._lock:
+            return self._embedder.embeddings(images)
+
+
+class CameraSource:
+    """
+    One input stream read on its own thread into a bounded drop-oldest queue.
+    Each camera keeps its own tracker, since tracks only make sense within one view.
+    """
+
+    def __init__(self, name, source, recognizer, on_frame, pace_files=True):
+        self.name = name
+        self.source = source
+        self.recognizer = recognizer
+        self.frames = DropOldestQueue(SOURCE_QUEUE_SIZE)
+        self.capture_rate = RateMeter()
+        self.process_rate = RateMeter()
+        self.busy = False
+        self.finished = False
+        self.latest = None
+        self._on_frame = on_frame
+        self._pace_files = pace_files
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"camera-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+
+    @property
+    def backlog(self):
+        return len(self.frames)
+
+    def _run(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            print(f"[ERROR] Could not open source {self.name}: {self.source}")
+            self.finished = True
+            self._on_frame()
+            return
+
+        # Video files are read at their native frame rate so they behave like live cameras
+        is_file = isinstance(self.source, str) and "://" not in self.source
+        fps = cap.get(cv2.CAP_PROP_FPS) if is_file and self._pace_files else 0
+        interval = 1.0 / fps if fps and fps > 0 else 0.0
+        next_at = time.perf_counter()
+
+        while not self._stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                print(f"[INFO] Source {self.name} ended.")
+                break
+            self.capture_rate.tick()
+            self.frames.put(frame)
+            self._on_frame()
+            if interval:
+                next_at += interval
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        cap.release()
+        self.finished = True
+        self._on_frame()
+
+
+class FairScheduler:
+    """
+    Hands frames from all cameras to the shared workers in round-robin order.
+    A camera is given to at most one worker at a time, so its tracker sees frames
+    in order and a busy camera cannot starve the others.
+    """
+
+    def __init__(self, sources):
+        self.sources = sources
+        self._cond = threading.Condition()
+        self._cursor = 0
+        self._stopped = False
+
+    def notify(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def all_finished(self):
+        return all(s.finished and not s.backlog for s in self.sources)
+
+    def acquire(self):
+        """Blocks until some idle camera has a frame; returns (source, frame) or None when stopping."""
+        with self._cond:
+            while not self._stopped:
+                n = len(self.sources)
+                for offset in range(n):
+                    source = self.sources[(self._cursor + offset) % n]
+                    if source.busy or not source.backlog:
+                        continue
+                    frame = source.frames.get(timeout=0)
+                    if frame is None:
+                        continue
+                    source.busy = True
+                    self._cursor = (self._cursor + offset + 1) % n
+                    return source, frame
+                if self.all_finished():
+                    return None
+                self._cond.wait(0.1)
+            return None
+
+    def release(self, source):
+        with self._cond:
+            source.busy = False
+            self._cond.notify_all()
+
+
+def _worker_loop(scheduler, net):
+    """Shared worker: owns one detection net and processes frames from any camera."""
+    while True:
+        job = scheduler.acquire()
+        if job is None:
+            return
+        source, frame = job
+        try:
+            faces = source.recognizer.recognize(frame, net)
+            # Attendance is deduplicated across cameras by the shared in-memory daily set
+            for reg_no in source.recognizer.recognized(faces):
+                if mark_attendance(get_connection(), reg_no):
+                    print(f"[INFO] {reg_no} seen on camera {source.name}")
+            source.latest = (frame, faces)
+            source.process_rate.tick()
+        except Exception as e:
+            print(f"[ERROR] Camera {source.name}: {e}")
+        finally:
+            scheduler.release(source)
+
+
+def camera_stats(sources):
+    """Per-camera capture FPS, processed FPS, backlog and dropped frames."""
+    return {
+        s.name: {
+            'capture_fps': round(s.capture_rate.rate(), 1),
+            'processed_fps': round(s.process_rate.rate(), 1),
+            'backlog': s.backlog,
+            'dropped': s.frames.dropped,
+            'finished': s.finished,
+        }
+        for s in sources
+    }
+
+
+def run_multi_camera_attendance(sources, net_factory, embedder, database, workers=2, show=True,
+                                stats_interval=5.0, pace_files=True):
+    """
+    Runs attendance over several sources at once.
+
+    Args:
+        sources (list): Device indices, video file paths or stream URLs.
+        net_factory (callable): Returns a new face detection net; one is loaded per worker.
+        embedder: FaceNet model, shared by all workers.
+        database: Gallery (or other index) of known faces.
+        workers (int): Size of the shared detection/embedding worker pool.
+        show (bool): Show an annotated window per camera (press 'q' to quit).
+        stats_interval (float): Seconds between per-camera stats printouts.
+        pace_files (bool): Read video files at their native frame rate.
+    """
+    shared_embedder = LockedEmbedder(embedder)
+    cameras = []
+    scheduler = FairScheduler(cameras)
+    for i, source in enumerate(sources):
+        recognizer = TrackedRecognizer(None, shared_embedder, database)
+        cameras.append(CameraSource(f"cam{i}", source, recognizer, scheduler.notify, pace_files))
+
+    pool = [threading.Thread(target=_worker_loop, args=(scheduler, net_factory()), name=f"worker-{i}", daemon=True)
+            for i in range(max(1, workers))]
+    for thread in pool:
+        thread.start()
+    for camera in cameras:
+        camera.start()
+    print(f"[INFO] Multi-camera attendance on {len(cameras)} sources with {len(pool)} workers. Press 'q' to quit.")
+
+    next_report = time.monotonic() + stats_interval
+    try:
+        while not scheduler.all_finished():
+            if show:
+                for camera in cameras:
+                    if camera.latest is not None:
+                        frame, faces = camera.latest
+                        camera.latest = None
+                        cv2.imshow(f"Attendance - {camera.name}", camera.recognizer.annotate(frame, faces))
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+            else:
+                time.sleep(0.05)
+            if time.monotonic() >= next_report:
+                next_report += stats_interval
+                for name, stats in camera_stats(cameras).items():
+                    print(f"[STATS] {name}: {stats}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for camera in cameras:
+            camera.stop()
+        scheduler.stop()
+        for thread in pool:
+            thread.join(timeout=2.0)
+        if show:
+            cv2.destroyAllWindows()
+
+    for name, stats in camera_stats(cameras).items():
+        print(f"[STATS] {name}: {stats}")
+    return camera_stats(cameras)
+
+
+def main():
+    from main import DATASET_PATH, INDEX_BACKEND, load_detector, load_models
+    from database_utils import init_database, close_connections, set_durability
+    from embedding_cache import EmbeddingCache
+    from ann_index import create_index
+    from registration import load_dataset
+
+    parser = argparse.ArgumentParser(description="Run attendance on several cameras or video files at once.")
+    parser.add_argument("sources", nargs="+", help="Device indices, video files or RTSP/HTTP URLs")
+    parser.add_argument("--workers", type=int, default=2, help="Shared detection/embedding workers")
+    parser.add_argument("--no-display", action="store_true", help="Do not open preview windows")
+    parser.add_argument("--stats-interval", type=float, default=5.0)
+    args = parser.parse_args()
+
+    net, embedder = load_models()
+    conn = init_database()
+    set_durability("async")
+    cache = EmbeddingCache()
+    database = load_dataset(DATASET_PATH, net, embedder, conn, cache, create_index(INDEX_BACKEND))
+    cache.close()
+
+    sources = [parse_source(source) for source in args.sources]
+    run_multi_camera_attendance(sources, load_detector, embedder, database,
+                                workers=args.workers, show=not args.no_display, stats_interval=args.stats_interval)
+    close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import time
+import numpy as np
+from gallery import Gallery, distance_to_cosine, normalize
+
+# Exemplar embeddings kept per student
+DEFAULT_TEMPLATES = 5
+# Students whose exemplars are re-scored after the coarse centroid pass
+DEFAULT_RERANK = 10
+# Live recognitions are learned as exemplars only when they are far closer than the server's
+# acceptance distance (0.45 vs 0.6, cosine 0.90 vs 0.82): a student's score is the best over
+# their exemplars, so learning a borderline impostor would widen acceptance for good
+LEARN_MAX_DISTANCE = 0.45
+LEARN_MIN_SCORE = distance_to_cosine(LEARN_MAX_DISTANCE)
+# ... and differ from every existing exemplar (cosine below this) to be worth keeping
+LEARN_MAX_SIMILARITY = 0.95
+# Minimum seconds between two learned exemplars for the same student
+LEARN_INTERVAL_SECONDS = 60.0
+
+
+class MultiTemplateGallery(Gallery):
+    """
+    Gallery holding a centroid plus up to `templates` exemplar embeddings per student.
+
+    Centroids (the normalised mean of the exemplars) live in the usual Gallery
+    matrix and are scored first; the exemplars of the `rerank` best students
+    per query are then scored in one batched einsum, and a student's final
+    score is the best of its centroid and exemplar similarities. Exemplars sit
+    in a (capacity, templates, dim) buffer that moves with the centroid rows,
+    so memory is bounded by students x templates.
+
+    `observe()` lets live recognitions add exemplars: only confident matches
+    that look different from what is already stored are learned, at most one
+    per student per `learn_interval` seconds. When a student is full, the most
+    redundant exemplar is dropped.
+    """
+
+    def __init__(self, dim=128, capacity=64, templates=DEFAULT_TEMPLATES, rerank=DEFAULT_RERANK,
+                 learn_min_score=LEARN_MIN_SCORE, learn_max_similarity=LEARN_MAX_SIMILARITY,
+                 learn_interval=LEARN_INTERVAL_SECONDS):
+        super().__init__(dim=dim, capacity=capacity)
+        self.templates = max(1, templates)
+        self.rerank = max(1, rerank)
+        self.learn_min_score = learn_min_score
+        self.learn_max_similarity = learn_max_similarity
+        self.learn_interval = learn_interval
+        self._exemplars = np.zeros((len(self._matrix), self.templates, dim), dtype=np.float32)
+        self._counts = np.zeros(len(self._matrix), dtype=np.int32)
+        self._last_learned = {}
+        self.learned = 0
+
+    def add(self, reg_no, embedding):
+        """Adds a student with a single template."""
+        self.add_templates(reg_no, [embedding])
+
+    def add_templates(self, reg_no, embeddings):
+        """
+        Adds (or replaces) a student from several embeddings, e.g. one per enrollment image.
+        If there are more than `templates`, the most mutually different ones are kept.
+        """
+        vectors = normalize(np.reshape(embeddings, (-1, self.dim)))
+        if not len(vectors):
+            return
+        centroid = normalize(vectors.mean(axis=0))
+        keep = self._diverse(vectors, self.templates)
+        with self._lock:
+            super().add(reg_no, centroid)
+            row = self._rows[reg_no]
+            self._exemplars[row, :len(keep)] = keep
+            self._counts[row] = len(keep)
+
+    def exemplars(self, reg_no):
+        """Returns the (n, dim) exemplars stored for a student, or None."""
+        row = self._rows.get(reg_no)
+        return None if row is None else self._exemplars[row, :self._counts[row]].copy()
+
+    @staticmethod
+    def _diverse(vectors, k):
+        """Greedy farthest-point selection of k rows, starting from the one nearest the mean."""
+        if len(vectors) <= k:
+            return vectors
+        similarity = vectors @ vectors.T
+        chosen = [int(np.argmax(similarity.sum(axis=1)))]
+        closest = similarity[chosen[0]].copy()
+        for _ in range(k - 1):
+            candidate = int(np.argmin(closest))
+            chosen.append(candidate)
+            closest = np.maximum(closest, similarity[candidate])
+        return vectors[chosen]
+
+    def add_exemplar(self, reg_no, embedding):
+        """
+        Adds one exemplar to an existing student, dropping the most redundant one when
+        the student is at the cap. Returns False if the student is unknown.
+        """
+        vec = normalize(np.reshape(embedding, (self.dim,)))
+        with self._lock:
+            row = self._rows.get(reg_no)
+            if row is None:
+                return False
+            self._ensure_writable()
+            count = self._counts[row]
+            if count < self.templates:
+                self._exemplars[row, count] = vec
+                self._counts[row] = count + 1
+            else:
+                pool = np.vstack([self._exemplars[row], vec[None, :]])
+                similarity = pool @ pool.T
+                np.fill_diagonal(similarity, -np.inf)
+                drop = int(np.argmax(similarity.max(axis=1)))
+                self._exemplars[row] = np.delete(pool, drop, axis=0)
+            self._matrix[row] = normalize(self._exemplars[row, :self._counts[row]].mean(axis=0))
+            return True
+
+    def observe(self, embeddings, results, now=None):
+        """
+        Learns exemplars from live recognitions.
+
+        Args:
+            embeddings (numpy.ndarray): The (N, dim) query embeddings that were matched.
+            results (list): (reg_no, score) per embedding, e.g. from match() or search().
+
+        Returns:
+            int: The number of exemplars added.
+        """
+        now = time.monotonic() if now is None else now
+        added = 0
+        for embedding, (reg_no, score) in zip(np.reshape(embeddings, (-1, self.dim)), results):
+            if reg_no is None or score < self.learn_min_score:
+                continue
+            if now - self._last_learned.get(reg_no, -np.inf) < self.learn_interval:
+                continue
+            existing = self.exemplars(reg_no)
+            if existing is None:
+                continue
+            if len(existing) and float(np.max(existing @ normalize(embedding))) >= self.learn_max_similarity:
+                continue
+            if self.add_exemplar(reg_no, embedding):
+                self._last_learned[reg_no] = now
+                added += 1
+        self.learned += added
+        return added
+
+    def remove(self, reg_no):
+        self._last_learned.pop(reg_no, None)
+        return super().remove(reg_no)
+
+    def _grow(self):
+        capacity = self._grown_capacity()
+        exemplars = np.zeros((capacity, self.templates, self.dim), dtype=np.float32)
+        exemplars[:self._size] = self._exemplars[:self._size]
+        counts = np.zeros(capacity, dtype=np.int32)
+        counts[:self._size] = self._counts[:self._size]
+        self._exemplars, self._counts = exemplars, counts
+        super()._grow()
+
+    def _move(self, src, dst):
+        super()._move(src, dst)
+        self._exemplars[dst] = self._exemplars[src]
+        self._counts[dst] = self._counts[src]
+
+    def search(self, embeddings, k=1):
+        """
+        Coarse centroid pass, then an exemplar re-rank of the best `rerank` students.
+
+        Returns:
+            list: For each query, a list of up to k (reg_no, cosine_similarity)
+            tuples sorted from best to worst.
+        """
+        queries = normalize(np.reshape(embeddings, (-1, self.dim)))
+        with self._lock:
+            n = self._size
+            if n == 0 or len(queries) == 0:
+                return [[] for _ in range(len(queries))]
+            coarse = queries @ self._matrix[:n].T
+            c = min(max(k, self.rerank), n)
+            if c < n:
+                top = np.argpartition(-coarse, c - 1, axis=1)[:, :c]
+            else:
+                top = np.broadcast_to(np.arange(n), (len(queries), n))
+            exemplars = self._exemplars[top]
+            counts = self._counts[top]
+            reg_nos = self._reg_nos[:n].copy()
+
+        # (Q, C, T) similarities; empty template slots never win
+        fine = np.einsum("qd,qctd->qct", queries, exemplars)
+        fine[np.arange(self.templates)[None, None, :] >= counts[:, :, None]] = -np.inf
+        scores = np.maximum(np.take_along_axis(coarse, top, axis=1), fine.max(axis=2))
+
+        k = min(k, c)
+        order = np.argsort(-scores, axis=1)[:, :k]
+        best = np.take_along_axis(top, order, axis=1)
+        best_scores = np.take_along_axis(scores, order, axis=1)
+        return [list(zip(reg_nos[idx].tolist(), s.tolist())) for idx, s in zip(best, best_scores)]
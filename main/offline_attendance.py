@@ -0,0 +1,267 @@
+"""
+Offline attendance from a recorded class video or a folder of photos.
+
+Frames are streamed through a generator pipeline (decode -> sample -> batched
+detection -> batched embedding -> gallery match) so memory stays bounded no
+matter how long the video is. Decoding runs on background threads in parallel
+with inference. Attendance is written in one bulk transaction at the end,
+followed by a per-student summary and a throughput report.
+
+Usage:
+    python offline_attendance.py lecture.mp4 --every-seconds 1
+    python offline_attendance.py photos/ --decode-workers 4 --date 2025-10-20
+"""
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import cv2
+from faceDetection import detect_faces_batch, extract_face
+from faceEmbedding import get_embeddings
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# Frames held between the decoder threads and inference
+DECODE_QUEUE_SIZE = 32
+# Default sightings needed to count a student present: a video sees a student in many
+# frames, so one could be a false match; a single class photo is all there is
+VIDEO_MIN_HITS = 2
+PHOTO_MIN_HITS = 1
+
+
+def iter_video_frames(path, every_n=1, every_seconds=None):
+    """
+    Yields (position_seconds, frame) for sampled frames of a video.
+    Skipped frames are only grabbed, not decoded.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        print(f"[ERROR] Could not open video {path}")
+        return
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    if every_seconds and fps > 0:
+        every_n = max(1, int(round(every_seconds * fps)))
+    index = 0
+    try:
+        while True:
+            if index % every_n == 0:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield (index / fps if fps > 0 else float(index)), frame
+            elif not cap.grab():
+                break
+            index += 1
+    finally:
+        cap.release()
+
+
+def iter_image_frames(folder, every_n=1, workers=4, prefetch=8):
+    """
+    Yields (file_name, frame) for the images in a folder, decoded by a thread pool
+    with a bounded number of images in flight.
+    """
+    names = sorted(f for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS))[::max(1, every_n)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for name in names:
+            in_flight.append((name, pool.submit(cv2.imread, os.path.join(folder, name))))
+            if len(in_flight) >= prefetch:
+                done_name, future = in_flight.popleft()
+                frame = future.result()
+                if frame is not None:
+                    yield done_name, frame
+        while in_flight:
+            done_name, future = in_flight.popleft()
+            frame = future.result()
+            if frame is not None:
+                yield done_name, frame
+
+
+def iter_source_frames(path, every_n=1, every_seconds=None, decode_workers=4):
+    """Yields (position, frame) from a video file or an image folder."""
+    if os.path.isdir(path):
+        return iter_image_frames(path, every_n, decode_workers)
+    return iter_video_frames(path, every_n, every_seconds)
+
+
+def background(iterable, maxsize=DECODE_QUEUE_SIZE):
+    """
+    Runs a generator on a background thread, handing items over through a bounded queue.
+    An exception in the generator is re-raised in the consumer, so a failed decode never
+    looks like the end of the input.
+    """
+    items = queue.Queue(maxsize=maxsize)
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                items.put((item, None))
+        except BaseException as e:
+            items.put((done, e))
+        else:
+            items.put((done, None))
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        item, error = items.get()
+        if item is done:
+            if error is not None:
+                raise error
+            return
+        yield item
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class AttendanceTally:
+    """Accumulates per-student sightings across the processed frames."""
+
+    def __init__(self):
+        self.students = {}
+
+    def add(self, reg_no, score, source, position):
+        entry = self.students.get(reg_no)
+        if entry is None:
+            entry = self.students[reg_no] = {'hits': 0, 'photo_hits': 0, 'best_score': score,
+                                             'first_seen': (source, position)}
+        entry['hits'] += 1
+        # Video positions are timestamps in seconds, photo positions are file names
+        if not isinstance(position, float):
+            entry['photo_hits'] += 1
+        entry['best_score'] = max(entry['best_score'], score)
+        entry['last_seen'] = (source, position)
+
+    @staticmethod
+    def is_present(entry, min_hits=None):
+        """
+        With min_hits, counts every sighting alike. Otherwise a student needs
+        PHOTO_MIN_HITS sightings in photos or VIDEO_MIN_HITS sightings in all.
+        """
+        if min_hits is not None:
+            return entry['hits'] >= min_hits
+        return entry['photo_hits'] >= PHOTO_MIN_HITS or entry['hits'] >= VIDEO_MIN_HITS
+
+    def present(self, min_hits=None):
+        return [reg_no for reg_no, entry in self.students.items() if self.is_present(entry, min_hits)]
+
+
+def process_sources(paths, net, embedder, database, threshold=0.6, every_n=1, every_seconds=None,
+                    batch_size=8, decode_workers=4):
+    """
+    Streams every source through detection, embedding and matching.
+
+    Returns:
+        tuple: (AttendanceTally, stats dict with frame/face counts and timings)
+    """
+    tally = AttendanceTally()
+    stats = {'frames': 0, 'faces': 0, 'detect_seconds': 0.0, 'embed_seconds': 0.0}
+    start = time.perf_counter()
+
+    for path in paths:
+        frames = background(iter_source_frames(path, every_n, every_seconds, decode_workers))
+        for batch in batched(frames, batch_size):
+            images = [frame for _, frame in batch]
+            t0 = time.perf_counter()
+            boxes_per_frame = detect_faces_batch(images, net)
+            t1 = time.perf_counter()
+
+            faces, owners = [], []
+            for (position, frame), boxes in zip(batch, boxes_per_frame):
+                for box in boxes:
+                    faces.append(extract_face(frame, box))
+                    owners.append(position)
+            embeddings = get_embeddings(faces, embedder)
+            matches = database.match(embeddings, threshold) if faces else []
+            t2 = time.perf_counter()
+
+            for position, (reg_no, score) in zip(owners, matches):
+                if reg_no is not None:
+                    tally.add(reg_no, score, os.path.basename(path), position)
+            stats['frames'] += len(batch)
+            stats['faces'] += len(faces)
+            stats['detect_seconds'] += t1 - t0
+            stats['embed_seconds'] += t2 - t1
+
+    stats['elapsed_seconds'] = time.perf_counter() - start
+    return tally, stats
+
+
+def _format_position(position):
+    source, pos = position
+    return f"{source}@{pos:.1f}s" if isinstance(pos, float) else f"{source}/{pos}"
+
+
+def print_report(tally, stats, marked, min_hits=None):
+    from database_utils import student_cache
+
+    print("\n=== ATTENDANCE SUMMARY ===")
+    present = set(tally.present(min_hits))
+    for reg_no, entry in sorted(tally.students.items(), key=lambda item: -item[1]['hits']):
+        status = "PRESENT" if reg_no in present else f"ignored (<{min_hits or VIDEO_MIN_HITS} sightings)"
+        print(f"{student_cache.name(reg_no):<30} {reg_no:<16} hits={entry['hits']:<5} "
+              f"best={entry['best_score']:.2f}  first={_format_position(entry['first_seen'])}  "
+              f"last={_format_position(entry['last_seen'])}  {status}")
+    print(f"{len(present)} students present, {marked} new attendance records written.")
+
+    elapsed = max(stats['elapsed_seconds'], 1e-9)
+    print("\n=== THROUGHPUT ===")
+    print(f"Frames processed: {stats['frames']} ({stats['frames'] / elapsed:.1f} frames/s)")
+    print(f"Faces embedded:   {stats['faces']} ({stats['faces'] / elapsed:.1f} faces/s)")
+    print(f"Detection: {stats['detect_seconds']:.2f}s  Embedding+matching: {stats['embed_seconds']:.2f}s  "
+          f"Total: {stats['elapsed_seconds']:.2f}s")
+
+
+def main():
+    from main import DATASET_PATH, INDEX_BACKEND, load_models
+    from database_utils import init_database, close_connections, mark_attendance_bulk
+    from embedding_cache import EmbeddingCache
+    from ann_index import create_index
+    from registration import load_dataset
+
+    parser = argparse.ArgumentParser(description="Mark attendance from recorded videos or photo folders.")
+    parser.add_argument("inputs", nargs="+", help="Video files and/or folders of images")
+    parser.add_argument("--every-n", type=int, default=1, help="Process every Nth frame/image")
+    parser.add_argument("--every-seconds", type=float, default=None, help="Sample one video frame per interval")
+    parser.add_argument("--batch-size", type=int, default=8, help="Frames per detection batch")
+    parser.add_argument("--decode-workers", type=int, default=4, help="Threads decoding image folders")
+    parser.add_argument("--threshold", type=float, default=0.6, help="Cosine similarity threshold")
+    parser.add_argument("--min-hits", type=int, default=None,
+                        help=f"Sightings needed to count a student present (default: {PHOTO_MIN_HITS} in photos, "
+                             f"{VIDEO_MIN_HITS} in videos)")
+    parser.add_argument("--date", default=None, help="Class date (YYYY-MM-DD) to record; defaults to now")
+    parser.add_argument("--dry-run", action="store_true", help="Report without writing attendance")
+    args = parser.parse_args()
+
+    net, embedder = load_models()
+    conn = init_database()
+    cache = EmbeddingCache()
+    database = load_dataset(DATASET_PATH, net, embedder, conn, cache, create_index(INDEX_BACKEND))
+    cache.close()
+
+    tally, stats = process_sources(args.inputs, net, embedder, database, args.threshold, args.every_n,
+                                   args.every_seconds, args.batch_size, args.decode_workers)
+    marked = 0
+    if not args.dry_run:
+        when = datetime.strptime(args.date, "%Y-%m-%d") if args.date else None
+        marked = mark_attendance_bulk(conn, tally.present(args.min_hits), when)
+    print_report(tally, stats, marked, args.min_hits)
+    close_connections()
+
+
+if __name__ == "__main__":
+    main()
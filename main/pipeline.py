@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import deque
+
+
+class DropOldestQueue:
+    """
+    Bounded FIFO between pipeline stages. When full, put() discards the oldest
+    item instead of blocking, so a slow consumer always works on recent frames
+    and end-to-end latency stays bounded.
+    """
+
+    def __init__(self, maxsize=2):
+        self.maxsize = maxsize
+        self._items = deque()
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self._closed = False
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Returns the next item, or None on timeout or once the queue is closed and empty."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        """Wakes up any waiting consumer; further gets return None once drained."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class StageTimer:
+    """Thread-safe exponential moving average of per-stage latencies, in milliseconds."""
+
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._ms = {}
+
+    def record(self, stage, seconds):
+        ms = seconds * 1000.0
+        with self._lock:
+            prev = self._ms.get(stage)
+            self._ms[stage] = ms if prev is None else prev + self.alpha * (ms - prev)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._ms)
+
+
+class RateMeter:
+    """Counts events and reports their rate over a sliding time window."""
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self._lock = threading.Lock()
+        self._times = deque()
+        self.count = 0
+
+    def tick(self):
+        now = time.monotonic()
+        with self._lock:
+            self.count += 1
+            self._times.append(now)
+            while self._times and now - self._times[0] > self.window:
+                self._times.popleft()
+
+    def rate(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._times and now - self._times[0] > self.window:
+                self._times.popleft()
+            return len(self._times) / self.window
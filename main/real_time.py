@@ -1,41 +1,130 @@
+import threading
+import time
 import cv2
-from recognition import recognize_person
-from database_utils import mark_attendance
+from tracking import TrackedRecognizer
+from database_utils import mark_attendance, get_connection
+from pipeline import DropOldestQueue, StageTimer, RateMeter
 
+# Run full face detection every K frames; reuse tracked boxes in between
+DETECT_EVERY_K = 5
+# Re-embed a tracked face after T seconds even if its match is confident
+REEMBED_AFTER_SECONDS = 3.0
+# Use the low-resolution pre-pass + ROI detector instead of a full 300x300 pass (opt-in)
+FAST_DETECTION = False
+# Frames buffered between pipeline stages; older frames are dropped when a stage falls behind
+STAGE_QUEUE_SIZE = 2
 
-def run_realtime_attendance(net, embedder, database, conn):
+
+def _capture_loop(cap, frames, stop, timer, capture_rate):
+    """Capture thread: reads camera frames as fast as the camera delivers them."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        ret, frame = cap.read()
+        if not ret:
+            print("[ERROR] Failed to grab frame from webcam.")
+            stop.set()
+            break
+        timer.record("capture", time.perf_counter() - start)
+        capture_rate.tick()
+        frames.put((frame, time.perf_counter()))
+    frames.close()
+
+
+def _inference_loop(recognizer, frames, results, stop, timer):
+    """Inference worker: detection, embedding, matching and attendance for the newest frames."""
+    while not stop.is_set():
+        item = frames.get(timeout=0.1)
+        if item is None:
+            continue
+        frame, captured_at = item
+        start = time.perf_counter()
+        timer.record("queue", start - captured_at)
+        faces = recognizer.recognize(frame)
+        timer.record("inference", time.perf_counter() - start)
+
+        # If registered people are recognized, mark their attendance
+        for reg_no in recognizer.recognized(faces):
+            mark_attendance(get_connection(), reg_no)
+        results.put((frame, faces, captured_at))
+    results.close()
+
+
+def _draw_overlay(frame, timer, recognizer, capture_rate, display_rate, frames, results):
+    stats = recognizer.stats()
+    timings = timer.snapshot()
+    lines = [
+        f"Camera {capture_rate.rate():.1f} FPS | Display {display_rate.rate():.1f} FPS | "
+        f"Skipped embeddings {stats['skipped_fraction']:.0%}",
+        "  ".join(f"{stage} {timings[stage]:.1f}ms" for stage in ("capture", "queue", "inference", "display", "latency")
+                  if stage in timings),
+        f"Dropped: capture->inference {frames.dropped}, inference->display {results.dropped}",
+    ]
+    for i, line in enumerate(lines):
+        cv2.putText(frame, line, (10, 20 + 20 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+
+
+def run_realtime_attendance(net, embedder, database, conn, detect_every=DETECT_EVERY_K,
+                            reembed_after=REEMBED_AFTER_SECONDS, fast_detection=FAST_DETECTION):
     """
     Starts the real-time attendance loop using the webcam.
+
+    The loop is a staged pipeline: a capture thread and an inference worker feed
+    bounded drop-oldest queues, and the calling thread annotates and displays
+    results (OpenCV windows must be driven from the main thread). Faces are
+    tracked between frames so detection and embedding only run when needed, and
+    per-stage timings are drawn on screen. The inference worker marks attendance
+    through its own pooled connection, so `conn` is not shared across threads.
     """
     cap = cv2.VideoCapture(0)
     if not cap.isOpened():
         print("[ERROR] Could not open webcam.")
         return
 
-    print("[INFO] Starting webcam... Press 'q' to quit.")
-    cv2.namedWindow("Attendance System")
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("[ERROR] Failed to grab frame from webcam.")
-            break
+    recognizer = TrackedRecognizer(net, embedder, database, detect_every=detect_every,
+                                   stale_seconds=reembed_after, fast_detection=fast_detection)
+    frames = DropOldestQueue(STAGE_QUEUE_SIZE)
+    results = DropOldestQueue(STAGE_QUEUE_SIZE)
+    stop = threading.Event()
+    timer = StageTimer()
+    capture_rate, display_rate = RateMeter(), RateMeter()
 
-        # Recognize a person in the current frame
-        reg_no, processed_frame = recognize_person(frame, net, embedder, database, conn)
+    workers = [
+        threading.Thread(target=_capture_loop, args=(cap, frames, stop, timer, capture_rate),
+                         name="capture", daemon=True),
+        threading.Thread(target=_inference_loop, args=(recognizer, frames, results, stop, timer),
+                         name="inference", daemon=True),
+    ]
+    for worker in workers:
+        worker.start()
 
-        # If a registered person is recognized, mark their attendance
-        if reg_no:
-            mark_attendance(conn, reg_no)
+    print("[INFO] Starting webcam... Press 'q' to quit.")
+    cv2.namedWindow("Attendance System")
+    while not stop.is_set():
+        item = results.get(timeout=0.1)
+        if item is not None:
+            frame, faces, captured_at = item
+            start = time.perf_counter()
+            recognizer.annotate(frame, faces)
+            _draw_overlay(frame, timer, recognizer, capture_rate, display_rate, frames, results)
 
-        # Display the processed frame
-        cv2.imshow("Real-Time Attendance System", processed_frame)
+            # Display the processed frame
+            cv2.imshow("Real-Time Attendance System", frame)
+            display_rate.tick()
+            timer.record("display", time.perf_counter() - start)
+            timer.record("latency", time.perf_counter() - captured_at)
 
         # Check for the 'q' key to exit the loop
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
 
+    stop.set()
+    for worker in workers:
+        worker.join(timeout=2.0)
+
     # Release the camera and destroy all windows
     cap.release()
     cv2.destroyAllWindows()
-    print("[INFO] Webcam closed.")
-
+    stats = recognizer.stats()
+    print(f"[INFO] Webcam closed. {stats['frames']} frames processed at {stats['fps']:.1f} FPS, "
+          f"{stats['skipped_fraction']:.0%} of face embeddings skipped by tracking, "
+          f"{frames.dropped + results.dropped} stale frames dropped.")
@@ -1,13 +1,8 @@
 import cv2
 import numpy as np
-from numpy.linalg import norm
 from faceDetection import detect_faces, extract_face
-from faceEmbedding import get_embedding
-
-
-def cosine_similarity(a, b):
-    """Calculates the cosine similarity between two vectors."""
-    return np.dot(a, b) / (norm(a) * norm(b))
+from faceEmbedding import get_embeddings
+from database_utils import student_cache
 
 
 def recognize_person(frame, net, embedder, database, conn, threshold=0.6):
@@ -18,8 +13,8 @@ def recognize_person(frame, net, embedder, database, conn, threshold=0.6):
         frame: The video frame.
         net: Face detection model.
         embedder: FaceNet model.
-        database (dict): Dictionary of known embeddings {reg_no: embedding}.
-        conn: SQLite database connection.
+        database (Gallery): Gallery of known student embeddings.
+        conn: SQLite database connection (unused; student details come from the student cache).
         threshold (float): Similarity threshold for recognition.
 
     Returns:
@@ -27,39 +22,46 @@ def recognize_person(frame, net, embedder, database, conn, threshold=0.6):
     """
     boxes = detect_faces(frame, net)
     recognized_reg_no = None
+    if not boxes:
+        return recognized_reg_no, frame
 
-    for box in boxes:
-        face = extract_face(frame, box)
-        emb = get_embedding(face, embedder)
-
-        best_reg_no, best_score = None, -1
-        # Find the best match in the database
-        for reg_no, db_emb in database.items():
-            score = cosine_similarity(emb, db_emb)
-            if score > best_score:
-                best_reg_no, best_score = reg_no, score
+    # Embed every face in the frame with a single FaceNet pass
+    embeddings = get_embeddings([extract_face(frame, box) for box in boxes], embedder)
 
-        (x1, y1, x2, y2) = box
+    # Score every face against every known student in one pass
+    candidates = database.search(embeddings, k=1)
 
-        # Check if the best match is above the confidence threshold
-        if best_score > threshold:
-            color = (0, 255, 0)  # Green for recognized
+    for box, best in zip(boxes, candidates):
+        best_reg_no, best_score = best[0] if best else (None, -1)
+        if annotate_face(frame, box, best_reg_no, best_score, threshold):
             recognized_reg_no = best_reg_no
 
-            # Fetch student's name from the database for display
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM students WHERE reg_no = ?", (recognized_reg_no,))
-            result = cursor.fetchone()
-            name = result[0] if result else "Name N/A"
-            label = f"{name} ({recognized_reg_no})"
-        else:
-            color = (0, 0, 255)  # Red for unknown
-            label = "Unknown"
+    return recognized_reg_no, frame
 
-        # Draw the bounding box and label on the frame
-        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-        cv2.putText(frame, f"{label} ({best_score:.2f})", (x1, y1 - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
 
-    return recognized_reg_no, frame
+def annotate_face(frame, box, reg_no, score, threshold=0.6):
+    """
+    Draws a face's bounding box and label on the frame.
+
+    Returns:
+        bool: True if the face counts as recognized (score above the threshold).
+    """
+    (x1, y1, x2, y2) = box
+
+    # Check if the best match is above the confidence threshold
+    recognized = reg_no is not None and score > threshold
+    if recognized:
+        color = (0, 255, 0)  # Green for recognized
+
+        # Student's name for display, served from the in-memory student cache
+        name = student_cache.name(reg_no, default="Name N/A")
+        label = f"{name} ({reg_no})"
+    else:
+        color = (0, 0, 255)  # Red for unknown
+        label = "Unknown"
 
+    # Draw the bounding box and label on the frame
+    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+    cv2.putText(frame, f"{label} ({score:.2f})", (x1, y1 - 10),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+    return recognized
@@ -1,17 +1,35 @@
 import cv2
 import numpy as np
 import os
+import time
 from faceDetection import detect_faces, extract_face
-from faceEmbedding import get_embedding
+from faceEmbedding import get_embeddings
 from database_utils import add_student
+from gallery import Gallery
 
 
-def register_person(image_paths, net, embedder):
+# Number of face crops gathered across students before load_dataset runs a FaceNet pass
+LOAD_EMBED_CHUNK = 256
+
+
+def collect_faces(image_paths, net, cache=None):
     """
-    Computes the average embedding for a person from a list of their images.
+    Reads each image and crops its largest face, ready for batched embedding.
+    If an EmbeddingCache is given, unchanged images are served from it instead.
+
+    Returns:
+        tuple: (embeddings served from the cache, face crops still to embed,
+        the image paths those crops came from)
     """
-    embeddings = []
+    cached, faces, face_paths = [], [], []
     for path in image_paths:
+        if cache is not None:
+            hit, emb = cache.lookup(path)
+            if hit:
+                if emb is not None:
+                    cached.append(emb)
+                continue
+
         frame = cv2.imread(path)
         if frame is None:
             print(f"[WARN] Could not read image {path}, skipping.")
@@ -20,16 +38,33 @@ def register_person(image_paths, net, embedder):
         boxes = detect_faces(frame, net)
         if not boxes:
             print(f"[WARN] No face detected in {path}, skipping.")
+            if cache is not None:
+                cache.store(path, None)
             continue
 
         # In case of multiple faces, use the one with the largest area
         areas = [(box[2] - box[0]) * (box[3] - box[1]) for box in boxes]
         main_box = boxes[np.argmax(areas)]
 
-        face = extract_face(frame, main_box)
-        emb = get_embedding(face, embedder)
-        embeddings.append(emb)
+        faces.append(extract_face(frame, main_box))
+        face_paths.append(path)
+    return cached, faces, face_paths
+
+
+def add_to_index(database, reg_no, avg_embedding, embeddings=None):
+    """Adds a student to the index, with every per-image embedding if the index keeps templates."""
+    if embeddings is not None and len(embeddings) and hasattr(database, "add_templates"):
+        database.add_templates(reg_no, embeddings)
+    else:
+        database.add(reg_no, avg_embedding)
+
 
+def _average_embedding(cached, new_embeddings, face_paths, cache=None):
+    """Stores freshly computed embeddings in the cache and averages them with the cached ones."""
+    if cache is not None:
+        for path, emb in zip(face_paths, new_embeddings):
+            cache.store(path, emb)
+    embeddings = list(cached) + list(new_embeddings)
     if not embeddings:
         return None
 
@@ -37,6 +72,17 @@ def register_person(image_paths, net, embedder):
     return np.mean(embeddings, axis=0)
 
 
+def register_person(image_paths, net, embedder, cache=None):
+    """
+    Computes the average embedding for a person from a list of their images.
+    All new face crops are embedded in a single batched FaceNet pass.
+    If an EmbeddingCache is given, unchanged images are served from it and only
+    new or modified images are run through detection and FaceNet.
+    """
+    cached, faces, face_paths = collect_faces(image_paths, net, cache)
+    return _average_embedding(cached, get_embeddings(faces, embedder), face_paths, cache)
+
+
 def register_new_student(dataset_path, net, embedder, conn, database):
     """
     Captures images from webcam to register a new student.
@@ -112,10 +158,12 @@ def register_new_student(dataset_path, net, embedder, conn, database):
 
     # Process the captured images
     print("[INFO] Processing captured images...")
-    avg_embedding = register_person(captured_images, net, embedder)
+    cached, faces, face_paths = collect_faces(captured_images, net)
+    embeddings = get_embeddings(faces, embedder)
+    avg_embedding = _average_embedding(cached, embeddings, face_paths)
 
     if avg_embedding is not None:
-        database[reg_no] = avg_embedding
+        add_to_index(database, reg_no, avg_embedding, embeddings)
         add_student(conn, reg_no, name, semester, phone)
         print(f"[SUCCESS] Student {name} registered successfully!")
     else:
@@ -127,19 +175,12 @@ def register_new_student(dataset_path, net, embedder, conn, database):
 
 
 
-def load_dataset(dataset_path, net, embedder, conn):
+def scan_dataset(dataset_path):
     """
-    Loads images from the dataset folder, registers each person,
-    and returns a dictionary of their embeddings.
+    Yields ((reg_no, name, semester, phone), image_paths) for every correctly named
+    student folder ('RegNo_Name_Semester_Phone') in the dataset that has images.
     """
-    print("[INFO] Loading dataset and registering known faces...")
-    database = {}
-    if not os.path.exists(dataset_path):
-        print(f"[ERROR] Dataset path not found: {dataset_path}")
-        return database
-
-    # Loop through each sub-directory (each person) in the dataset folder
-    for person_dir in os.listdir(dataset_path):
+    for person_dir in sorted(os.listdir(dataset_path)):
         person_path = os.path.join(dataset_path, person_dir)
         if os.path.isdir(person_path):
             try:
@@ -150,21 +191,87 @@ def load_dataset(dataset_path, net, embedder, conn):
                 continue
 
             # Find all image files for the person
-            image_files = [os.path.join(person_path, f) for f in os.listdir(person_path) if
+            image_files = [os.path.join(person_path, f) for f in sorted(os.listdir(person_path)) if
                            f.endswith(('.jpg', '.png', '.jpeg'))]
 
             if not image_files:
                 print(f"[WARN] No images found for {name}, skipping.")
                 continue
 
-            # Get the average embedding for the person
-            avg_embedding = register_person(image_files, net, embedder)
+            yield (reg_no, name, semester, phone), image_files
+
+
+def load_dataset(dataset_path, net, embedder, conn, cache=None, index=None):
+    """
+    Loads images from the dataset folder, registers each person,
+    and returns a Gallery of their embeddings.
+    Pass an empty index from ann_index.create_index to use another matching backend.
+    With an EmbeddingCache, students whose images are unchanged are loaded
+    straight from disk without touching the models.
+    """
+    print("[INFO] Loading dataset and registering known faces...")
+    start = time.perf_counter()
+    database = index if index is not None else Gallery()
+    if cache is not None:
+        cache.reset_stats()
+    if not os.path.exists(dataset_path):
+        print(f"[ERROR] Dataset path not found: {dataset_path}")
+        return database
+
+    # Students whose crops are waiting for the next batched embedding pass
+    pending = []
+    pending_faces = 0
+
+    def flush_pending():
+        faces = [face for _, _, _, student_faces, _ in pending for face in student_faces]
+        embeddings = get_embeddings(faces, embedder)
+        offset = 0
+        for student, image_files, cached, student_faces, face_paths in pending:
+            new_embeddings = embeddings[offset:offset + len(student_faces)]
+            offset += len(student_faces)
+            avg_embedding = _average_embedding(cached, new_embeddings, face_paths, cache)
+            add_registered(student, image_files, avg_embedding, list(cached) + list(new_embeddings))
+        pending.clear()
+        if cache is not None:
+            cache.commit()
+
+    def add_registered(student, image_files, avg_embedding, embeddings):
+        reg_no, name, semester, phone = student
+        if avg_embedding is None:
+            return
+        if cache is not None:
+            cache.put_student(reg_no, image_files, avg_embedding)
+        add_to_index(database, reg_no, avg_embedding, embeddings)
+        # Add the student's details to the database
+        add_student(conn, reg_no, name, semester, phone)
 
-            if avg_embedding is not None:
-                database[reg_no] = avg_embedding
-                # Add the student's details to the database
-                add_student(conn, reg_no, name, semester, phone)
+    # Loop through each sub-directory (each person) in the dataset folder
+    for student, image_files in scan_dataset(dataset_path):
+        reg_no, name, semester, phone = student
+
+        # Use the cached average embedding if none of the student's images changed; multi-template
+        # indexes need the per-image embeddings, which collect_faces serves from the cache
+        use_average = cache is not None and not hasattr(database, "add_templates")
+        avg_embedding = cache.get_student(reg_no, image_files) if use_average else None
+        if avg_embedding is not None:
+            database.add(reg_no, avg_embedding)
+            add_student(conn, reg_no, name, semester, phone)
+            continue
 
-    print("[INFO] All known faces have been processed.")
+        cached, faces, face_paths = collect_faces(image_files, net, cache)
+        pending.append((student, image_files, cached, faces, face_paths))
+        pending_faces += len(faces)
+        if pending_faces >= LOAD_EMBED_CHUNK:
+            flush_pending()
+            pending_faces = 0
+
+    if pending:
+        flush_pending()
+
+    elapsed = time.perf_counter() - start
+    if cache is not None:
+        cache.commit()
+        print(f"[INFO] Embedding cache: {cache.hits} hits, {cache.misses} misses.")
+    print(f"[INFO] All known faces have been processed in {elapsed:.2f}s.")
     return database
 
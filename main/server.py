@@ -1,47 +1,118 @@
-from flask import Flask, render_template, request
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
-import cv2
 import numpy as np
-import base64
 import os
 import sys
+import time
 from datetime import datetime
 
 # Import your existing modules
 from faceDetection import detect_faces, extract_face
-from faceEmbedding import get_embedding
-from database_utils import init_database, mark_attendance, add_student
-from registration import load_dataset
-import sqlite3
+from faceEmbedding import get_embeddings
+from database_utils import (init_database, mark_attendance, add_student, get_connection, set_durability,
+                            student_cache)
+from attendance_query import parse_filters, parse_limit, query_attendance, summarize_attendance
+from attendance_export import (EXPORT_FORMATS, FILE_EXTENSIONS, MIME_TYPES, ExportStats, iter_export,
+                               open_export_connection)
+from registration import load_dataset, add_to_index
+from embedding_cache import EmbeddingCache
+from gallery import RECOGNITION_DISTANCE, cosine_to_distance
+from ann_index import create_index
+from inference_scheduler import InferenceScheduler
+from frame_codec import FrameRegion, TransportStats, decode_image, encoded_buffer
+from models import ModelRegistry
+from flow_control import FlowController, FrameDropped
+from shared_gallery import SHARED_STORE_PATH, SharedGallery
 
 app = Flask(__name__, template_folder='../client/templates', static_folder='../client/static')
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*", max_http_buffer_size=10**8)
-
-# Load models once at startup
-print("[INFO] Loading models...")
-# Load face detection model
-MODELS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models")
-prototxt_path = os.path.join(MODELS_PATH, "deploy.prototxt")
-model_path = os.path.join(MODELS_PATH, "res10_300x300_ssd_iter_140000.caffemodel")
-net = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
-
-# Load FaceNet embedder
-from keras_facenet import FaceNet
-embedder = FaceNet()
-
-# Initialize database (for dataset loading only)
-def get_db_connection():
-    return sqlite3.connect(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'attendance.db'), check_same_thread=False)
-
-conn_for_dataset = get_db_connection()
+# Largest accepted Socket.IO message; room for a registration batch of JPEG frames, not arbitrary uploads
+MAX_MESSAGE_BYTES = int(os.environ.get('MAX_MESSAGE_BYTES', str(5 * 2**20)))
+# Multi-worker mode (see workers.py): each worker process runs this server on its own port; a
+# message queue (e.g. redis://host:6379/0, or mq_standin.py for local tests) relays emits and
+# broadcasts between them. Without one, Socket.IO keeps its in-process manager (single worker).
+WORKER_ID = os.environ.get('WORKER_ID', '0')
+SERVER_PORT = int(os.environ.get('SERVER_PORT', '5000'))
+MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE') or None
+if MESSAGE_QUEUE and MESSAGE_QUEUE.startswith(('redis://', 'rediss://')):
+    try:
+        import redis  # noqa: F401  (used by Socket.IO's Redis manager)
+    except ImportError:
+        print("[ERROR] SOCKETIO_MESSAGE_QUEUE is a Redis URL but the 'redis' package is missing: pip install redis")
+        sys.exit(1)
+socketio = SocketIO(app, cors_allowed_origins="*", max_http_buffer_size=MAX_MESSAGE_BYTES,
+                    message_queue=MESSAGE_QUEUE)
+
+# Models load on a background thread (with a warm-up batch) while the database and
+# gallery are prepared; handlers use lazy stand-ins that wait for them on first use
+EMBEDDER_BACKEND = os.environ.get('EMBEDDER_BACKEND', 'keras')
+MODEL_WARMUP_BATCH = int(os.environ.get('MODEL_WARMUP_BATCH', '4'))
+model_registry = ModelRegistry(EMBEDDER_BACKEND, warmup_batch=MODEL_WARMUP_BATCH)
+model_registry.load_in_background()
+net = model_registry.lazy_detector()
+embedder = model_registry.lazy_embedder()
+
+# Initialize database; handlers use per-thread pooled connections from get_connection()
+conn_for_dataset = init_database()
+# "async" queues attendance inserts for a background writer so results reach clients
+# without waiting for the commit; "sync" commits each record before replying
+set_durability(os.environ.get('ATTENDANCE_DURABILITY', 'async'))
 
 # Load dataset
 DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "dataset")
-database = load_dataset(DATASET_PATH, net, embedder, conn_for_dataset)
-conn_for_dataset.close()
-print(f"[INFO] Models loaded successfully! Database has {len(database)} registered faces.")
+# Matching backend: "exact" (brute force), "ivf" (approximate, for very large galleries)
+# or "multi" (centroid + per-student exemplars, better recall across pose/lighting)
+INDEX_BACKEND = os.environ.get('FACE_INDEX_BACKEND', 'exact')
+INDEX_NPROBE = int(os.environ.get('FACE_INDEX_NPROBE', '8'))
+# Stored embedding precision: "float32", "float16" or "int8" (see compact_store.py)
+INDEX_DTYPE = os.environ.get('FACE_INDEX_DTYPE', 'float32')
+index_options = {'nprobe': INDEX_NPROBE} if INDEX_BACKEND == 'ivf' else {}
+index_options['dtype'] = INDEX_DTYPE
+# Workers share one memory-mapped gallery (SHARED_GALLERY=1 or a store path); registrations in
+# any worker publish a new version that the others map within SHARED_GALLERY_CHECK_S seconds
+SHARED_GALLERY = os.environ.get('SHARED_GALLERY', '')
+SHARED_GALLERY_CHECK_S = float(os.environ.get('SHARED_GALLERY_CHECK_S', '1.0'))
+embedding_cache = EmbeddingCache()
+# Only images missing from the embedding cache touch the models, so a warm cache does not wait for them
+startup = time.perf_counter()
+if SHARED_GALLERY:
+    if INDEX_BACKEND != 'exact':
+        print(f"[ERROR] SHARED_GALLERY requires FACE_INDEX_BACKEND=exact, not '{INDEX_BACKEND}'.")
+        sys.exit(1)
+    # Only the first worker to start builds the gallery; the others map the published version
+    database = SharedGallery(SHARED_STORE_PATH if SHARED_GALLERY in ('1', 'true') else SHARED_GALLERY,
+                             build=lambda: load_dataset(DATASET_PATH, net, embedder, conn_for_dataset,
+                                                        embedding_cache, create_index('exact', dtype=INDEX_DTYPE)),
+                             dtype=INDEX_DTYPE, check_interval=SHARED_GALLERY_CHECK_S)
+else:
+    database = load_dataset(DATASET_PATH, net, embedder, conn_for_dataset, embedding_cache,
+                            create_index(INDEX_BACKEND, **index_options))
+embedding_cache.close()
+# Student details live in memory next to the gallery
+student_cache.load(conn_for_dataset)
+print(f"[INFO] Startup: load_dataset took {time.perf_counter() - startup:.2f}s. "
+      f"Database has {len(database)} registered faces.")
+
+# Micro-batching scheduler shared by all recognize_face requests
+SCHEDULER_MAX_BATCH = int(os.environ.get('SCHEDULER_MAX_BATCH', '16'))
+SCHEDULER_MAX_WAIT_MS = float(os.environ.get('SCHEDULER_MAX_WAIT_MS', '10'))
+scheduler = InferenceScheduler(net, embedder, database, max_batch_size=SCHEDULER_MAX_BATCH,
+                               max_wait_ms=SCHEDULER_MAX_WAIT_MS)
+
+# Per-client flow control: one frame in flight per client, only the newest waiting frame kept,
+# frames older than FRAME_MAX_AGE_MS dropped, and a recommended send interval returned with each result
+FRAME_MAX_AGE_MS = float(os.environ.get('FRAME_MAX_AGE_MS', '1000'))
+flow = FlowController(scheduler.submit, max_age_ms=FRAME_MAX_AGE_MS)
+
+# Bytes-per-frame and decode time for binary vs data URL uploads
+transport_stats = TransportStats()
+
+
+def worker_info():
+    """Which worker answered, and the shared gallery version it has mapped (None when not shared)"""
+    return {'id': WORKER_ID, 'pid': os.getpid(), 'faces': len(database),
+            'gallery_version': getattr(database, 'version', None), 'message_queue': bool(MESSAGE_QUEUE)}
 
 
 @app.route('/')
@@ -50,105 +121,219 @@ def index():
     return render_template('index.html')
 
 
+@app.route('/ready')
+def ready():
+    """Readiness probe: 200 once the models are loaded and warmed up, 503 before that"""
+    status = model_registry.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+
+@app.route('/stats')
+def stats():
+    """Inference scheduler metrics (queue depth, batch sizes, per-stage latency) and frame transport stats"""
+    snapshot = scheduler.stats_snapshot()
+    snapshot['transport'] = transport_stats.snapshot()
+    snapshot['clients'] = flow.snapshot()
+    snapshot['worker'] = worker_info()
+    return jsonify(snapshot)
+
+
+@app.route('/attendance')
+def attendance():
+    """
+    One page of attendance records, newest first.
+    Query parameters: from, to (YYYY-MM-DD), semester, reg_no, limit, cursor (next_cursor of the previous page)
+    """
+    try:
+        page = query_attendance(get_connection(), parse_filters(request.args), parse_limit(request.args.get('limit')),
+                                request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(page)
+
+
+@app.route('/attendance/summary')
+def attendance_summary():
+    """Attendance counts per day or per student (group=day|student), with the same filters as /attendance"""
+    group = request.args.get('group', 'day')
+    try:
+        summary = summarize_attendance(get_connection(), group, parse_filters(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'group': group, 'summary': summary})
+
+
+@app.route('/attendance/export')
+def attendance_export():
+    """
+    Streams every matching attendance record as a chunked download.
+    Query parameters: format (csv or columnar), from, to (YYYY-MM-DD)
+    """
+    fmt = request.args.get('format', 'csv')
+    try:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}', expected one of {EXPORT_FORMATS}")
+        filters = parse_filters({'from': request.args.get('from'), 'to': request.args.get('to')})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    date_from = filters['from'].isoformat() if 'from' in filters else None
+    date_to = filters['to'].isoformat() if 'to' in filters else None
+
+    def generate():
+        # Its own read-only connection: one consistent snapshot, closed even if the client disconnects
+        conn = open_export_connection()
+        stats = ExportStats()
+        try:
+            yield from iter_export(conn, fmt, date_from, date_to, stats=stats)
+        finally:
+            conn.close()
+            print(f"[INFO] Attendance export ({fmt}): {stats.summary()}")
+
+    filename = f"attendance_{date_from or 'start'}_{date_to or 'end'}.{FILE_EXTENSIONS[fmt]}"
+    return Response(stream_with_context(generate()), mimetype=MIME_TYPES[fmt],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
     print(f"[INFO] Client connected: {request.sid}")
-    emit('connection_response', {'status': 'connected', 'message': 'Connected to server'})
+    emit('connection_response', {'status': 'connected', 'message': 'Connected to server',
+                                 'models_ready': model_registry.ready.is_set()})
 
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
     print(f"[INFO] Client disconnected: {request.sid}")
+    flow.forget(request.sid)
+
+
+def build_recognized_students(results):
+    """Looks up and marks attendance for every face whose best match is within the threshold."""
+    recognized_students = []
+    for box, best_match, score in results:
+        if best_match is None:
+            continue
+        min_distance = cosine_to_distance(score)
+
+        # Threshold for recognition (0.6 works well for FaceNet)
+        if min_distance < RECOGNITION_DISTANCE:
+            # Get student info from the in-memory student cache
+            student_info = student_cache.get(best_match)
+
+            if student_info:
+                # Mark attendance
+                mark_attendance(get_connection(), best_match)
+
+                recognized_students.append({
+                    'reg_no': student_info[0],
+                    'name': student_info[1],
+                    'semester': student_info[2],
+                    # map phone_number column to 'phone' key expected by client
+                    'phone': student_info[3],
+                    'confidence': float(1 - min_distance),
+                    'distance': float(min_distance),
+                    'box': [int(v) for v in box]
+                })
+    return recognized_students
+
+
+def finish_recognition(sid, results, error, transport=None, flow_info=None, region=None):
+    """
+    Scheduler callback: sends a frame's recognition result back to the client that sent it.
+    Face boxes are reported in full-frame coordinates when the client uploaded a cropped region.
+    """
+    if isinstance(error, FrameDropped):
+        socketio.emit('frame_dropped', {'message': str(error), 'flow': flow_info}, to=sid)
+        return
+    if error is not None:
+        print(f"[ERROR] Error in recognition: {str(error)}")
+        socketio.emit('recognition_error', {'error': str(error), 'flow': flow_info}, to=sid)
+        return
+    try:
+        if region is not None and not region.is_full_frame:
+            results = [(region.to_full_frame(box), reg_no, score) for box, reg_no, score in results]
+        recognized_students = build_recognized_students(results)
+        faces = [[int(v) for v in box] for box, _, _ in results]
+        if recognized_students:
+            socketio.emit('recognition_success', {
+                'students': recognized_students,
+                'faces': faces,
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'transport': transport,
+                'flow': flow_info
+            }, to=sid)
+        else:
+            socketio.emit('recognition_result', {
+                'students': [],
+                'faces': faces,
+                'message': 'No faces recognized',
+                'transport': transport,
+                'flow': flow_info
+            }, to=sid)
+    except Exception as e:
+        print(f"[ERROR] Error in recognition: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        socketio.emit('recognition_error', {'error': str(e)}, to=sid)
 
 
 @socketio.on('recognize_face')
 def handle_recognize(data):
     """
     Handle face recognition request
-    Expected data: {'image': 'base64_encoded_image'}
+    Expected data: {'image': <binary JPEG attachment> or 'base64_encoded_image'}
+    Optional: 'roi': {'x', 'y', 'scale', 'full_width', 'full_height'} when the image
+    is a crop (and/or downscale) of the camera frame, so face boxes are returned in
+    full-frame coordinates; 'gated': frames the client skipped as unchanged since
+    its last upload (for the per-client upload statistics).
+    The frame is decoded here and handed to the per-client flow controller, which
+    forwards it to the shared inference scheduler (batched with frames from other
+    clients) once this client's previous frame is done, and replies to this sid.
     """
     try:
-        img_b64 = data.get('image')
+        image = data.get('image')
 
-        if not img_b64:
+        if not image:
             emit('recognition_error', {'error': 'No image provided'})
             return
 
-        # Remove data URL prefix if present
-        if ',' in img_b64:
-            img_b64 = img_b64.split(',')[1]
-
-        # Decode image
-        img_bytes = base64.b64decode(img_b64)
-        nparr = np.frombuffer(img_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Decode image straight from the received buffer
+        decode_cpu = time.process_time()
+        frame, transport = decode_image(image, transport_stats)
+        decode_cpu = (time.process_time() - decode_cpu) * 1000.0
 
         if frame is None:
             emit('recognition_error', {'error': 'Failed to decode image'})
             return
 
-        # Detect faces
-        boxes = detect_faces(frame, net)
-
-        recognized_students = []
-
-        for box in boxes:
-            # Extract face
-            face = extract_face(frame, box)
-
-            if face is None or face.size == 0:
-                continue
-
-            # Get embedding
-            embedding = get_embedding(face, embedder)
-
-            # Compare with database
-            min_distance = float('inf')
-            best_match = None
-
-            for reg_no, stored_embedding in database.items():
-                distance = np.linalg.norm(embedding - stored_embedding)
-                if distance < min_distance:
-                    min_distance = distance
-                    best_match = reg_no
-
-            # Threshold for recognition (0.6 works well for FaceNet)
-            if min_distance < 0.6:
-                # Get student info from database
-                conn = get_db_connection()
-                cursor = conn.cursor()
-                cursor.execute("SELECT reg_no, name, semester, phone_number FROM students WHERE reg_no = ?", (best_match,))
-                student_info = cursor.fetchone()
-                conn.close()
-
-                if student_info:
-                    # Mark attendance
-                    conn = get_db_connection()
-                    mark_attendance(conn, best_match)
-                    conn.close()
-
-                    recognized_students.append({
-                        'reg_no': student_info[0],
-                        'name': student_info[1],
-                        'semester': student_info[2],
-                        # map phone_number column to 'phone' key expected by client
-                        'phone': student_info[3],
-                        'confidence': float(1 - min_distance),
-                        'distance': float(min_distance)
-                    })
+        try:
+            region = FrameRegion.from_payload(data.get('roi'), frame)
+        except ValueError as e:
+            emit('recognition_error', {'error': str(e)})
+            return
 
-        if recognized_students:
-            emit('recognition_success', {
-                'students': recognized_students,
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            })
-        else:
-            emit('recognition_result', {
-                'students': [],
-                'message': 'No faces recognized'
-            })
+        if not model_registry.ready.is_set():
+            emit('recognition_error', {'error': 'Models are still loading, please retry shortly'})
+            return
+
+        sid = request.sid
+        # At most one frame per client reaches the scheduler; newer frames replace older waiting ones
+        def on_result(results, error, flow_info):
+            finish_recognition(sid, results, error, transport, flow_info, region)
+
+        try:
+            gated = max(0, int(data.get('gated') or 0))
+        except (TypeError, ValueError):
+            gated = 0
+        flow.offer(sid, frame, on_result, usage={
+            'bytes': transport['bytes'],
+            'pixel_ratio': region.pixel_ratio(frame),
+            'roi': not region.is_full_frame,
+            'gated': gated,
+            'decode_cpu_ms': decode_cpu,
+        })
 
     except Exception as e:
         print(f"[ERROR] Error in recognition: {str(e)}")
@@ -166,7 +351,7 @@ def handle_register(data):
         'name': '...',
         'semester': '...',
         'phone': '...',
-        'images': ['base64_image1', 'base64_image2', ...]
+        'images': ['base64_image1', 'base64_image2', ...]  (or binary JPEG attachments)
     }
     """
     try:
@@ -185,37 +370,37 @@ def handle_register(data):
             emit('registration_error', {'error': f'Student with Reg No {reg_no} already exists!'})
             return
 
-        # Decode images and extract embeddings
-        embeddings = []
+        # Decode images (binary attachments or base64 data URLs) and crop the main face of each
+        frames = []
         for img_b64 in images_b64:
-            if ',' in img_b64:
-                img_b64 = img_b64.split(',')[1]
+            frame, _ = decode_image(img_b64)
 
-            img_bytes = base64.b64decode(img_b64)
-            nparr = np.frombuffer(img_bytes, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            if frame is not None:
+                frames.append(frame)
 
-            if frame is None:
-                continue
+        # The models are shared with the inference scheduler, so hold its lock while using them
+        faces = []
+        with scheduler.model_lock:
+            for frame in frames:
+                # Detect face
+                boxes = detect_faces(frame, net)
 
-            # Detect face
-            boxes = detect_faces(frame, net)
+                if not boxes:
+                    print(f"[WARN] No face detected in image, skipping.")
+                    continue
 
-            if not boxes:
-                print(f"[WARN] No face detected in image, skipping.")
-                continue
+                # Use the largest face
+                areas = [(box[2] - box[0]) * (box[3] - box[1]) for box in boxes]
+                main_box = boxes[np.argmax(areas)]
 
-            # Use the largest face
-            areas = [(box[2] - box[0]) * (box[3] - box[1]) for box in boxes]
-            main_box = boxes[np.argmax(areas)]
+                # Extract face
+                face = extract_face(frame, main_box)
 
-            # Extract face
-            face = extract_face(frame, main_box)
+                if face is not None and face.size > 0:
+                    faces.append(face)
 
-            if face is not None and face.size > 0:
-                # Get embedding
-                embedding = get_embedding(face, embedder)
-                embeddings.append(embedding)
+            # Get all embeddings in one batch
+            embeddings = get_embeddings(faces, embedder)
 
         if len(embeddings) < 3:
             emit('registration_error', {'error': f'Could not extract enough face embeddings. Got {len(embeddings)}, need at least 3.'})
@@ -225,12 +410,10 @@ def handle_register(data):
         avg_embedding = np.mean(embeddings, axis=0)
 
         # Save to database
-        conn = get_db_connection()
-        add_student(conn, reg_no, name, semester, phone)
-        conn.close()
+        add_student(get_connection(), reg_no, name, semester, phone)
 
-        # Update in-memory database
-        database[reg_no] = avg_embedding
+        # Update in-memory gallery
+        add_to_index(database, reg_no, avg_embedding, embeddings)
 
         # Create directory and save images (optional, for backup)
         person_dir = f"{reg_no}_{name}_{semester}_{phone}"
@@ -241,9 +424,7 @@ def handle_register(data):
 
         # Save first 5 images
         for idx, img_b64 in enumerate(images_b64[:5]):
-            if ',' in img_b64:
-                img_b64 = img_b64.split(',')[1]
-            img_bytes = base64.b64decode(img_b64)
+            img_bytes, _, _ = encoded_buffer(img_b64)
             img_path = os.path.join(person_path, f"{idx + 1}.jpg")
             with open(img_path, 'wb') as f:
                 f.write(img_bytes)
@@ -252,6 +433,9 @@ def handle_register(data):
             'message': f'Student {name} registered successfully with {len(embeddings)} face samples!',
             'reg_no': reg_no
         })
+        # Reaches the clients of every worker through the message queue
+        socketio.emit('student_registered', {'reg_no': reg_no, 'name': name, 'worker': WORKER_ID,
+                                             'gallery_version': getattr(database, 'version', None)})
 
     except Exception as e:
         print(f"[ERROR] Error in registration: {str(e)}")
@@ -262,37 +446,50 @@ def handle_register(data):
 
 @socketio.on('get_attendance')
 def handle_get_attendance(data):
-    """Get attendance records"""
+    """
+    Get attendance records, newest first
+    Optional data: {'from', 'to' (YYYY-MM-DD), 'semester', 'reg_no', 'limit', 'cursor'}
+    Pass the reply's 'next_cursor' as 'cursor' to fetch the next page.
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT a.student_reg_no, s.name, a.timestamp 
-            FROM attendance a 
-            JOIN students s ON a.student_reg_no = s.reg_no 
-            ORDER BY a.timestamp DESC 
-            LIMIT 100
-        """)
-        records = cursor.fetchall()
-        conn.close()
-
-        attendance_list = [
-            {
-                'reg_no': r[0],
-                'name': r[1],
-                'timestamp': r[2]
-            }
-            for r in records
-        ]
-
-        emit('attendance_data', {'records': attendance_list})
+        data = data or {}
+        page = query_attendance(get_connection(), parse_filters(data), parse_limit(data.get('limit')),
+                                data.get('cursor'))
+        emit('attendance_data', page)
 
     except Exception as e:
         print(f"[ERROR] Error fetching attendance: {str(e)}")
         emit('error', {'error': str(e)})
 
 
+@socketio.on('get_attendance_summary')
+def handle_get_attendance_summary(data):
+    """
+    Get attendance counts computed in SQL
+    Data: {'group': 'day' or 'student', plus the filters of get_attendance}
+    """
+    try:
+        data = data or {}
+        group = data.get('group', 'day')
+        summary = summarize_attendance(get_connection(), group, parse_filters(data))
+        emit('attendance_summary', {'group': group, 'summary': summary})
+
+    except Exception as e:
+        print(f"[ERROR] Error summarizing attendance: {str(e)}")
+        emit('error', {'error': str(e)})
+
+
+@socketio.on('get_scheduler_stats')
+def handle_get_scheduler_stats(data):
+    """Send inference scheduler and frame transport metrics to the requesting client"""
+    snapshot = scheduler.stats_snapshot()
+    snapshot['transport'] = transport_stats.snapshot()
+    snapshot['clients'] = flow.snapshot()
+    snapshot['worker'] = worker_info()
+    emit('scheduler_stats', snapshot)
+
+
 if __name__ == '__main__':
-    print("[INFO] Starting server on https://0.0.0.0:5000")
-    print("[INFO] Access from your phone using: https://YOUR_PC_IP:5000")
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True, use_reloader=False, allow_unsafe_werkzeug=True, ssl_context='adhoc')
+    print(f"[INFO] Starting server (worker {WORKER_ID}) on https://0.0.0.0:{SERVER_PORT}")
+    print(f"[INFO] Access from your phone using: https://YOUR_PC_IP:{SERVER_PORT}")
+    socketio.run(app, host='0.0.0.0', port=SERVER_PORT, debug=True, use_reloader=False, allow_unsafe_werkzeug=True, ssl_context='adhoc')
@@ -0,0 +1,207 @@
+"""
+Gallery shared by several server worker processes on one host.
+
+The gallery is published as numbered, immutable versions of a compact store
+(database/shared_gallery/v00000001/, v00000002/, ...) and a CURRENT file naming
+the newest one, replaced atomically. Every worker memory-maps the current
+version, so all of them share one copy of the embeddings through the OS page
+cache. A registration in any worker takes the store lock, applies the change to
+the newest version, publishes it as the next version and maps it; the other
+workers see CURRENT change and remap it within `check_interval` seconds.
+
+Cross-process locking uses fcntl, so multi-worker mode needs a POSIX host.
+
+Usage:
+    python shared_gallery.py            # show the published version
+    python shared_gallery.py --rebuild  # republish from the dataset (e.g. after adding folders offline)
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import threading
+import time
+from compact_store import create_gallery, load_store, save_store
+from database_utils import DB_FOLDER
+
+try:
+    import fcntl
+except ImportError:  # Windows: single worker only
+    fcntl = None
+
+SHARED_STORE_PATH = os.path.join(DB_FOLDER, "shared_gallery")
+# Older versions are deleted once this many newer ones exist; workers that still map
+# them keep their pages (POSIX unlink semantics) until they remap
+KEEP_VERSIONS = 3
+
+
+def version_path(root, version):
+    return os.path.join(root, f"v{version:08d}")
+
+
+def current_version(root=SHARED_STORE_PATH):
+    """The published version number, or None if nothing has been published."""
+    try:
+        with open(os.path.join(root, "CURRENT"), "r", encoding="utf-8") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+@contextlib.contextmanager
+def store_lock(root=SHARED_STORE_PATH):
+    """Exclusive lock serializing publishers across processes."""
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, ".lock"), "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def publish_version(gallery, root=SHARED_STORE_PATH):
+    """
+    Saves a gallery as the next version and points CURRENT at it.
+    The caller must hold store_lock. Returns the new version number.
+    """
+    version = (current_version(root) or 0) + 1
+    save_store(gallery, version_path(root, version))
+    tmp = os.path.join(root, "CURRENT.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(str(version))
+    os.replace(tmp, os.path.join(root, "CURRENT"))
+
+    for name in os.listdir(root):
+        if name.startswith("v") and name[1:].isdigit() and int(name[1:]) <= version - KEEP_VERSIONS:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return version
+
+
+class SharedGallery:
+    """
+    Index facade over the current published version of a shared gallery.
+
+    Reads (search, match, get, len, in) go to the memory-mapped current version,
+    checking for a newer one at most every `check_interval` seconds. add() and
+    remove() publish a new version for every worker.
+
+    If nothing has been published yet, the first process to take the store lock
+    publishes `build()` (e.g. the gallery loaded from the dataset), or an empty
+    gallery of `dtype`.
+
+    Every add() or remove() rewrites the whole store: O(N) disk I/O per change
+    (about 0.5 MB per 1000 float32 students), and each worker then pages in the
+    new version. That suits enrolment at the pace of a registration form; for
+    bulk changes build one gallery and publish it once (shared_gallery.py --rebuild).
+    """
+
+    def __init__(self, root=SHARED_STORE_PATH, build=None, dtype="float32", check_interval=1.0):
+        self.root = root
+        self.check_interval = check_interval
+        self.version = None
+        self.reloads = 0
+        self._gallery = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        with store_lock(root):
+            if current_version(root) is None:
+                publish_version(build() if build is not None else create_gallery(dtype), root)
+            self._load(current_version(root))
+        self._next_check = time.monotonic() + check_interval
+
+    def _load(self, version):
+        gallery = load_store(version_path(self.root, version), mmap=True)
+        if gallery is None:
+            raise FileNotFoundError(f"Shared gallery version {version} is missing in {self.root}")
+        self._gallery, self.version = gallery, version
+
+    def _current(self):
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            version = current_version(self.root)
+            if version is not None and version != self.version:
+                with self._lock:
+                    if version != self.version:
+                        try:
+                            self._load(version)
+                            self.reloads += 1
+                            print(f"[INFO] Mapped shared gallery version {version} ({len(self._gallery)} faces).")
+                        except (OSError, ValueError):
+                            pass  # Being replaced or pruned; retried on the next check
+        return self._gallery
+
+    def refresh(self):
+        """Checks for a newer version now instead of waiting for the next interval."""
+        self._next_check = 0.0
+        return self.version if self._current() is not None else None
+
+    def _update(self, change):
+        """Applies change(gallery) to the newest version under the store lock and publishes the result."""
+        with self._lock, store_lock(self.root):
+            gallery = load_store(version_path(self.root, current_version(self.root)), mmap=False)
+            result = change(gallery)
+            self._load(publish_version(gallery, self.root))
+        return result
+
+    def add(self, reg_no, embedding):
+        self._update(lambda gallery: gallery.add(reg_no, embedding))
+
+    def remove(self, reg_no):
+        return self._update(lambda gallery: gallery.remove(reg_no))
+
+    def __len__(self):
+        return len(self._current())
+
+    def __contains__(self, reg_no):
+        return reg_no in self._current()
+
+    def __iter__(self):
+        return iter(self._current())
+
+    def __getattr__(self, name):
+        # search, match, get, matrix, reg_nos, dim, ... of the current version
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._current(), name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or republish the gallery shared by server workers.")
+    parser.add_argument("--path", default=SHARED_STORE_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="Publish a new version built from the dataset")
+    parser.add_argument("--dtype", default="float32", help="Stored embedding precision for --rebuild")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        from main import DATASET_PATH
+        from models import ModelRegistry
+        from database_utils import init_database
+        from embedding_cache import EmbeddingCache
+        from ann_index import create_index
+        from registration import load_dataset
+
+        registry = ModelRegistry(os.environ.get('EMBEDDER_BACKEND', 'keras'))
+        cache = EmbeddingCache()
+        # Models are only loaded if some images are missing from the embedding cache
+        gallery = load_dataset(DATASET_PATH, registry.lazy_detector(), registry.lazy_embedder(), init_database(),
+                               cache, create_index("exact", dtype=args.dtype))
+        cache.close()
+        with store_lock(args.path):
+            version = publish_version(gallery, args.path)
+        print(f"[INFO] Published shared gallery version {version} ({len(gallery)} faces) to {args.path}.")
+        return
+
+    version = current_version(args.path)
+    if version is None:
+        print(f"[INFO] No shared gallery published in {args.path}.")
+        return
+    gallery = load_store(version_path(args.path, version))
+    print(f"[INFO] Shared gallery version {version}: {len(gallery)} faces, {gallery._matrix.dtype.name}.")
+
+
+if __name__ == "__main__":
+    main()
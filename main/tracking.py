@@ -0,0 +1,189 @@
+import itertools
+import time
+import numpy as np
+from faceDetection import detect_faces, detect_faces_fast, extract_face
+from faceEmbedding import get_embeddings
+from recognition import annotate_face
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Computes the pairwise intersection-over-union of two sets of (x1, y1, x2, y2) boxes."""
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+class Track:
+    """A face followed across frames together with its current identity."""
+
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = box
+        self.reg_no = None
+        self.score = -1.0
+        self.last_embedded = None
+        self.missed = 0
+
+
+class FaceTracker:
+    """
+    Associates detected face boxes across frames by IoU and keeps a
+    track ID -> identity assignment, so a face only needs to be embedded when
+    its track is new, its match is weak, or its identity is older than
+    `stale_seconds`.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=2, min_confidence=0.7, stale_seconds=3.0):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.min_confidence = min_confidence
+        self.stale_seconds = stale_seconds
+        self.tracks = []
+        self._ids = itertools.count(1)
+
+    def update(self, boxes):
+        """
+        Matches new detections to existing tracks (greedy, highest IoU first),
+        starts tracks for unmatched boxes and drops tracks missed too many times.
+        """
+        boxes = list(boxes)
+        matched_tracks, matched_boxes = set(), set()
+        if self.tracks and boxes:
+            ious = iou_matrix([t.box for t in self.tracks], boxes)
+            for flat in np.argsort(-ious, axis=None):
+                ti, bi = np.unravel_index(flat, ious.shape)
+                if ious[ti, bi] < self.iou_threshold:
+                    break
+                if ti in matched_tracks or bi in matched_boxes:
+                    continue
+                self.tracks[ti].box = boxes[bi]
+                self.tracks[ti].missed = 0
+                matched_tracks.add(ti)
+                matched_boxes.add(bi)
+
+        survivors = []
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    continue
+            survivors.append(track)
+        for bi, box in enumerate(boxes):
+            if bi not in matched_boxes:
+                survivors.append(Track(next(self._ids), box))
+        self.tracks = survivors
+        return self.tracks
+
+    def needs_embedding(self, track, now):
+        """True if the track is new, weakly matched or its identity has gone stale."""
+        return (track.last_embedded is None
+                or track.score < self.min_confidence
+                or now - track.last_embedded > self.stale_seconds)
+
+    @staticmethod
+    def assign(track, reg_no, score, now):
+        track.reg_no = reg_no
+        track.score = score
+        track.last_embedded = now
+
+
+class TrackedRecognizer:
+    """
+    Recognition for a continuous video stream that avoids redundant work.
+
+    Full SSD detection runs only every `detect_every` frames (K); in between the
+    last known boxes are reused. A face is re-embedded only when its track is new,
+    below `min_confidence`, or older than `stale_seconds` (T). With `fast_detection`
+    the periodic detection uses detect_faces_fast, seeded with the current tracks.
+    Frame rate and the fraction of skipped embeddings are tracked in `stats()`.
+    """
+
+    def __init__(self, net, embedder, database, threshold=0.6, detect_every=5, stale_seconds=3.0,
+                 min_confidence=0.7, iou_threshold=0.3, fast_detection=False):
+        self.net = net
+        self.embedder = embedder
+        self.database = database
+        self.threshold = threshold
+        self.detect_every = max(1, detect_every)
+        self.fast_detection = fast_detection
+        self.tracker = FaceTracker(iou_threshold=iou_threshold, min_confidence=min_confidence,
+                                   stale_seconds=stale_seconds)
+        self.frames = 0
+        self.face_observations = 0
+        self.embeddings = 0
+        self._started = None
+
+    def recognize(self, frame, net=None):
+        """
+        Updates the tracks for a frame without drawing on it.
+        `net` overrides the detection model, e.g. with a worker's own instance.
+
+        Returns:
+            list: (box, reg_no, score) for every face visible in the frame.
+        """
+        now = time.monotonic()
+        if self._started is None:
+            self._started = now
+        if self.frames % self.detect_every == 0:
+            net = net if net is not None else self.net
+            if self.fast_detection:
+                boxes = detect_faces_fast(frame, net, [t.box for t in self.tracker.tracks])
+            else:
+                boxes = detect_faces(frame, net)
+            self.tracker.update(boxes)
+        self.frames += 1
+
+        tracks = [t for t in self.tracker.tracks if t.missed == 0]
+        self.face_observations += len(tracks)
+
+        # Embed only the tracks that need a fresh identity, in one batch
+        pending = [t for t in tracks if self.tracker.needs_embedding(t, now)]
+        if pending:
+            embeddings = get_embeddings([extract_face(frame, t.box) for t in pending], self.embedder)
+            best = [c[0] if c else (None, -1.0) for c in self.database.search(embeddings, k=1)]
+            for track, (reg_no, score) in zip(pending, best):
+                self.tracker.assign(track, reg_no, score, now)
+            # Multi-template galleries learn new exemplars from confident matches
+            if hasattr(self.database, "observe"):
+                self.database.observe(embeddings, best)
+            self.embeddings += len(pending)
+
+        return [(t.box, t.reg_no, t.score) for t in tracks]
+
+    def recognized(self, results):
+        """Returns the registration numbers in recognize() results that pass the threshold."""
+        return [reg_no for _, reg_no, score in results if reg_no is not None and score > self.threshold]
+
+    def annotate(self, frame, results):
+        """Draws recognize() results on the frame."""
+        for box, reg_no, score in results:
+            annotate_face(frame, box, reg_no, score, self.threshold)
+        return frame
+
+    def process(self, frame):
+        """
+        Recognizes the faces in a frame and annotates it.
+
+        Returns:
+            tuple: (list of recognized registration numbers, annotated frame)
+        """
+        results = self.recognize(frame)
+        return self.recognized(results), self.annotate(frame, results)
+
+    def stats(self):
+        """Returns frames per second and the fraction of face observations that skipped embedding."""
+        elapsed = time.monotonic() - self._started if self._started is not None else 0.0
+        return {
+            'frames': self.frames,
+            'fps': self.frames / elapsed if elapsed > 0 else 0.0,
+            'embeddings': self.embeddings,
+            'skipped_fraction': 1.0 - self.embeddings / self.face_observations if self.face_observations else 0.0,
+        }
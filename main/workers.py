@@ -0,0 +1,91 @@
+"""
+Runs several server workers for more recognition throughput on one host.
+
+Each worker is a separate server.py process with its own models and inference
+scheduler, listening on its own port (base port + worker index). Workers map
+one shared gallery (see shared_gallery.py) and relay Socket.IO emits and
+broadcasts through a message queue. Put a load balancer with sticky sessions
+(e.g. nginx ip_hash) in front of the ports, or point clients at them directly.
+
+Usage:
+    python workers.py --workers 4 --message-queue redis://127.0.0.1:6379/0
+    python workers.py --workers 2 --standin     # local test: starts mq_standin.py on --standin-port
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from shared_gallery import SHARED_STORE_PATH
+
+
+def worker_env(index, port, message_queue, shared_path):
+    env = dict(os.environ)
+    env.update({
+        'WORKER_ID': str(index),
+        'SERVER_PORT': str(port),
+        'SHARED_GALLERY': shared_path,
+        'FACE_INDEX_BACKEND': 'exact',
+    })
+    if message_queue:
+        env['SOCKETIO_MESSAGE_QUEUE'] = message_queue
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several server workers sharing one gallery and a message queue.")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--base-port", type=int, default=5000)
+    parser.add_argument("--message-queue", default=os.environ.get('SOCKETIO_MESSAGE_QUEUE'),
+                        help="Socket.IO message queue URL, e.g. redis://127.0.0.1:6379/0")
+    parser.add_argument("--standin", action="store_true", help="Start the local Redis stand-in and use it")
+    parser.add_argument("--standin-port", type=int, default=6379)
+    parser.add_argument("--shared-gallery", default=SHARED_STORE_PATH, help="Shared gallery store directory")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    processes = []
+    message_queue = f"redis://127.0.0.1:{args.standin_port}/0" if args.standin else args.message_queue
+    if message_queue and message_queue.startswith(('redis://', 'rediss://')):
+        try:
+            import redis  # noqa: F401  (used by Socket.IO's Redis manager in the workers)
+        except ImportError:
+            print("[ERROR] A Redis message queue needs the 'redis' package: pip install redis")
+            return 1
+    if args.standin:
+        processes.append(subprocess.Popen([sys.executable, os.path.join(here, "mq_standin.py"),
+                                           "--port", str(args.standin_port)]))
+        time.sleep(0.5)
+    if args.workers > 1 and not message_queue:
+        print("[WARN] No message queue: broadcasts only reach the clients of the worker that sent them.")
+
+    for index in range(args.workers):
+        port = args.base_port + index
+        env = worker_env(index, port, message_queue, args.shared_gallery)
+        processes.append(subprocess.Popen([sys.executable, os.path.join(here, "server.py")], cwd=here, env=env))
+        print(f"[INFO] Worker {index} starting on port {port} (pid {processes[-1].pid})")
+        if index == 0:
+            # The first worker publishes the shared gallery; give it the store lock first
+            time.sleep(1.0)
+
+    def stop(*_):
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        while all(process.poll() is None for process in processes):
+            time.sleep(1.0)
+        print("[WARN] A worker exited; stopping the others.")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import threading
+import numpy as np
+from ann_index import IVFIndex, create_index
+from benchmark_ann import synthetic_embeddings
+from gallery import normalize
+
+
+def _noisy(vectors, scale, seed=1):
+    rng = np.random.default_rng(seed)
+    return normalize(vectors + scale * rng.normal(size=vectors.shape) / np.sqrt(vectors.shape[1]))
+
+
+def test_ivf_recall_against_exact():
+    vectors = synthetic_embeddings(4000, 128, clusters=40, seed=0)
+    exact, ivf = create_index("exact"), IVFIndex(nlist=32, nprobe=8, train_threshold=2000)
+    for i, vec in enumerate(vectors):
+        exact.add(f"S{i:05d}", vec)
+        ivf.add(f"S{i:05d}", vec)
+    assert ivf.is_trained and len(ivf) == len(exact)
+
+    queries = _noisy(vectors[::20], 0.3)
+    truth = [c[0][0] for c in exact.search(queries)]
+    found = [c[0][0] for c in ivf.search(queries)]
+    assert np.mean([t == f for t, f in zip(truth, found)]) >= 0.95
+
+    # Probing every list is exact
+    ivf.nprobe = ivf.nlist
+    assert [c[0][0] for c in ivf.search(queries)] == truth
+    for (reg_no, score), (exact_reg_no, exact_score) in zip(ivf.match(queries, 0.0), exact.match(queries, 0.0)):
+        assert reg_no == exact_reg_no and abs(score - exact_score) < 1e-5
+    assert all(reg_no is None for reg_no, _ in ivf.match(-queries, 0.6))
+
+
+def test_ivf_replace_and_remove():
+    vectors = synthetic_embeddings(300, 128, clusters=5, seed=2)
+    ivf = IVFIndex(nlist=4, nprobe=4, train_threshold=200)
+    for i, vec in enumerate(vectors):
+        ivf.add(f"S{i}", vec)
+    ivf.add("S0", vectors[1])
+    assert len(ivf) == 300
+    assert np.allclose(ivf.get("S0"), vectors[1], atol=1e-6)
+    assert ivf.remove("S5") and not ivf.remove("S5")
+    assert "S5" not in ivf and all(c[0][0] != "S5" for c in ivf.search(vectors[5]))
+
+
+def test_ivf_search_during_training():
+    vectors = synthetic_embeddings(1500, 128, clusters=10, seed=3)
+    ivf = IVFIndex(nlist=16, nprobe=16, train_threshold=10 ** 9)
+    for i, vec in enumerate(vectors):
+        ivf.add(f"S{i}", vec)
+    errors, stop = [], threading.Event()
+
+    def searcher():
+        try:
+            while not stop.is_set():
+                for reg_no, score in (c[0] for c in ivf.search(vectors[:50])):
+                    assert score > 0.99, (reg_no, score)
+        except Exception as e:  # noqa: BLE001  (reported by the main thread)
+            errors.append(e)
+
+    threads = [threading.Thread(target=searcher) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for seed in range(5):
+        ivf.seed = seed
+        ivf.train()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert not errors
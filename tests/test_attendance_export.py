@@ -0,0 +1,63 @@
+import csv
+import io
+import sqlite3
+import pytest
+from attendance_export import _decode_column, _encode_column, export_attendance, read_columnar
+from database_utils import EXPORT_COLUMNS, init_database
+
+
+@pytest.fixture
+def conn():
+    conn = init_database(sqlite3.connect(":memory:"))
+    with conn:
+        conn.executemany("INSERT INTO students VALUES (?, ?, ?, ?)",
+                         [(f"R{i}", f"Student {i}", str(3 + i % 2), None if i == 0 else "555") for i in range(6)])
+        conn.executemany("INSERT INTO attendance (student_reg_no, timestamp, date) VALUES (?, ?, ?)",
+                         [(f"R{i}", f"2026-03-{day:02d} 09:{i:02d}:00", f"2026-03-{day:02d}")
+                          for day in range(1, 6) for i in range(6)])
+        # A record whose student was deleted still exports, with empty details
+        conn.execute("INSERT INTO attendance (student_reg_no, timestamp, date) "
+                     "VALUES ('GONE', '2026-03-06 09:00:00', '2026-03-06')")
+    return conn
+
+
+def _rows(conn, date_from=None, date_to=None):
+    return [tuple(row) for row in conn.execute("""
+        SELECT a.student_reg_no, s.name, s.semester, s.phone_number, a.timestamp, a.date
+        FROM attendance a LEFT JOIN students s ON a.student_reg_no = s.reg_no
+        WHERE (? IS NULL OR a.date >= ?) AND (? IS NULL OR a.date <= ?)
+        ORDER BY a.timestamp, a.id
+    """, (date_from, date_from, date_to, date_to))]
+
+
+def test_columnar_round_trip(conn):
+    out = io.BytesIO()
+    stats = export_attendance(conn, out, "columnar", chunk_size=7)
+    assert stats.rows == 31 and stats.bytes == len(out.getvalue())
+    out.seek(0)
+    groups = list(read_columnar(out))
+    assert [len(g["reg_no"]) for g in groups] == [7, 7, 7, 7, 3]
+    rows = [row for g in groups for row in zip(*(g[c] for c in EXPORT_COLUMNS))]
+    assert rows == _rows(conn)
+    assert rows[-1] == ("GONE", None, None, None, "2026-03-06 09:00:00", "2026-03-06")
+
+
+def test_csv_export_with_date_range(conn):
+    out = io.BytesIO()
+    export_attendance(conn, out, "csv", date_from="2026-03-02", date_to="2026-03-03", chunk_size=5)
+    reader = csv.reader(io.StringIO(out.getvalue().decode("utf-8")))
+    assert next(reader) == list(EXPORT_COLUMNS)
+    expected = [["" if v is None else v for v in row] for row in _rows(conn, "2026-03-02", "2026-03-03")]
+    assert list(reader) == expected and len(expected) == 12
+
+
+def test_column_encoding_wide_dictionary():
+    values = [f"R{i % 300}" for i in range(1000)] + [None]
+    assert _decode_column(_encode_column(values), len(values)) == values
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        list(read_columnar(io.BytesIO(b"reg_no,name\n")))
+    with pytest.raises(ValueError):
+        export_attendance(sqlite3.connect(":memory:"), io.BytesIO(), "xlsx")
@@ -0,0 +1,75 @@
+import sqlite3
+import pytest
+from attendance_query import (decode_cursor, encode_cursor, parse_filters, parse_limit, query_attendance,
+                              summarize_attendance)
+from database_utils import init_database
+
+
+@pytest.fixture
+def conn():
+    conn = init_database(sqlite3.connect(":memory:"))
+    with conn:
+        conn.executemany("INSERT INTO students VALUES (?, ?, ?, ?)",
+                         [(f"R{i}", f"Student {i}", str(3 + i % 2), "555") for i in range(10)])
+        # Ten days, every student present; several share a timestamp to exercise the id tiebreak
+        conn.executemany("INSERT INTO attendance (student_reg_no, timestamp, date) VALUES (?, ?, ?)",
+                         [(f"R{i}", f"2026-03-{day:02d} 09:00:{i // 3:02d}", f"2026-03-{day:02d}")
+                          for day in range(1, 11) for i in range(10)])
+    return conn
+
+
+def _all_pages(conn, filters=None, limit=7):
+    records, cursor, pages = [], None, 0
+    while True:
+        page = query_attendance(conn, filters, limit, cursor)
+        records += page["records"]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return records, pages
+
+
+def test_keyset_pages_cover_every_row_once(conn):
+    records, pages = _all_pages(conn)
+    assert len(records) == 100 and pages == 15
+    keys = [(r["timestamp"], r["reg_no"]) for r in records]
+    assert len(set(keys)) == 100
+    assert [r["timestamp"] for r in records] == sorted((r["timestamp"] for r in records), reverse=True)
+
+
+def test_rows_marked_while_paging_do_not_shift_pages(conn):
+    first = query_attendance(conn, limit=10)
+    with conn:
+        conn.execute("INSERT INTO attendance (student_reg_no, timestamp, date) "
+                     "VALUES ('R0', '2026-03-11 08:00:00', '2026-03-11')")
+    second = query_attendance(conn, limit=10, cursor=first["next_cursor"])
+    assert second["records"][0]["timestamp"] <= first["records"][-1]["timestamp"]
+    assert not {r["timestamp"] + r["reg_no"] for r in first["records"]} & \
+        {r["timestamp"] + r["reg_no"] for r in second["records"]}
+
+
+def test_filters(conn):
+    filters = parse_filters({"from": "2026-03-03", "to": "2026-03-04", "semester": "4", "reg_no": ""})
+    records, _ = _all_pages(conn, filters)
+    assert len(records) == 10
+    assert {r["date"] for r in records} == {"2026-03-03", "2026-03-04"}
+    assert {r["semester"] for r in records} == {"4"}
+
+    by_day = summarize_attendance(conn, "day", parse_filters({"semester": "3"}))
+    assert by_day[0] == {"date": "2026-03-01", "present": 5} and len(by_day) == 10
+    by_student = summarize_attendance(conn, "student", parse_filters({"reg_no": "R1"}))
+    assert by_student[0]["days_present"] == 10 and by_student[0]["attendance_rate"] == 1.0
+
+
+def test_bad_input_is_rejected():
+    assert decode_cursor(encode_cursor("2026-03-01 09:00:00", 42)) == ("2026-03-01 09:00:00", 42)
+    for bad in ("not-a-cursor", ""):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+    with pytest.raises(ValueError):
+        parse_filters({"from": "2026-03-05", "to": "2026-03-01"})
+    with pytest.raises(ValueError):
+        parse_filters({"from": "March"})
+    assert parse_limit("5000") == 1000 and parse_limit(None) == 100
+    with pytest.raises(ValueError):
+        parse_limit("ten")
@@ -0,0 +1,66 @@
+import numpy as np
+from bulk_enroll import EnrollmentCheckpoint, _plan_students
+from embedding_cache import EmbeddingCache
+from gallery import Gallery, normalize
+
+
+def _dataset(tmp_path, folders):
+    students = []
+    for folder in folders:
+        path = tmp_path / "dataset" / folder
+        path.mkdir(parents=True)
+        image = path / "1.jpg"
+        image.write_bytes(folder.encode())
+        students.append((tuple(folder.split("_")), [str(image)]))
+    return students
+
+
+def _embedding(seed):
+    return normalize(np.random.default_rng(seed).normal(size=128)).astype(np.float32)
+
+
+def test_resume_skips_done_and_failed(tmp_path):
+    students = _dataset(tmp_path, ["R1_Ann_1_555", "R2_Bob_1_555", "R3_Cid_1_555"])
+    cache = EmbeddingCache(str(tmp_path / "cache.db"))
+    cache.store(students[0][1][0], _embedding(1))  # finished before the interruption
+    cache.store(students[1][1][0], None)  # no face found
+    checkpoint = EnrollmentCheckpoint(str(tmp_path / "ckpt.json"), str(tmp_path / "dataset"))
+    checkpoint.done.add("R1")
+    checkpoint.failed.add("R2")
+
+    gallery = Gallery()
+    rows, todo = _plan_students(students, gallery, cache, checkpoint)
+    assert [row[0] for row in rows] == ["R1"]
+    assert "R1" in gallery
+    assert [job[0][0] for job in todo] == ["R3"]
+
+    _, todo = _plan_students(students, Gallery(), cache, checkpoint, retry_failed=True)
+    assert [job[0][0] for job in todo] == ["R2", "R3"]
+
+    # New photos for a failed student are always retried
+    with open(students[1][1][0], "ab") as f:
+        f.write(b"retaken")
+    _, todo = _plan_students(students, Gallery(), cache, checkpoint)
+    assert [job[0][0] for job in todo] == ["R2", "R3"]
+    cache.close()
+
+
+def test_duplicate_reg_no_enrolled_once(tmp_path):
+    students = _dataset(tmp_path, ["R1_Ann_1_555", "R1_Bea_2_555"])
+    cache = EmbeddingCache(str(tmp_path / "cache.db"))
+    checkpoint = EnrollmentCheckpoint(str(tmp_path / "ckpt.json"), str(tmp_path / "dataset"))
+    _, todo = _plan_students(students, Gallery(), cache, checkpoint)
+    assert [job[0] for job in todo] == [("R1", "Ann", "1", "555")]
+    cache.close()
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "ckpt.json")
+    checkpoint = EnrollmentCheckpoint(path, str(tmp_path))
+    checkpoint.done.update({"R1", "R2"})
+    checkpoint.failed.add("R3")
+    checkpoint.save()
+    loaded = EnrollmentCheckpoint(path, str(tmp_path)).load()
+    assert (loaded.done, loaded.failed) == ({"R1", "R2"}, {"R3"})
+    # A checkpoint from another dataset is ignored
+    assert not EnrollmentCheckpoint(path, str(tmp_path / "other")).load().done
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from compact_store import STORE_DTYPES, create_gallery, gallery_nbytes, load_store, quantize, save_store
+from gallery import normalize
+
+
+def _gallery(dtype, n=200, seed=0):
+    vectors = normalize(np.random.default_rng(seed).normal(size=(n, 128)))
+    gallery = create_gallery(dtype, capacity=16)
+    for i, vec in enumerate(vectors):
+        gallery.add(f"S{i:03d}", vec)
+    return gallery, vectors
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_quantized_scores_close_to_float32(dtype):
+    exact, vectors = _gallery("float32")
+    compact = quantize(exact, dtype)
+    queries = normalize(vectors[:20] + 0.3 * np.random.default_rng(1).normal(size=(20, 128)) / np.sqrt(128))
+    for ref, got in zip(exact.search(queries, k=3), compact.search(queries, k=3)):
+        assert ref[0][0] == got[0][0]
+        assert abs(ref[0][1] - got[0][1]) < 0.01
+    assert gallery_nbytes(compact) < gallery_nbytes(exact)
+
+
+def test_int8_swap_remove_moves_scales():
+    gallery, vectors = _gallery("int8", n=10)
+    gallery.remove("S000")
+    # S009 was swapped into row 0 together with its scale
+    assert gallery.reg_nos[0] == "S009"
+    assert np.allclose(gallery.get("S009"), vectors[9], atol=0.01)
+
+
+@pytest.mark.parametrize("dtype", STORE_DTYPES)
+def test_save_and_mmap_load_round_trip(tmp_path, dtype):
+    gallery, vectors = _gallery(dtype, n=50)
+    gallery.remove("S010")
+    save_store(gallery, str(tmp_path))
+    loaded = load_store(str(tmp_path), mmap=True)
+    assert isinstance(loaded._matrix, np.memmap)
+    assert list(loaded) == list(gallery)
+    assert np.array_equal(loaded.matrix, gallery.matrix)
+    assert [c[0][0] for c in loaded.search(vectors[:5])] == [c[0][0] for c in gallery.search(vectors[:5])]
+
+    # Changes go to a private copy, never to the mapped file
+    loaded.add("NEW", vectors[10])
+    loaded.remove("S000")
+    assert not isinstance(loaded._matrix, np.memmap)
+    reloaded = load_store(str(tmp_path))
+    assert "S000" in reloaded and "NEW" not in reloaded and len(reloaded) == 49
+
+
+def test_load_missing_store(tmp_path):
+    assert load_store(str(tmp_path / "none")) is None
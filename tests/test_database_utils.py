@@ -0,0 +1,66 @@
+import sqlite3
+import pytest
+import database_utils
+from database_utils import init_database, mark_attendance, migrate_attendance_schema, rebuild_daily_summary, set_durability
+
+
+def _old_database():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("""
+        CREATE TABLE students (reg_no TEXT PRIMARY KEY, name TEXT NOT NULL, semester TEXT, phone_number TEXT);
+        CREATE TABLE attendance (id INTEGER PRIMARY KEY AUTOINCREMENT, student_reg_no TEXT, timestamp TEXT);
+        INSERT INTO students VALUES ('R1', 'Ann', '3', '555'), ('R2', 'Bob', '5', '555');
+        INSERT INTO attendance (student_reg_no, timestamp) VALUES
+            ('R1', '2026-03-02 09:00:00'), ('R1', '2026-03-02 10:00:00'),
+            ('R2', '2026-03-02 09:30:00'), ('R1', '2026-03-03 09:00:00');
+    """)
+    return conn
+
+
+def _summary(conn):
+    return conn.execute("SELECT date, semester, present FROM attendance_daily ORDER BY date, semester").fetchall()
+
+
+def test_migration_dedupes_once(capsys):
+    conn = init_database(_old_database())
+    assert "Removed 1 duplicate attendance rows" in capsys.readouterr().out
+    assert conn.execute("SELECT id, date FROM attendance ORDER BY id").fetchall() == [
+        (1, "2026-03-02"), (3, "2026-03-02"), (4, "2026-03-03")]
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO attendance (student_reg_no, timestamp, date) "
+                     "VALUES ('R1', '2026-03-02 11:00:00', '2026-03-02')")
+
+    # With the unique index in place, later runs skip the duplicate scan entirely
+    migrate_attendance_schema(conn)
+    assert "duplicate" not in capsys.readouterr().out
+
+
+def test_summary_triggers_track_attendance():
+    conn = init_database(_old_database())
+    assert _summary(conn) == [("2026-03-02", "3", 1), ("2026-03-02", "5", 1), ("2026-03-03", "3", 1)]
+
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO attendance (student_reg_no, timestamp, date) "
+                     "VALUES ('R2', '2026-03-03 09:00:00', '2026-03-03')")
+        conn.execute("DELETE FROM attendance WHERE id = 1")
+        conn.execute("UPDATE students SET semester = '4' WHERE reg_no = 'R1'")
+    expected = [("2026-03-02", "3", 0), ("2026-03-02", "5", 1), ("2026-03-03", "3", 0),
+                ("2026-03-03", "4", 1), ("2026-03-03", "5", 1)]
+    assert _summary(conn) == expected
+    rebuild_daily_summary(conn)
+    assert _summary(conn) == [row for row in expected if row[2]]
+
+
+def test_async_mode_writes_other_databases_synchronously(monkeypatch):
+    conn = init_database(_old_database())
+    queued = []
+    monkeypatch.setattr(database_utils.student_cache, "name", lambda reg_no: reg_no)
+    set_durability("async")
+    try:
+        monkeypatch.setattr(database_utils._writer, "submit", lambda *record: queued.append(record))
+        assert mark_attendance(conn, "R2")
+    finally:
+        set_durability("sync")
+    # Not queued for the writer, which only knows the pooled attendance database
+    assert not queued
+    assert conn.execute("SELECT COUNT(*) FROM attendance WHERE student_reg_no = 'R2'").fetchone()[0] == 2
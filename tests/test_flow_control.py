@@ -0,0 +1,76 @@
+import time
+from flow_control import FlowController, FrameDropped
+
+
+class FakeScheduler:
+    """Holds submitted frames until the test finishes them."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, frame, done):
+        self.jobs.append((frame, done))
+
+    def finish(self, results="ok", error=None):
+        frame, done = self.jobs.pop(0)
+        done(results, error)
+        return frame
+
+
+def _recorder(log, name):
+    return lambda results, error, flow: log.append((name, results, error, flow))
+
+
+def test_one_frame_in_flight_and_newest_waiting():
+    scheduler, log = FakeScheduler(), []
+    flow = FlowController(scheduler.submit, max_age_ms=10000)
+    assert flow.offer("c1", "f1", _recorder(log, "f1")) == "submitted"
+    assert flow.offer("c1", "f2", _recorder(log, "f2")) == "queued"
+    assert flow.offer("c1", "f3", _recorder(log, "f3")) == "replaced"
+    # Another client is independent
+    assert flow.offer("c2", "g1", _recorder(log, "g1")) == "submitted"
+    assert [frame for frame, _ in scheduler.jobs] == ["f1", "g1"]
+
+    assert scheduler.finish() == "f1"
+    assert scheduler.jobs[-1][0] == "f3"  # f2 was superseded and never processed
+    scheduler.finish()
+    assert scheduler.finish() == "f3"
+    assert [name for name, *_ in log] == ["f1", "g1", "f3"]
+    stats = flow.snapshot()["c1"]
+    assert (stats["received"], stats["processed"], stats["dropped_superseded"]) == (3, 2, 1)
+    assert not stats["in_flight"]
+    assert flow.offer("c1", "f4", _recorder(log, "f4")) == "submitted"
+
+
+def test_stale_waiting_frame_is_dropped():
+    scheduler, log = FakeScheduler(), []
+    flow = FlowController(scheduler.submit, max_age_ms=1)
+    flow.offer("c1", "f1", _recorder(log, "f1"))
+    flow.offer("c1", "f2", _recorder(log, "f2"))
+    time.sleep(0.01)
+    scheduler.finish()
+    assert not scheduler.jobs
+    name, results, error, info = log[-1]
+    assert name == "f2" and results is None and isinstance(error, FrameDropped)
+    assert info["dropped"] == 1
+    assert flow.snapshot()["c1"]["dropped_stale"] == 1
+
+
+def test_recommended_interval_follows_latency():
+    scheduler = FakeScheduler()
+    flow = FlowController(scheduler.submit, min_interval_ms=100, max_interval_ms=3000, headroom=2.0, alpha=1.0)
+    flow.offer("c1", "f1", lambda *a: None)
+    assert flow.info("c1")["recommended_interval_ms"] == 100
+    time.sleep(0.2)
+    scheduler.finish()
+    interval = flow.info("c1")["recommended_interval_ms"]
+    assert 380 <= interval <= 3000
+
+
+def test_forget_drops_client_state():
+    scheduler = FakeScheduler()
+    flow = FlowController(scheduler.submit)
+    flow.offer("c1", "f1", lambda *a: None)
+    flow.forget("c1")
+    scheduler.finish()  # A result for a departed client is ignored
+    assert flow.info("c1") is None and flow.snapshot() == {}
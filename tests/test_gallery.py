@@ -0,0 +1,57 @@
+import numpy as np
+from gallery import Gallery, normalize
+
+
+def _vectors(n, seed=0):
+    return normalize(np.random.default_rng(seed).normal(size=(n, 128)))
+
+
+def _assert_consistent(gallery, expected):
+    assert len(gallery) == len(expected)
+    assert sorted(gallery) == sorted(expected)
+    for row, reg_no in enumerate(gallery.reg_nos.tolist()):
+        assert gallery._rows[reg_no] == row
+        assert np.allclose(gallery.matrix[row], expected[reg_no], atol=1e-6)
+
+
+def test_swap_remove_keeps_rows_consistent():
+    vectors = _vectors(100)
+    gallery = Gallery(capacity=8)
+    expected = {}
+    for i, vec in enumerate(vectors):
+        gallery.add(f"S{i}", vec)
+        expected[f"S{i}"] = vec
+    for reg_no in ("S0", "S99", "S50", "S1"):  # first, last, middle
+        assert gallery.remove(reg_no)
+        del expected[reg_no]
+        _assert_consistent(gallery, expected)
+    assert not gallery.remove("S0")
+
+    # A freed slot is reused and replacing keeps a single row
+    gallery.add("S0", vectors[0])
+    gallery.add("S2", vectors[3])
+    expected.update({"S0": vectors[0], "S2": vectors[3]})
+    _assert_consistent(gallery, expected)
+    assert gallery.search(vectors[3], k=2)[0][0][0] in ("S2", "S3")
+
+
+def test_remove_everything_then_add():
+    gallery = Gallery(capacity=1)
+    for i, vec in enumerate(_vectors(3)):
+        gallery.add(f"S{i}", vec)
+    for i in range(3):
+        gallery.remove(f"S{i}")
+    assert len(gallery) == 0 and gallery.search(_vectors(2)) == [[], []]
+    gallery.add("S9", _vectors(1)[0])
+    [(reg_no, score)] = gallery.match(_vectors(1), 0.99)
+    assert reg_no == "S9" and score > 0.999
+
+
+def test_match_threshold_and_topk_order():
+    vectors = _vectors(20, seed=1)
+    gallery = Gallery.from_dict({f"S{i}": vec for i, vec in enumerate(vectors)})
+    candidates = gallery.search(vectors[4], k=5)[0]
+    assert candidates[0][0] == "S4"
+    assert [score for _, score in candidates] == sorted((score for _, score in candidates), reverse=True)
+    assert gallery.match(-vectors[4], 0.6) == [(None, gallery.search(-vectors[4])[0][0][1])]
+
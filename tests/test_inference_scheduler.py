@@ -0,0 +1,60 @@
+import threading
+from inference_scheduler import FrameResults, InferenceScheduler
+
+
+class StubScheduler(InferenceScheduler):
+    """Skips the models: every frame's result is its own value, or the batch fails."""
+
+    fail = False
+
+    def _process(self, batch):
+        if self.fail:
+            raise RuntimeError("model failure")
+        return [FrameResults([frame]) for frame, _, _ in batch]
+
+
+def _submit_batch(scheduler, frames, callback):
+    # Hold the worker so every frame lands in one batch
+    with scheduler._queue.mutex:
+        for frame in frames:
+            scheduler._queue.queue.append((frame, callback, 0.0))
+        scheduler._queue.not_empty.notify()
+
+
+def test_failing_callback_does_not_answer_others_twice():
+    scheduler = StubScheduler(None, None, None, max_wait_ms=50)
+    calls, done = [], threading.Event()
+
+    def callback(results, error):
+        calls.append((results, error))
+        if results == [2]:
+            raise ValueError("client went away")
+        if len(calls) == 3:
+            done.set()
+
+    _submit_batch(scheduler, [1, 2, 3], callback)
+    assert done.wait(2.0)
+    scheduler.stop()
+    assert calls == [([1], None), ([2], None), ([3], None)]
+
+
+def test_batch_error_reaches_every_request_once_and_worker_survives():
+    scheduler = StubScheduler(None, None, None, max_wait_ms=50)
+    scheduler.fail = True
+    calls, done = [], threading.Event()
+
+    def callback(results, error):
+        calls.append((results, type(error).__name__ if error else None))
+        if len(calls) == 2:
+            done.set()
+        raise ValueError("callback bug")
+
+    _submit_batch(scheduler, [1, 2], callback)
+    assert done.wait(2.0)
+    assert calls == [(None, "RuntimeError"), (None, "RuntimeError")]
+
+    scheduler.fail = False
+    answered = threading.Event()
+    scheduler.submit(4, lambda results, error: answered.set())
+    assert answered.wait(2.0)
+    scheduler.stop()
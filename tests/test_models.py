@@ -0,0 +1,86 @@
+import threading
+import time
+import numpy as np
+from models import ModelRegistry
+
+
+class RecordingNet:
+    """Fake cv2.dnn net that fails if another thread's setInput lands between a setInput and its forward."""
+
+    def __init__(self):
+        self.input = None
+        self.errors = 0
+
+    def setInput(self, blob):
+        self.input = blob
+
+    def forward(self):
+        blob = self.input
+        time.sleep(0.001)
+        if self.input is not blob:
+            self.errors += 1
+        return blob
+
+
+class FakeEmbedder:
+    """Fake embedder backed by one shared net, like the ONNX backend."""
+
+    def __init__(self):
+        self.net = RecordingNet()
+
+    def embeddings(self, images):
+        self.net.setInput(images)
+        out = self.net.forward()
+        return np.zeros((len(out), 128), dtype=np.float32)
+
+
+def registry_with_fakes(warmup_batch=1):
+    registry = ModelRegistry(warmup_batch=warmup_batch)
+    registry._detector = RecordingNet()
+    registry._embedder = FakeEmbedder()
+    return registry
+
+
+def test_lazy_detector_pairs_are_atomic():
+    registry = registry_with_fakes()
+    net = registry.lazy_detector()
+    outputs = []
+
+    def run(tag):
+        for i in range(50):
+            blob = np.full(1, tag * 1000 + i)
+            net.setInput(blob)
+            outputs.append(net.forward() is blob)
+
+    threads = [threading.Thread(target=run, args=(t,)) for t in range(4)]
+    threads.append(threading.Thread(target=lambda: [registry.warm_up() for _ in range(20)]))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry._detector.errors == 0
+    assert all(outputs)
+
+
+def test_lazy_embedder_calls_are_serialized():
+    registry = registry_with_fakes()
+    embedder = registry.lazy_embedder()
+
+    def run():
+        for _ in range(50):
+            embedder.embeddings(np.zeros((1, 160, 160, 3), dtype=np.uint8))
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    threads.append(threading.Thread(target=lambda: [registry.warm_up() for _ in range(20)]))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry._embedder.net.errors == 0
+
+
+def test_load_sets_ready():
+    registry = registry_with_fakes()
+    detector, embedder = registry.load()
+    assert registry.ready.is_set() and detector is registry._detector
+    assert "warm_up" in registry.timings
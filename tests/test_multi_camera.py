@@ -0,0 +1,6 @@
+from multi_camera import parse_source, parse_sources
+
+
+def test_sources_keep_spaces_in_paths():
+    assert parse_sources("0, lecture 1.mp4,rtsp://cam/stream ,") == [0, "lecture 1.mp4", "rtsp://cam/stream"]
+    assert [parse_source(s) for s in ["1", "room b/lecture 2.mp4"]] == [1, "room b/lecture 2.mp4"]
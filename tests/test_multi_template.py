@@ -0,0 +1,27 @@
+import numpy as np
+from gallery import RECOGNITION_DISTANCE, cosine_to_distance, distance_to_cosine, normalize
+from multi_template import LEARN_MIN_SCORE, MultiTemplateGallery
+
+
+def _vec(seed):
+    return normalize(np.random.default_rng(seed).normal(size=128))
+
+
+def test_learn_threshold_well_above_acceptance():
+    acceptance = distance_to_cosine(RECOGNITION_DISTANCE)
+    assert LEARN_MIN_SCORE >= acceptance + 0.05
+
+
+def test_observe_ignores_just_accepted_matches():
+    gallery = MultiTemplateGallery(learn_interval=0.0)
+    gallery.add("R1", _vec(0))
+    just_accepted = distance_to_cosine(RECOGNITION_DISTANCE) + 0.005
+    assert cosine_to_distance(just_accepted) < RECOGNITION_DISTANCE
+    assert gallery.observe(_vec(1), [("R1", just_accepted)], now=0.0) == 0
+    assert gallery.observe(_vec(1), [("R1", LEARN_MIN_SCORE + 0.01)], now=1.0) == 1
+    assert len(gallery.exemplars("R1")) == 2
+
+
+def test_distance_conversion_round_trip():
+    for score in (-1.0, 0.0, 0.5, 0.82, 1.0):
+        assert abs(distance_to_cosine(cosine_to_distance(score)) - score) < 1e-9
@@ -0,0 +1,35 @@
+import pytest
+from offline_attendance import AttendanceTally, background
+
+
+def test_single_photo_sighting_counts():
+    tally = AttendanceTally()
+    tally.add("R1", 0.9, "photos", "IMG_0001.jpg")
+    tally.add("R2", 0.9, "lecture.mp4", 12.0)
+    tally.add("R3", 0.9, "lecture.mp4", 12.0)
+    tally.add("R3", 0.8, "lecture.mp4", 13.0)
+    assert sorted(tally.present()) == ["R1", "R3"]
+    assert tally.students["R3"]["best_score"] == 0.9
+    assert tally.students["R3"]["last_seen"] == ("lecture.mp4", 13.0)
+
+
+def test_explicit_min_hits_applies_to_every_source():
+    tally = AttendanceTally()
+    tally.add("R1", 0.9, "photos", "IMG_0001.jpg")
+    tally.add("R2", 0.9, "lecture.mp4", 12.0)
+    assert tally.present(1) == ["R1", "R2"]
+    assert tally.present(2) == []
+
+
+def test_background_reraises_decoder_errors():
+    def frames():
+        yield 1
+        yield 2
+        raise OSError("corrupt video")
+
+    seen = []
+    with pytest.raises(OSError, match="corrupt video"):
+        for item in background(frames(), maxsize=1):
+            seen.append(item)
+    assert seen == [1, 2]
+    assert list(background(iter([1, 2, 3]))) == [1, 2, 3]
@@ -0,0 +1,59 @@
+import os
+import numpy as np
+import pytest
+from compact_store import STORE_DTYPES, create_gallery, load_store, save_store
+from shared_gallery import KEEP_VERSIONS, SharedGallery, current_version
+
+
+def unit(seed, dim=128):
+    vec = np.random.default_rng(seed).normal(size=dim)
+    return vec / np.linalg.norm(vec)
+
+
+@pytest.mark.parametrize("dtype", STORE_DTYPES)
+def test_empty_store_then_add(tmp_path, dtype):
+    save_store(create_gallery(dtype), str(tmp_path))
+    gallery = load_store(str(tmp_path))
+    assert len(gallery) == 0
+    gallery.add("S1", unit(1))
+    assert gallery.search(unit(1))[0][0][0] == "S1"
+
+
+@pytest.mark.parametrize("dtype", STORE_DTYPES)
+def test_shared_gallery_first_registration(tmp_path, dtype):
+    shared = SharedGallery(str(tmp_path), dtype=dtype)
+    assert len(shared) == 0
+    shared.add("S1", unit(1))
+    assert "S1" in shared
+    assert shared.version == 2
+
+
+def test_other_worker_maps_new_version(tmp_path):
+    def build():
+        gallery = create_gallery()
+        for i in range(10):
+            gallery.add(f"S{i}", unit(i))
+        return gallery
+
+    writer = SharedGallery(str(tmp_path), build=build)
+    reader = SharedGallery(str(tmp_path), check_interval=0.0)
+    writer.add("NEW", unit(99))
+    assert current_version(str(tmp_path)) == 2
+    assert "NEW" in reader
+    assert reader.version == 2
+    assert reader.match(unit(99)[None, :], 0.6)[0][0] == "NEW"
+    assert writer.remove("S0")
+    assert "S0" not in reader and len(reader) == 10
+
+
+def test_old_versions_are_pruned(tmp_path):
+    shared = SharedGallery(str(tmp_path), check_interval=60.0)
+    stale = SharedGallery(str(tmp_path), check_interval=60.0)
+    for i in range(5):
+        shared.add(f"S{i}", unit(i))
+    assert shared.version == 6 and len(shared) == 5
+    versions = sorted(name for name in os.listdir(tmp_path) if name.startswith("v"))
+    assert versions == [f"v{v:08d}" for v in range(7 - KEEP_VERSIONS, 7)]
+    # A worker still mapping a pruned version keeps serving it until it checks
+    assert stale.version == 1 and len(stale) == 0
+    assert stale.refresh() == 6 and len(stale) == 5